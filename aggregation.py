@@ -0,0 +1,272 @@
+"""
+Hierarchical VaR / ES aggregation (desk -> business line -> firm) on one
+scenario set.
+
+    from varlab.models import monte_carlo_scenarios
+    from varlab.aggregation import aggregate_risk
+
+    positions = pd.DataFrame({
+        "line":     ["macro", "macro", "equity", "equity"],
+        "desk":     ["rates", "fx",    "cash",   "cash"],
+        "asset":    ["TLT",   "GLD",   "SPY",    "QQQ"],
+        "exposure": [2e6,     1e6,     3e6,      -1e6],
+    })
+    sims = monte_carlo_scenarios(rets.iloc[-250:], n_sims=50_000)
+    res = aggregate_risk(sims, positions, levels=["line", "desk"], alpha=0.99)
+    res["nodes"]    # one row per node: firm, firm/macro, firm/macro/rates, ...
+    res["assets"]   # per (node, asset) Euler contributions
+
+The hierarchy becomes one sparse node x asset exposure matrix W = A X, with
+A the (node x position) aggregation matrix (1 where a position sits below a
+node) and X the (position x asset) exposures. Every node's scenario P&L is
+then a row of W S^T, one sparse-dense product for the whole tree, so the
+cost is nodes x scenarios (times the assets a node holds) instead of one
+portfolio_returns + VaR run per node. Rows are produced in chunks of nodes,
+so peak memory stays near max_chunk_bytes however large the tree.
+
+Contributions need no extra projection: the P&L is linear in W, so the
+Euler component ES of node c inside node p is W_c . (-mean of S over p's
+tail scenarios), and component VaR uses the scenarios ranked closest to
+p's quantile, as in attribution.risk_decomposition. Component ES of the
+children of a node sum exactly to its ES.
+
+Scenarios can be any n_scenarios x N matrix with one column per asset: a
+Monte Carlo set (models.monte_carlo_scenarios and friends) or a window of
+historical returns. Exposures are used as given, not re-normalised.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _hierarchy(positions: pd.DataFrame, levels: list[str], assets: list, root: str,
+               asset: str, exposure: str) -> tuple[pd.DataFrame, object]:
+    """
+    node table (path, level, parent, depth) and the sparse node x asset exposure matrix W = A X
+    """
+    from scipy import sparse
+
+    missing = [c for c in [*levels, asset, exposure] if c not in positions.columns]
+    if missing:
+        raise ValueError(f"positions is missing columns {missing}.")
+    unknown = set(positions[asset]) - set(assets)
+    if unknown:
+        raise ValueError(f"Positions reference assets not in the scenarios: {sorted(unknown)}")
+
+    pos = positions[[*levels, asset, exposure]].copy()
+    pos[levels] = pos[levels].astype(str)
+    # node paths join the level values with '/', so ("a/b", "c") and ("a", "b/c")
+    # would be one node with their exposures merged
+    bad = [lvl for lvl in levels if pos[lvl].str.contains("/", regex=False).any()]
+    if bad or "/" in root:
+        raise ValueError(
+            f"Level values and root may not contain '/', the node path separator "
+            f"(found in {bad or [root]})."
+        )
+
+    # nodes in breadth-first order: root, then every distinct prefix of the level columns
+    paths, depth, parents = [root], [0], [None]
+    for d in range(1, len(levels) + 1):
+        for prefix in pos[levels[:d]].drop_duplicates().itertuples(index=False, name=None):
+            paths.append("/".join((root, *prefix)))
+            depth.append(d)
+            parents.append("/".join((root, *prefix[:-1])))
+    node_id = {p: i for i, p in enumerate(paths)}
+    nodes = pd.DataFrame({
+        "level":  [root] + [levels[d - 1] for d in depth[1:]],
+        "parent": parents,
+        "depth":  depth,
+    }, index=pd.Index(paths, name="node"))
+
+    # A: every position counts towards each of its len(levels) + 1 ancestors
+    n_pos = len(pos)
+    path = np.full(n_pos, root, dtype=object)
+    rows = [np.fromiter((node_id[p] for p in path), dtype=np.intp, count=n_pos)]
+    for lvl in levels:
+        path = path + "/" + pos[lvl].to_numpy(dtype=object)
+        rows.append(np.fromiter((node_id[p] for p in path), dtype=np.intp, count=n_pos))
+    rows = np.concatenate(rows)
+    cols = np.tile(np.arange(n_pos), len(levels) + 1)
+    agg = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(paths), n_pos))
+
+    col = {a: j for j, a in enumerate(assets)}
+    x = sparse.csr_matrix(
+        (pos[exposure].to_numpy(dtype=float),
+         (np.arange(n_pos), pos[asset].map(col).to_numpy())),
+        shape=(n_pos, len(assets)),
+    )
+    return nodes, (agg @ x).tocsr() # duplicate (node, asset) entries are summed
+
+
+def _row_means(s: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """s[rows].mean(axis=1) for a (B, k) index array, as a sparse (B x n) averaging product"""
+    from scipy import sparse
+
+    b, k = rows.shape
+    avg = sparse.csr_matrix(
+        (np.full(b * k, 1.0 / k), rows.ravel(), np.arange(0, b * k + 1, k)),
+        shape=(b, len(s)),
+    )
+    return avg @ s
+
+
+def _order_stats(p: np.ndarray, alpha: float, m: int):
+    """
+    VaR quantile (as np.quantile), tail rows (the k worst, as attribution._tail)
+    and the m rows ranked closest to the quantile for every row of p, from one argpartition
+    """
+    n = p.shape[1]
+    k = max(int(np.ceil((1 - alpha) * n - 1e-9)), 1) # tolerance as in attribution._tail
+    h = (n - 1) * (1 - alpha)
+    h_lo, h_hi = int(np.floor(h)), min(int(np.floor(h)) + 1, n - 1)
+    lo = max(0, min(int(round(h)) - m // 2, n - m))
+    idx = np.argpartition(p, sorted({k - 1, h_lo, h_hi, lo, lo + m - 1}), axis=1)
+
+    ranked = np.take_along_axis(p, idx[:, [h_lo, h_hi]], axis=1)
+    q = ranked[:, 0] + (h - h_lo) * (ranked[:, 1] - ranked[:, 0])
+    return q, idx[:, :k], idx[:, lo : lo + m]
+
+
+def aggregate_risk(
+    scenarios: pd.DataFrame,
+    positions: pd.DataFrame,
+    levels: list[str],
+    alpha: float = 0.99,
+    root: str = "firm",
+    asset: str = "asset",
+    exposure: str = "exposure",
+    n_neighbours: int | None = None,
+    max_chunk_bytes: float = 256e6,
+) -> dict:
+    """
+    VaR / ES, diversification benefit and Euler contributions for every node
+    of a position hierarchy, from one projection of a shared scenario set
+
+    parameters
+        scenarios: pd.DataFrame
+            n_scenarios x N asset returns, columns are the asset names
+        positions: pd.DataFrame
+            one row per position: the level columns, an asset column and an
+            exposure column; rows for the same (node, asset) are summed
+        levels: list[str]
+            level columns from the top down, e.g. ["line", "desk"]
+        alpha: float
+            confidence level
+        root: str
+            name of the top node
+        asset, exposure: str
+            asset and exposure column names in positions
+        n_neighbours: int | None
+            scenarios averaged for component VaR, defaults to round(sqrt(n_scenarios))
+        max_chunk_bytes: float
+            rough cap on the node P&L block held at once
+
+    returns
+        dict
+            nodes: DataFrame indexed by node path ("firm/macro/rates") with
+                level, parent, depth, var, es (positive losses);
+                standalone_var / standalone_es, the sum of the children's own
+                VaR / ES (the assets' for the lowest level), and
+                diversification_var / diversification_es = standalone - own;
+                component_var / component_es, the node's Euler contribution to
+                its parent, with pct_var / pct_es its share of the sum over
+                the parent's children (for ES that sum is the parent's ES; the
+                neighbourhood estimate of component VaR only approximately
+                adds up to the parent's VaR, so the shares are taken of the
+                sum to make them add to 1);
+                firm_component_var / firm_component_es, the contribution to the root
+            assets: DataFrame with one row per (node, asset) exposure and
+                its component_var / component_es within that node
+
+    raises
+        ValueError
+            if a level value or root contains '/', the node path separator
+    """
+    if not isinstance(scenarios, pd.DataFrame):
+        raise ValueError("scenarios must be a DataFrame with one column per asset.")
+    assets = list(scenarios.columns)
+    # sparse @ dense copies non C-ordered operands on every call, so fix both
+    # layouts once (DataFrame.to_numpy is usually F-ordered)
+    s = np.ascontiguousarray(scenarios.to_numpy(dtype=np.float64))
+    st = np.ascontiguousarray(s.T)
+    n = len(s)
+    m = min(int(n_neighbours or max(1, round(np.sqrt(n)))), n)
+
+    nodes, w = _hierarchy(positions, list(levels), assets, root, asset, exposure)
+    n_nodes = len(nodes)
+
+    # node P&L W S^T in chunks of nodes; per node keep VaR, ES and the mean
+    # scenario over its tail / quantile neighbourhood (marginal ES / VaR)
+    var = np.empty(n_nodes)
+    es = np.empty(n_nodes)
+    marg_es = np.empty((n_nodes, len(assets)))
+    marg_var = np.empty((n_nodes, len(assets)))
+    rows = max(1, int(max_chunk_bytes // (3 * 8 * n))) # P&L block plus argpartition workspace
+    for a in range(0, n_nodes, rows):
+        b = min(a + rows, n_nodes)
+        pnl = np.asarray(w[a:b] @ st)
+        q, tail, around = _order_stats(pnl, alpha, m)
+        var[a:b] = -q
+        es[a:b] = -np.take_along_axis(pnl, tail, axis=1).mean(axis=1)
+        marg_es[a:b] = -_row_means(s, tail)
+        marg_var[a:b] = -_row_means(s, around)
+
+    # each asset on its own, long or short, for the lowest level's standalone sum
+    q_lo, tail_lo, _ = _order_stats(st, alpha, 1)
+    q_hi, tail_hi, _ = _order_stats(-st, alpha, 1)
+    long_var, short_var = -q_lo, -q_hi
+    long_es = -np.take_along_axis(st, tail_lo, axis=1).mean(axis=1)
+    short_es = np.take_along_axis(st, tail_hi, axis=1).mean(axis=1)
+
+    parent = nodes["parent"].map(pd.Series(np.arange(n_nodes), index=nodes.index))
+    has_parent = parent.notna().to_numpy()
+    p_idx = parent.fillna(0).to_numpy(dtype=np.intp)
+
+    # Euler contributions: W_c . marginal of the parent (or of the root)
+    wc = w.tocoo()
+    c_es = np.bincount(wc.row, wc.data * marg_es[p_idx[wc.row], wc.col], minlength=n_nodes)
+    c_var = np.bincount(wc.row, wc.data * marg_var[p_idx[wc.row], wc.col], minlength=n_nodes)
+    f_es = np.asarray(w @ marg_es[0])
+    f_var = np.asarray(w @ marg_var[0])
+
+    # standalone sums: children nodes, or the assets for nodes without children
+    child_var = np.bincount(p_idx[has_parent], var[has_parent], minlength=n_nodes)
+    child_es = np.bincount(p_idx[has_parent], es[has_parent], minlength=n_nodes)
+    e = wc.data
+    asset_var = np.bincount(wc.row, np.where(e >= 0, e * long_var[wc.col], -e * short_var[wc.col]), minlength=n_nodes)
+    asset_es = np.bincount(wc.row, np.where(e >= 0, e * long_es[wc.col], -e * short_es[wc.col]), minlength=n_nodes)
+    leaf = nodes["depth"].to_numpy() == len(levels)
+    standalone_var = np.where(leaf, asset_var, child_var)
+    standalone_es = np.where(leaf, asset_es, child_es)
+
+    # shares of the siblings' total, for VaR and ES alike (see the docstring)
+    sib_var = np.bincount(p_idx[has_parent], c_var[has_parent], minlength=n_nodes)
+    sib_es = np.bincount(p_idx[has_parent], c_es[has_parent], minlength=n_nodes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_var = np.where(has_parent, c_var / sib_var[p_idx], np.nan)
+        pct_es = np.where(has_parent, c_es / sib_es[p_idx], np.nan)
+
+    out = nodes.assign(
+        var=var,
+        es=es,
+        standalone_var=standalone_var,
+        standalone_es=standalone_es,
+        diversification_var=standalone_var - var,
+        diversification_es=standalone_es - es,
+        component_var=np.where(has_parent, c_var, np.nan),
+        component_es=np.where(has_parent, c_es, np.nan),
+        pct_var=pct_var,
+        pct_es=pct_es,
+        firm_component_var=f_var,
+        firm_component_es=f_es,
+    )
+
+    asset_rows = pd.DataFrame({
+        "node":          nodes.index.to_numpy()[wc.row],
+        "asset":         np.asarray(assets, dtype=object)[wc.col],
+        "exposure":      wc.data,
+        "component_var": wc.data * marg_var[wc.row, wc.col],
+        "component_es":  wc.data * marg_es[wc.row, wc.col],
+    }).sort_values(["node", "asset"], kind="stable", ignore_index=True)
+
+    return {"nodes": out, "assets": asset_rows}
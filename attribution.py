@@ -0,0 +1,175 @@
+"""
+Risk attribution (component / marginal / incremental VaR and ES) on a fixed
+scenario set.
+
+    from varlab.models import monte_carlo_scenarios
+    from varlab.attribution import risk_decomposition, incremental_var
+
+    sims = monte_carlo_scenarios(rets.iloc[-250:], n_sims=50_000)
+    risk_decomposition(sims, weights, alpha=0.99)["assets"]
+    incremental_var(sims, weights, trades, alpha=0.99)
+
+Scenarios can be anything with one column per asset: the Monte Carlo matrix
+from models.monte_carlo_scenarios, or a window of historical returns
+(historical-simulation attribution). Nothing is re-simulated. The
+decomposition needs one projection P = S w plus a partition and an average
+over the handful of tail rows. Pricing K candidate trades costs one
+S @ T^T product for all of them together.
+
+Weights are used as given (not re-normalised) so a trade changes exposure.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _as_matrix(scenarios) -> tuple[np.ndarray, list]:
+    if isinstance(scenarios, pd.DataFrame):
+        return scenarios.to_numpy(), list(scenarios.columns)
+    s = np.asarray(scenarios)
+    if s.ndim != 2:
+        raise ValueError("scenarios must be a 2D (n_scenarios x n_assets) array.")
+    return s, list(range(s.shape[1]))
+
+
+def _tail(port: np.ndarray, alpha: float) -> tuple[float, np.ndarray]:
+    """VaR (as in np.quantile) and the indices of scenarios at or beyond it"""
+    q = float(np.quantile(port, 1 - alpha))
+    # the tolerance keeps k exact when (1 - alpha) * n rounds just above an integer
+    # ((1 - 0.99) * 50_000 = 500.00000000000045)
+    k = max(int(np.ceil((1 - alpha) * len(port) - 1e-9)), 1)
+    tail = np.argpartition(port, k - 1)[:k] # the k worst scenarios, unordered
+    return q, tail
+
+
+def risk_decomposition(
+    scenarios: pd.DataFrame | np.ndarray,
+    weights: np.ndarray,
+    alpha: float = 0.99,
+    n_neighbours: int | None = None,
+) -> dict:
+    """
+    Euler decomposition of portfolio VaR and ES into per-asset contributions
+
+    with P = S w the scenario P&L and q its (1 - alpha) quantile:
+
+        marginal ES_i   = -E[S_i | P <= q]       (mean of the k tail rows)
+        marginal VaR_i  = -E[S_i | P ~= q]       (mean of the n_neighbours rows
+                                                  ranked closest to q)
+        component X_i   = w_i * marginal X_i
+
+    Component ES sums exactly to the tail-mean ES. Component VaR sums to the VaR
+    up to the smoothing of the neighbourhood average. pct_* columns are the
+    components scaled to sum to 1.
+
+    parameters
+        scenarios: pd.DataFrame | np.ndarray
+            n_scenarios x N asset returns
+        weights: np.ndarray
+            exposures length N
+        alpha: float
+            confidence level
+        n_neighbours: int | None
+            scenarios averaged for marginal VaR, defaults to round(sqrt(n_scenarios))
+
+    returns
+        dict
+            var, es (positive losses) and 'assets', a DataFrame indexed by asset
+            with weight, marginal_var, component_var, pct_var, marginal_es,
+            component_es, pct_es
+    """
+    s, names = _as_matrix(scenarios)
+    w = np.asarray(weights, dtype=float)
+    if w.shape != (s.shape[1],):
+        raise ValueError("weights length must match number of assets")
+
+    port = np.asarray(s @ w.astype(s.dtype), dtype=np.float64) # the single projection
+    q, tail = _tail(port, alpha)
+    es = float(-port[tail].mean())
+
+    n = len(port)
+    m = int(n_neighbours or max(1, round(np.sqrt(n))))
+    m = min(m, n)
+    # rows ranked closest to the quantile: a window of m order statistics around rank (n-1)(1-alpha)
+    centre = int(round((n - 1) * (1 - alpha)))
+    lo = max(0, min(centre - m // 2, n - m))
+    around = np.argpartition(port, [lo, lo + m - 1])[lo : lo + m]
+
+    marginal_var = -s[around].mean(axis=0, dtype=np.float64)
+    marginal_es = -s[tail].mean(axis=0, dtype=np.float64)
+    component_var = w * marginal_var
+    component_es = w * marginal_es
+
+    assets = pd.DataFrame(
+        {
+            "weight":        w,
+            "marginal_var":  marginal_var,
+            "component_var": component_var,
+            "pct_var":       component_var / component_var.sum(),
+            "marginal_es":   marginal_es,
+            "component_es":  component_es,
+            "pct_es":        component_es / component_es.sum(),
+        },
+        index=pd.Index(names, name="asset"),
+    )
+    return {"var": -q, "es": es, "assets": assets}
+
+
+def incremental_var(
+    scenarios: pd.DataFrame | np.ndarray,
+    weights: np.ndarray,
+    trades: np.ndarray | pd.DataFrame,
+    alpha: float = 0.99,
+) -> pd.DataFrame:
+    """
+    incremental VaR / ES of candidate trades, fully revalued on the same scenarios
+
+    every trade t is repriced as P + S t, so all K trades cost one
+    (n_scenarios x N) @ (N x K) product. No re-simulation is needed and all
+    trades see common random numbers. approx_incremental_var is the
+    first-order estimate marginal_var . t from risk_decomposition.
+
+    parameters
+        scenarios: pd.DataFrame | np.ndarray
+            n_scenarios x N asset returns
+        weights: np.ndarray
+            current exposures length N
+        trades: np.ndarray | pd.DataFrame
+            (N,) one trade or (K, N) trades as exposure changes; a DataFrame's
+            index names the trades
+        alpha: float
+            confidence level
+
+    returns
+        pd.DataFrame
+            one row per trade: var_before, var_after, incremental_var,
+            es_before, es_after, incremental_es, approx_incremental_var
+    """
+    s, _ = _as_matrix(scenarios)
+    w = np.asarray(weights, dtype=float)
+    labels = trades.index if isinstance(trades, pd.DataFrame) else None
+    t = np.atleast_2d(np.asarray(trades, dtype=float))
+    if t.shape[1] != s.shape[1] or w.shape != (s.shape[1],):
+        raise ValueError("weights and trades must have one entry per asset")
+
+    base = risk_decomposition(s, w, alpha)
+    port = np.asarray(s @ w.astype(s.dtype), dtype=np.float64)
+    delta = np.asarray(s @ t.T.astype(s.dtype), dtype=np.float64) # n_scenarios x K, the one extra product
+
+    after = port[:, None] + delta
+    q_after = np.quantile(after, 1 - alpha, axis=0)
+    k = max(int(np.ceil((1 - alpha) * len(port) - 1e-9)), 1) # as in _tail
+    es_after = -np.partition(after, k - 1, axis=0)[:k].mean(axis=0)
+
+    return pd.DataFrame(
+        {
+            "var_before":             base["var"],
+            "var_after":              -q_after,
+            "incremental_var":        -q_after - base["var"],
+            "es_before":              base["es"],
+            "es_after":               es_after,
+            "incremental_es":         es_after - base["es"],
+            "approx_incremental_var": t @ base["assets"]["marginal_var"].to_numpy(),
+        },
+        index=labels if labels is not None else pd.RangeIndex(len(t), name="trade"),
+    )
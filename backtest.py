@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
-from scipy.stats import chi2
+
+from varlab.executor import get_executor, shared
 
 def exception_series(realized_returns: pd.Series, var_series: pd.Series) -> pd.Series:
     """
@@ -24,6 +25,72 @@ def exception_series(realized_returns: pd.Series, var_series: pd.Series) -> pd.S
     # (-r > v) produces a bool Series
     # .astype(int) converts T or F into 1 or 0 respectively
 
+def exception_matrix(realized_returns: pd.Series, var_frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    exception (hit) series for many VaR models at once.
+
+    same rule as exception_series (-r_t > VaR_t), but the realized returns are
+    aligned to var_frame once and every column is compared in a single
+    vectorised pass instead of one concat/dropna per model.
+
+    parameters
+        realized_returns: pd.Series
+            realized returns
+        var_frame: pd.DataFrame
+            one column of VaR estimates per model, indexed by date
+
+    returns
+        pd.DataFrame
+            nullable Int8 columns, one per model, on var_frame's index:
+            1 -> exception, 0 -> no exception, <NA> -> VaR or realized return missing.
+            each column can be passed straight to kupiec_pof_test and the
+            Christoffersen tests (they drop the <NA> rows like exception_series does)
+    """
+    loss = -realized_returns.reindex(var_frame.index).to_numpy(dtype=float) # realized losses aligned to VaR dates
+    v = var_frame.to_numpy(dtype=float).T # K x T, each model's row is contiguous
+
+    with np.errstate(invalid="ignore"):
+        hits = np.greater(loss, v) # K x T bool, the only full-size allocation besides the mask
+    missing = np.isnan(v) | np.isnan(loss)
+    hits = hits.view(np.int8) # reinterpret bool as int8 in place (no copy)
+
+    return pd.DataFrame(
+        {col: pd.arrays.IntegerArray(hits[k], missing[k]) for k, col in enumerate(var_frame.columns)},
+        index=var_frame.index,
+    )
+
+
+def coverage_tests(exceptions: pd.DataFrame, alpha: float) -> pd.DataFrame:
+    """
+    Kupiec POF, Christoffersen independence and conditional coverage tests for
+    every column of an exception matrix (see exception_matrix).
+
+    returns
+        pd.DataFrame
+            one row per model with exceptions, n, hit_rate, LR_pof, p_pof,
+            LR_ind, p_ind, pi_01, pi_11, LR_cc and p_cc
+    """
+    rows = {}
+    for col in exceptions.columns:
+        exc = exceptions[col]
+        pof = kupiec_pof_test(exc, alpha)
+        ind = christoffersen_independence_test(exc)
+        cc = christoffersen_cc_test(exc, alpha)
+        rows[col] = {
+            "exceptions": pof["exceptions"],
+            "n":          pof["n"],
+            "hit_rate":   pof.get("hit_rate", float("nan")),
+            "LR_pof":     pof["LR_pof"],
+            "p_pof":      pof["p_value"],
+            "LR_ind":     ind["LR_ind"],
+            "p_ind":      ind["p_value"],
+            "pi_01":      ind["pi_01"],
+            "pi_11":      ind["pi_11"],
+            "LR_cc":      cc["LR_cc"],
+            "p_cc":       cc["p_value"],
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
 def kupiec_pof_test(exceptions: pd.Series, alpha: float) -> dict:
     """
     Kupiec Proportion of Failures (POF )test
@@ -65,6 +132,8 @@ def kupiec_pof_test(exceptions: pd.Series, alpha: float) -> dict:
     )
 
     # compute the p-value, degree of freedom = 1
+    from scipy.stats import chi2
+
     pval = 1 - chi2.cdf(lr, df=1)
 
 
@@ -136,6 +205,8 @@ def christoffersen_independence_test(exceptions: pd.Series) -> dict:
              + T10 * np.log(1 - pi_11) + T11 * np.log(pi_11))
     lr = -2 * (ll_h0 - ll_h1)
 
+    from scipy.stats import chi2
+
     pval = 1 - chi2.cdf(lr, df=1)
 
     return {
@@ -180,6 +251,8 @@ def christoffersen_cc_test(exceptions: pd.Series, alpha: float) -> dict:
         }
 
     lr_cc = lr_pof + lr_ind
+    from scipy.stats import chi2
+
     pval  = 1 - chi2.cdf(lr_cc, df=2)
 
     return {
@@ -192,4 +265,333 @@ def christoffersen_cc_test(exceptions: pd.Series, alpha: float) -> dict:
         "hit_rate":   pof["hit_rate"],
         "pi_01":      ind["pi_01"],
         "pi_11":      ind["pi_11"],
-    }
\ No newline at end of file
+    }
+
+
+def traffic_light_bounds(n: int, alpha: float) -> tuple[int, int]:
+    """
+    Basel traffic-light zone boundaries for n observations.
+
+    A count x is green while P(X <= x) < 95%, yellow while P(X <= x) < 99.99%
+    and red otherwise, X ~ Binomial(n, 1 - alpha). For n = 250 and alpha = 0.99
+    this gives the familiar 0-4 green / 5-9 yellow / 10+ red.
+
+    returns
+        (green_max, yellow_max): largest exception counts still green / yellow
+    """
+    from scipy.stats import binom
+
+    cdf = binom.cdf(np.arange(n + 1), n, 1 - alpha)
+    return int((cdf < 0.95).sum() - 1), int((cdf < 0.9999).sum() - 1)
+
+
+def rolling_coverage_tests(exceptions: pd.Series, alpha: float, window: int = 250) -> pd.DataFrame:
+    """
+    Kupiec POF, Christoffersen independence / conditional coverage and the Basel
+    traffic-light zone over every trailing window of an exception series.
+
+    Instead of re-running the dict-returning tests per date (O(T * window)), the
+    exception count and the four transition counts of every window are read off
+    cumulative sums, and the LR statistics are evaluated on whole arrays: O(T).
+    Each row matches what kupiec_pof_test / christoffersen_*_test return on the
+    window of `window` observations ending at that date, including their
+    degenerate cases (LR = inf, p-value = 0).
+
+    parameters
+        exceptions: pd.Series
+            0/1 exception series (missing values are dropped, as in the scalar tests)
+        alpha: float
+            VaR confidence level
+        window: int
+            trailing window length in observations (Basel: 250)
+
+    returns
+        pd.DataFrame indexed by window end date with columns
+            exceptions, hit_rate, LR_pof, p_pof, T00, T01, T10, T11,
+            LR_ind, p_ind, LR_cc, p_cc, zone ('green' / 'yellow' / 'red')
+    """
+    from scipy.stats import chi2
+
+    exc = exceptions.dropna()
+    x_all = exc.to_numpy(dtype=np.int64)
+    n_obs = len(x_all)
+    if window < 2 or n_obs < window:
+        raise ValueError(f"Need at least window={window} (>= 2) observations, got {n_obs}.")
+
+    def window_sums(v: np.ndarray, length: int) -> np.ndarray:
+        c = np.concatenate([[0], np.cumsum(v)])
+        return c[length:] - c[:-length]
+
+    # exceptions per window; window k covers observations k .. k + window - 1
+    x = window_sums(x_all, window)
+    n = window
+    p = 1 - alpha
+
+    # transition indicators for consecutive pairs (I_{s-1}, I_s); a window holds window - 1 pairs
+    prev, curr = x_all[:-1], x_all[1:]
+    T01 = window_sums((1 - prev) * curr, window - 1)
+    T10 = window_sums(prev * (1 - curr), window - 1)
+    T11 = window_sums(prev * curr, window - 1)
+    T00 = (window - 1) - T01 - T10 - T11
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Kupiec POF
+        phat = x / n
+        lr_pof = -2 * ((n - x) * np.log((1 - p) / (1 - phat)) + x * np.log(p / phat))
+        pof_bad = (x == 0) | (x == n)
+        lr_pof = np.where(pof_bad, np.inf, lr_pof)
+
+        # Christoffersen independence
+        row0, row1 = T00 + T01, T10 + T11
+        pi_01, pi_11 = T01 / row0, T11 / row1
+        p_hat = (T01 + T11) / (window - 1)
+        ll_h0 = (T00 + T10) * np.log(1 - p_hat) + (T01 + T11) * np.log(p_hat)
+        ll_h1 = (T00 * np.log(1 - pi_01) + T01 * np.log(pi_01)
+                 + T10 * np.log(1 - pi_11) + T11 * np.log(pi_11))
+        lr_ind = -2 * (ll_h0 - ll_h1)
+        ind_bad = ((row0 == 0) | (row1 == 0) | ((T01 + T11) == 0)
+                   | np.isin(pi_01, (0.0, 1.0)) | np.isin(pi_11, (0.0, 1.0))
+                   | np.isin(p_hat, (0.0, 1.0)))
+        lr_ind = np.where(ind_bad, np.inf, lr_ind)
+
+    lr_cc = lr_pof + lr_ind
+    p_pof = np.where(np.isinf(lr_pof), 0.0, chi2.sf(lr_pof, df=1))
+    p_ind = np.where(np.isinf(lr_ind), 0.0, chi2.sf(lr_ind, df=1))
+    p_cc = np.where(np.isinf(lr_cc), 0.0, chi2.sf(lr_cc, df=2))
+
+    green_max, yellow_max = traffic_light_bounds(window, alpha)
+    zone = np.where(x <= green_max, "green", np.where(x <= yellow_max, "yellow", "red"))
+
+    return pd.DataFrame(
+        {
+            "exceptions": x,
+            "hit_rate":   phat,
+            "LR_pof":     lr_pof,
+            "p_pof":      p_pof,
+            "T00":        T00,
+            "T01":        T01,
+            "T10":        T10,
+            "T11":        T11,
+            "LR_ind":     lr_ind,
+            "p_ind":      p_ind,
+            "LR_cc":      lr_cc,
+            "p_cc":       p_cc,
+            "zone":       zone,
+        },
+        index=exc.index[window - 1 :],
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Expected Shortfall backtests with simulated null distributions
+# ─────────────────────────────────────────────────────────────────────────────
+
+ES_DISTS = ("normal", "t")
+
+_NULL_CHUNK = 1_000 # null replicates per RNG stream / per batched path array
+
+
+def _std_tail(p: float, dist: str, nu: float) -> tuple[float, float]:
+    """lower p-quantile q of the standard null distribution and its tail mean E[Z | Z <= q]"""
+    from scipy import special
+
+    if dist == "normal":
+        q = float(special.ndtri(p))
+        return q, -np.exp(-0.5 * q * q) / np.sqrt(2 * np.pi) / p
+    q = float(special.stdtrit(nu, p))
+    log_pdf = (special.gammaln((nu + 1) / 2) - special.gammaln(nu / 2) - 0.5 * np.log(nu * np.pi)
+               - (nu + 1) / 2 * np.log1p(q * q / nu))
+    return q, -np.exp(log_pdf) / p * (nu + q * q) / (nu - 1)
+
+
+def _std_cdf(z: np.ndarray, dist: str, nu: float) -> np.ndarray:
+    from scipy import special
+
+    return special.ndtr(z) if dist == "normal" else special.stdtr(nu, z)
+
+
+def _es_stats(s, n_exc, h_sum, n_obs, p: float) -> tuple:
+    """
+    Acerbi-Szekely Z1 / Z2 and the cumulative exception statistic from the
+    per-column sums of I_t X_t / ES_t, I_t and H_t (broadcasts over replicates)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z1 = s / n_exc + 1
+        z2 = s / (n_obs * p) + 1
+        exc = np.sqrt(n_obs) * (h_sum / n_obs - p / 2) / np.sqrt(p * (1 / 3 - p / 4))
+    return z1, z2, exc
+
+
+def _null_chunk(spec: dict, c: int, a: np.ndarray, b: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    (3, n_rep, K) null Z1, Z2 and exception statistics for chunk c
+
+    one batch of standardised paths z serves every column: under H0 column k
+    returns mu + sigma z, so I_t = (z_t < q) for all of them and
+    X_t / ES_t = a_t + b_t z_t. The three sums are then matrix products
+    against the (T x K) a, b and valid arrays (zero where a column has no
+    forecast)
+    """
+    p, q = spec["p"], spec["q"]
+    n_rep = min(_NULL_CHUNK, spec["n_sims"] - c * _NULL_CHUNK)
+    rng = np.random.default_rng(np.random.SeedSequence(spec["seed"], spawn_key=(c,)))
+    if spec["dist"] == "normal":
+        z = rng.standard_normal((n_rep, len(a)))
+    else:
+        z = rng.standard_t(spec["nu"], size=(n_rep, len(a)))
+
+    hits = z < q
+    i = hits.astype(np.float64)
+    iz = np.where(hits, z, 0.0)
+    h = np.zeros_like(z)
+    h[hits] = (p - _std_cdf(z[hits], spec["dist"], spec["nu"])) / p # cdf only where it is needed
+
+    s = iz @ b + i @ a
+    return np.stack(_es_stats(s, i @ valid, h @ valid, spec["n_obs"], p))
+
+
+def _null_task(lo: int, hi: int, spec: dict) -> list[np.ndarray]:
+    a, b, valid = shared("a"), shared("b"), shared("valid")
+    return [_null_chunk(spec, c, a, b, valid) for c in range(lo, hi)]
+
+
+def es_backtest(
+    realized_returns: pd.Series | pd.DataFrame,
+    var_frame: pd.DataFrame,
+    es_frame: pd.DataFrame,
+    alpha: float,
+    dist: str = "normal",
+    nu: float = 5.0,
+    n_sims: int = 5_000,
+    seed: int = 0,
+    workers: int = 1,
+    executor: str | None = None,
+) -> pd.DataFrame:
+    """
+    Expected Shortfall backtests for many models (and portfolios) at once:
+    Acerbi-Szekely (2014) Z1 and Z2 and an ES-calibrated exception test,
+    with p-values from simulated null distributions.
+
+    with X_t the realized return, I_t = 1{X_t < -VaR_t}, N = sum I_t, T the
+    number of forecasts and p = 1 - alpha:
+        Z1 = sum(X_t I_t / ES_t) / N + 1          (conditional, given the exceptions)
+        Z2 = sum(X_t I_t / (T p ES_t)) + 1        (unconditional, Basel's ES test)
+        exception = sqrt(T) (mean H_t - p/2) / sqrt(p (1/3 - p/4)),
+            H_t = I_t (p - u_t) / p, u_t the PIT of X_t (Du-Escanciano cumulative
+            exceptions: each exception weighted by how deep in the tail it falls)
+    all three are 0 in expectation when VaR and ES are right; Z1 / Z2 go
+    negative and the exception statistic positive when risk is underestimated.
+
+    under H0 the return on date t is drawn from the location-scale
+    distribution (dist) whose VaR and ES equal that model's forecasts. All
+    models and portfolios use the same standardised null paths (common random
+    numbers), which are drawn as batched (replicates x T) arrays in chunks of
+    _NULL_CHUNK, each from SeedSequence(seed, spawn_key=(chunk,)): results are
+    identical for any worker count.
+
+    parameters
+        realized_returns: pd.Series | pd.DataFrame
+            realized returns; a DataFrame holds one column per portfolio and
+            then var_frame / es_frame columns are (portfolio, model) pairs
+        var_frame, es_frame: pd.DataFrame
+            VaR and ES forecasts (positive losses) at level alpha, same columns,
+            indexed by date
+        alpha: float
+            confidence level of both forecasts (FRTB: 0.975)
+        dist: str
+            'normal' or 't', shape of the null predictive distribution
+        nu: float
+            degrees of freedom for dist='t'
+        n_sims: int
+            null replicates
+        seed: int
+            root seed
+        workers: int
+            processes; chunks of replicates are spread over them
+        executor: str | None
+            varlab.executor backend for workers > 1, defaults to
+            $VARLAB_EXECUTOR or 'process'
+
+    returns
+        pd.DataFrame
+            one row per var_frame column with n, exceptions, Z1, p_Z1, Z2,
+            p_Z2, exception, p_exception. p-values are one-sided for Z1 / Z2
+            (share of null replicates at or below the statistic) and
+            two-sided for the exception test; dates where ES <= VaR cannot be
+            calibrated and are skipped
+    """
+    if dist not in ES_DISTS:
+        raise ValueError(f"Unknown dist '{dist}'. Use one of {ES_DISTS}.")
+    if dist == "t" and not nu > 1:
+        raise ValueError(f"nu must be > 1 for a finite ES, got {nu}.")
+    if n_sims < 1:
+        raise ValueError("n_sims must be at least 1.")
+    if not var_frame.columns.equals(es_frame.columns):
+        raise ValueError("var_frame and es_frame must have the same columns.")
+
+    idx = var_frame.index
+    v = var_frame.to_numpy(dtype=float)
+    e = es_frame.reindex(idx).to_numpy(dtype=float)
+    if isinstance(realized_returns, pd.DataFrame):
+        if var_frame.columns.nlevels != 2:
+            raise ValueError("With one return column per portfolio, forecast columns must be (portfolio, model) pairs.")
+        x = realized_returns.reindex(idx)[var_frame.columns.get_level_values(0)].to_numpy(dtype=float)
+    else:
+        x = np.repeat(realized_returns.reindex(idx).to_numpy(dtype=float)[:, None], v.shape[1], axis=1)
+
+    p = 1 - alpha
+    q, m = _std_tail(p, dist, nu)
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(x) & np.isfinite(v) & np.isfinite(e) & (e > v)
+    keep = ok.any(axis=1) # dates no column can use are left out of the null paths too
+    x, v, e, ok = x[keep], v[keep], e[keep], ok[keep]
+
+    # location-scale fit per date: -VaR = mu + sigma q, -ES = mu + sigma m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.where(ok, (e - v) / (q - m), 1.0)
+        mu = np.where(ok, -v - sigma * q, 0.0)
+        a = np.where(ok, mu / e, 0.0)
+        b = np.where(ok, sigma / e, 0.0)
+    valid = ok.astype(np.float64)
+    n_obs = valid.sum(axis=0)
+
+    # observed statistics
+    with np.errstate(invalid="ignore"):
+        hits = ok & (x < -v)
+        u = _std_cdf(np.where(hits, (x - mu) / sigma, 0.0), dist, nu)
+    s = np.where(hits, x / np.where(ok, e, 1.0), 0.0).sum(axis=0)
+    n_exc = hits.sum(axis=0)
+    h_sum = np.where(hits, (p - u) / p, 0.0).sum(axis=0)
+    z1, z2, exc = _es_stats(s, n_exc, h_sum, n_obs, p)
+
+    # simulated null, shared by every column
+    spec = {"p": p, "q": q, "dist": dist, "nu": float(nu), "n_sims": int(n_sims),
+            "seed": seed, "n_obs": n_obs}
+    n_chunks = -(-int(n_sims) // _NULL_CHUNK)
+    a, b = np.ascontiguousarray(a), np.ascontiguousarray(b)
+    if workers == 1 or n_chunks == 1:
+        parts = [_null_chunk(spec, c, a, b, valid) for c in range(n_chunks)]
+    else:
+        with get_executor(executor, workers, shared={"a": a, "b": b, "valid": valid}) as ex:
+            parts = [c for part in ex.map_ranges(_null_task, n_chunks, spec) for c in part]
+    null = np.concatenate(parts, axis=1) # (3, n_sims, K)
+
+    with np.errstate(invalid="ignore"):
+        p_z1 = np.nanmean(np.where(np.isnan(null[0]), np.nan, null[0] <= z1), axis=0)
+        p_z2 = (null[1] <= z2).mean(axis=0)
+        p_exc = np.minimum(1.0, 2 * np.minimum((null[2] <= exc).mean(axis=0), (null[2] >= exc).mean(axis=0)))
+
+    out = pd.DataFrame(
+        {
+            "n":           n_obs.astype(int),
+            "exceptions":  n_exc,
+            "Z1":          z1,
+            "p_Z1":        np.where(n_exc > 0, p_z1, np.nan),
+            "Z2":          z2,
+            "p_Z2":        p_z2,
+            "exception":   exc,
+            "p_exception": p_exc,
+        },
+        index=var_frame.columns,
+    )
+    return out
@@ -0,0 +1,414 @@
+"""
+Config-driven batch backtests for many portfolios.
+
+A TOML (or YAML) file lists the portfolios and the model settings:
+
+    start  = "2015-01-01"
+    alpha  = 0.99
+    window = 250
+    models = ["hist", "param", "mc"]
+    n_sims = 25000
+    nu     = 5               # Student-t degrees of freedom for "mc_t" / "mc_tcop"
+    dtype  = "float32"       # optional, storage precision (varlab.precision)
+
+    [[portfolios]]
+    name    = "balanced"
+    tickers = ["SPY", "QQQ", "TLT", "GLD"]
+    weights = [0.4, 0.3, 0.2, 0.1]
+
+    [[portfolios]]
+    name    = "equity"
+    tickers = ["SPY", "QQQ"]
+    weights = [0.5, 0.5]
+    alpha   = 0.975          # any top-level setting can be overridden
+
+Prices for the union of all tickers are downloaded once and shared with
+each worker once (varlab.executor, shared memory on the process backend),
+not once per portfolio. Every portfolio writes its own Parquet parts under
+<out>/parts/, so a portfolio that raises does not affect the others. Part
+files are keyed by the portfolio name and a hash of everything that
+determines its results (start, tickers, weights, the model settings and a
+fingerprint of the portfolio's returns, varlab.store.returns_fingerprint): a
+rerun skips a portfolio only if its parts were written with the same
+settings on the same data, and recomputes it (replacing the old parts) if
+anything changed, including re-downloaded or extended prices. Prices are
+therefore always loaded, even when every portfolio turns out to be done.
+When all portfolios are done the parts are collected into <out>/var.parquet
+and <out>/tests.parquet.
+
+Portfolio names become file names, so they may only contain letters,
+digits, spaces, '_' and '-'.
+"""
+
+import hashlib
+import json
+import os
+import re
+import traceback
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from varlab.returns import log_returns, portfolio_returns
+from varlab.backtest import exception_matrix, coverage_tests
+from varlab.executor import get_executor, shared
+from varlab.kernels import ewma_variance, rolling_brw, rolling_mean_cov
+from varlab.precision import get_dtype, use_dtype
+from varlab.store import returns_fingerprint
+
+_DEFAULTS = {
+    "start":  "2015-01-01",
+    "alpha":  0.99,
+    "window": 250,
+    "models": ["hist", "param", "mc"],
+    "n_sims": 25_000,
+    "seed":   42,
+    "nu":     5.0,
+    "dtype":  None, # None -> pipeline default (varlab.precision)
+}
+
+# settings that change a portfolio's results, besides its tickers and weights
+_SETTINGS = ("alpha", "window", "models", "n_sims", "seed", "nu", "dtype")
+
+_NAME = re.compile(r"[\w\- ]+") # used as a file name: no '/', '.', or glob characters
+
+# column name written for each model key
+MODEL_COLUMNS = {
+    "hist":  "VaR_hist",
+    "param": "VaR_param",
+    "mc":    "VaR_mc",
+    "mc_t":  "VaR_mc_t",
+    "mc_tcop": "VaR_mc_tcop",
+    "cf":    "VaR_cf",
+    "param_t": "VaR_param_t",
+    "garch": "VaR_garch",
+    "evt":   "VaR_evt",
+    "brw":   "VaR_brw",
+    "ewma":  "VaR_ewma",
+}
+
+
+def load_config(path: str | os.PathLike) -> dict:
+    """
+    reads a batch config from a .toml, .yaml or .yml file
+
+    returns
+        dict with top-level defaults filled in and a non-empty 'portfolios' list
+
+    raises
+        ValueError
+            if the file type is unknown or a portfolio entry is malformed
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".toml":
+        import tomllib
+
+        with open(path, "rb") as fh:
+            cfg = tomllib.load(fh)
+    elif suffix in (".yaml", ".yml"):
+        import yaml
+
+        with open(path) as fh:
+            cfg = yaml.safe_load(fh) or {}
+    else:
+        raise ValueError(f"Unsupported config type '{suffix}' (use .toml, .yaml or .yml).")
+
+    cfg = {**_DEFAULTS, **cfg}
+    portfolios = cfg.get("portfolios") or []
+    if not portfolios:
+        raise ValueError("Config must define at least one [[portfolios]] entry.")
+
+    names = set()
+    for p in portfolios:
+        for key in ("name", "tickers", "weights"):
+            if key not in p:
+                raise ValueError(f"Portfolio entry {p!r} is missing '{key}'.")
+        if not isinstance(p["name"], str) or not _NAME.fullmatch(p["name"]):
+            raise ValueError(
+                f"Portfolio name {p['name']!r} must be a string of letters, digits, spaces, '_' or '-'."
+            )
+        if len(p["tickers"]) != len(p["weights"]):
+            raise ValueError(f"Portfolio '{p['name']}': tickers and weights differ in length.")
+        if p["name"] in names:
+            raise ValueError(f"Duplicate portfolio name '{p['name']}'.")
+        unknown = set(p.get("models", cfg["models"])) - set(MODEL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Portfolio '{p['name']}': unknown models {sorted(unknown)}.")
+        names.add(p["name"])
+
+    return cfg
+
+
+def _rolling_apply(r: pd.Series, window: int, fn, **kwargs) -> pd.Series:
+    """applies a window-level model fn(r_window, **kwargs) to every trailing window"""
+    vals, idx = [], []
+    for i in range(window, len(r)):
+        try:
+            vals.append(fn(r.iloc[i - window : i], **kwargs))
+        except ValueError:
+            vals.append(np.nan) # e.g. too few EVT exceedances in this window
+        idx.append(r.index[i])
+    return pd.Series(vals, index=idx, dtype=float)
+
+
+def backtest_portfolio(
+    rets: pd.DataFrame,
+    weights: list[float],
+    alpha: float = 0.99,
+    window: int = 250,
+    models: list[str] = ("hist", "param", "mc"),
+    n_sims: int = 25_000,
+    seed: int = 42,
+    nu: float = 5.0,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    rolling VaR and coverage tests for one portfolio
+
+    VaR at date t uses only the window of returns ending at t-1 (no look-ahead).
+
+    parameters
+        rets: pd.DataFrame
+            T x N asset log returns in weight order
+        weights: list[float]
+            port weights (auto-normalised)
+        alpha: float
+            confidence level
+        window: int
+            rolling window length in trading days
+        models: list[str]
+            keys of MODEL_COLUMNS to run
+        n_sims: int
+            Monte Carlo simulations per window ('mc' / 'mc_t' / 'mc_tcop')
+        seed: int
+            Monte Carlo seed ('mc' / 'mc_t' / 'mc_tcop')
+        nu: float
+            Student-t degrees of freedom ('mc_t' / 'mc_tcop')
+
+    returns
+        (var_df, tests_df)
+            var_df: Loss plus one VaR column per model, indexed by date
+            tests_df: one row per model with Kupiec and conditional coverage results
+    """
+    from scipy.stats import norm
+    from varlab import models as m
+
+    port_r = portfolio_returns(rets, weights)
+    var_cols: dict[str, pd.Series] = {}
+
+    for key in models:
+        if key == "hist":
+            var = -port_r.rolling(window).quantile(1 - alpha).shift(1)
+        elif key == "param":
+            mu = port_r.rolling(window).mean().shift(1)
+            sigma = port_r.rolling(window).std(ddof=1).shift(1)
+            var = -(mu + norm.ppf(1 - alpha) * sigma)
+        elif key in ("cf", "param_t"):
+            # skewness / kurtosis adjusted parametric VaR, every window from one pass of power sums
+            fn = m.rolling_cornish_fisher if key == "cf" else m.rolling_student_t
+            v, _ = fn(port_r.to_numpy(dtype=float), window, alpha)
+            var = pd.Series(v[:-1], index=port_r.index[window:])
+        elif key == "mc":
+            mu_roll, cov_roll = rolling_mean_cov(rets, window)
+            vals = [
+                m.var_monte_carlo_normal(
+                    mu_roll[j], cov_roll[j], weights, alpha=alpha, n_sims=n_sims, seed=seed
+                )
+                for j in range(len(rets) - window)
+            ]
+            var = pd.Series(vals, index=rets.index[window:], dtype=float)
+        elif key == "mc_t":
+            mu_roll, cov_roll = rolling_mean_cov(rets, window)
+            vals = [
+                m.var_monte_carlo_t(
+                    mu_roll[j], cov_roll[j], weights, alpha=alpha, nu=nu, n_sims=n_sims, seed=seed
+                )
+                for j in range(len(rets) - window)
+            ]
+            var = pd.Series(vals, index=rets.index[window:], dtype=float)
+        elif key == "mc_tcop":
+            x = rets.to_numpy(dtype=float)
+            vals = [
+                m.var_monte_carlo_t_copula(
+                    x[j : j + window], weights, alpha=alpha, nu=nu, n_sims=n_sims, seed=seed
+                )
+                for j in range(len(rets) - window)
+            ]
+            var = pd.Series(vals, index=rets.index[window:], dtype=float)
+        elif key == "garch":
+            var = _rolling_apply(port_r, window, m.var_garch, alpha=alpha)
+        elif key == "evt":
+            var = _rolling_apply(port_r, window, m.var_evt_pot, alpha=alpha)
+        elif key == "brw":
+            brw, _ = rolling_brw(port_r.to_numpy(dtype=float), window, alpha=alpha)
+            var = pd.Series(brw[:-1], index=port_r.index[window:])
+        elif key == "ewma":
+            # one recursive pass over the whole history, seeded with the first window;
+            # sigma2[t] only uses returns up to t - 1
+            x = port_r.to_numpy(dtype=float)
+            sigma2 = ewma_variance(x, sigma2_0=float(np.var(x[:window], ddof=1)))
+            var = pd.Series(-norm.ppf(1 - alpha) * np.sqrt(sigma2[window:-1]), index=port_r.index[window:])
+        else:
+            raise ValueError(f"Unknown model '{key}'.")
+        var_cols[MODEL_COLUMNS[key]] = var
+
+    var_df = pd.DataFrame({"Loss": -port_r, **var_cols}).dropna()
+
+    tests = coverage_tests(exception_matrix(port_r, var_df[list(var_cols)]), alpha)
+    tests_df = tests[["exceptions", "n", "hit_rate", "LR_pof", "p_pof", "LR_cc", "p_cc"]]
+    tests_df = tests_df.rename_axis("model").reset_index()
+
+    return var_df, tests_df
+
+
+# ── worker side ──────────────────────────────────────────────────────────────
+# prices are attached once per worker as the executor's shared "prices"
+
+def _portfolio_returns(prices: pd.DataFrame, tickers: list[str]) -> pd.DataFrame:
+    return log_returns(prices[tickers].dropna(how="all"))
+
+
+def _spec_key(spec: dict, start: str, data: str) -> str:
+    """short hash of everything that determines a portfolio's results, data included"""
+    payload = json.dumps({**spec, "start": str(start), "data": data}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _part_paths(out_dir: Path, name: str, key: str) -> tuple[Path, Path]:
+    parts = out_dir / "parts"
+    return parts / f"{name}.{key}.var.parquet", parts / f"{name}.{key}.tests.parquet"
+
+
+def _stale_parts(out_dir: Path, name: str, key: str) -> list[Path]:
+    """parts of `name` written with other settings (names contain no '.', so the glob is exact)"""
+    keep = set(_part_paths(out_dir, name, key))
+    return [p for p in (out_dir / "parts").glob(f"{name}.*.parquet") if p not in keep]
+
+
+def _write_atomic(df: pd.DataFrame, path: Path) -> None:
+    # write then rename so an interrupted job never leaves a half-written part behind
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def _run_one(spec: dict, out_dir: str) -> dict:
+    """runs one portfolio in a worker, never raises -- failures are returned as data"""
+    name = spec["name"]
+    try:
+        with use_dtype(spec["dtype"] or get_dtype()):
+            rets = _portfolio_returns(shared("prices"), spec["tickers"])
+            var_df, tests_df = backtest_portfolio(
+                rets,
+                spec["weights"],
+                alpha=spec["alpha"],
+                window=spec["window"],
+                models=spec["models"],
+                n_sims=spec["n_sims"],
+                seed=spec["seed"],
+                nu=spec["nu"],
+            )
+        var_df.index.name = "date"
+        var_df = var_df.reset_index()
+        var_df.insert(0, "portfolio", name)
+        tests_df.insert(0, "portfolio", name)
+        tests_df.insert(1, "alpha", spec["alpha"])
+        tests_df.insert(2, "window", spec["window"])
+
+        # tests part last: its presence marks the portfolio as complete
+        var_path, tests_path = _part_paths(Path(out_dir), name, spec["key"])
+        _write_atomic(var_df, var_path)
+        _write_atomic(tests_df, tests_path)
+        return {"name": name, "ok": True, "error": None}
+    except Exception:
+        return {"name": name, "ok": False, "error": traceback.format_exc()}
+
+
+# ── driver ───────────────────────────────────────────────────────────────────
+
+def run_batch(
+    config_path: str | os.PathLike,
+    out_dir: str | os.PathLike,
+    workers: int | None = None,
+    prices: pd.DataFrame | None = None,
+    executor: str | None = None,
+) -> dict:
+    """
+    runs every portfolio in a batch config across an executor (varlab.executor)
+
+    parameters
+        config_path: path
+            .toml / .yaml batch config (see module docstring)
+        out_dir: path
+            output directory, created if missing; rerunning with the same
+            directory resumes, skipping portfolios finished with the same
+            settings on the same returns and recomputing those whose
+            settings or data changed
+        workers: int | None
+            process count, defaults to os.cpu_count()
+        prices: pd.DataFrame | None
+            pre-loaded prices covering every ticker; downloaded when None
+        executor: str | None
+            executor backend, defaults to $VARLAB_EXECUTOR or 'process';
+            with 'cluster', workers on other hosts need out_dir on a shared
+            filesystem
+
+    returns
+        dict with lists 'done', 'skipped', 'changed' (portfolios whose old parts
+        were written with other settings or data and were recomputed) and 'failed'
+        (name -> traceback)
+    """
+    cfg = load_config(config_path)
+    out_dir = Path(out_dir)
+    (out_dir / "parts").mkdir(parents=True, exist_ok=True)
+
+    if prices is None:
+        from varlab.data import get_prices
+
+        tickers = sorted({t for p in cfg["portfolios"] for t in p["tickers"]})
+        prices = get_prices(tickers, start=cfg["start"])
+
+    specs, skipped, changed, keys = [], [], [], {}
+    for p in cfg["portfolios"]:
+        spec = {k: p.get(k, cfg[k]) for k in _SETTINGS}
+        spec.update(name=p["name"], tickers=list(p["tickers"]), weights=list(p["weights"]))
+        data = returns_fingerprint(_portfolio_returns(prices, spec["tickers"]))
+        spec["key"] = keys[spec["name"]] = _spec_key(spec, cfg["start"], data)
+        if _part_paths(out_dir, spec["name"], spec["key"])[1].exists():
+            skipped.append(spec["name"])
+            continue
+        stale = _stale_parts(out_dir, spec["name"], spec["key"])
+        if stale:
+            changed.append(spec["name"])
+            for path in stale:
+                path.unlink() # never merged into the output again, even if this run fails
+        specs.append(spec)
+
+    failed: dict[str, str] = {}
+    done: list[str] = []
+
+    if specs:
+        with get_executor(executor, workers, shared={"prices": prices}) as pool:
+            futures = [pool.submit(_run_one, s, str(out_dir)) for s in specs]
+            for fut in as_completed(futures):
+                res = fut.result()
+                if res["ok"]:
+                    done.append(res["name"])
+                else:
+                    failed[res["name"]] = res["error"]
+
+    # consolidate whatever is complete; failed portfolios are retried on the next run
+    paths = [_part_paths(out_dir, n, k) for n, k in keys.items()]
+    paths = [pair for pair in paths if pair[1].exists()]
+    if paths:
+        pd.concat(
+            [pd.read_parquet(var_path) for var_path, _ in paths], ignore_index=True
+        ).to_parquet(out_dir / "var.parquet")
+        pd.concat(
+            [pd.read_parquet(tests_path) for _, tests_path in paths], ignore_index=True
+        ).to_parquet(out_dir / "tests.parquet")
+
+    return {"done": done, "skipped": skipped, "changed": changed, "failed": failed}
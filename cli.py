@@ -0,0 +1,326 @@
+"""
+Command-line entry point for varlab.
+
+    varlab single --ticker SPY --alpha 0.99 --window 250
+    varlab port   --tickers SPY QQQ TLT GLD --weights 0.4 0.3 0.2 0.1
+    varlab grid   --alphas 0.95 0.99 --windows 125 250 500
+    varlab batch  portfolios.toml --out results/ --workers 8
+    varlab tournament --models hist param ewma garch evt --folds 4 --workers 8
+    varlab render results/var.parquet --out charts/ --format svg
+    varlab monitor portfolios.toml --replay bars.parquet | --socket HOST:PORT
+    varlab bench  kernels | precision
+    varlab worker HOST:PORT             (cluster executor worker, see varlab.executor)
+    varlab --dtype float32 port ...    (pipeline precision, see varlab.precision)
+
+Only argparse is imported at module level. numpy / pandas / scipy / arch /
+matplotlib / yfinance are pulled in by the subcommand that needs them, so
+`varlab --help` and argument errors return without loading any of them.
+"""
+
+import argparse
+import os
+
+_DEFAULT_TICKERS = ["SPY", "QQQ", "TLT", "GLD"]
+_DEFAULT_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+
+
+def _add_common(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--start", default="2015-01-01", help="first price date (YYYY-MM-DD)")
+
+
+def _add_portfolio(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--tickers", nargs="+", default=_DEFAULT_TICKERS, help="asset universe")
+    p.add_argument("--weights", nargs="+", type=float, default=_DEFAULT_WEIGHTS,
+                   help="port weights in ticker order (auto-normalised)")
+
+
+def _add_executor(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--executor", choices=["serial", "thread", "process", "cluster"], default=None,
+                   help="execution backend (default: $VARLAB_EXECUTOR or process, see varlab.executor)")
+
+
+def _cmd_single(args: argparse.Namespace) -> None:
+    from varlab import run_single_asset
+
+    run_single_asset.main(
+        ticker=args.ticker,
+        start=args.start,
+        alpha=args.alpha,
+        window=args.window,
+        plot=not args.no_plot,
+    )
+
+
+def _cmd_port(args: argparse.Namespace) -> None:
+    from varlab import run_port
+
+    run_port.main(
+        tickers=args.tickers,
+        weights=args.weights,
+        start=args.start,
+        alpha=args.alpha,
+        window=args.window,
+        n_sims=args.n_sims,
+        plot=not args.no_plot,
+        store=args.store,
+        workers=args.workers,
+        executor=args.executor,
+    )
+
+
+def _cmd_grid(args: argparse.Namespace) -> None:
+    from varlab import run_grid
+
+    run_grid.main(
+        tickers=args.tickers,
+        weights=args.weights,
+        start=args.start,
+        alphas=args.alphas,
+        windows=args.windows,
+    )
+
+
+def _cmd_tournament(args: argparse.Namespace) -> None:
+    import pandas as pd
+    from varlab.data import get_prices
+    from varlab.returns import log_returns
+    from varlab.tournament import run_tournament
+
+    rets = log_returns(get_prices(args.tickers, start=args.start))
+    board = run_tournament(
+        rets,
+        {"portfolio": dict(zip(args.tickers, args.weights))},
+        models=args.models,
+        alpha=args.alpha,
+        window=args.window,
+        n_folds=args.folds,
+        eliminate_p=args.eliminate_p,
+        n_sims=args.n_sims,
+        workers=args.workers,
+        executor=args.executor,
+    )
+    with pd.option_context("display.float_format", "{:.4g}".format, "display.width", 160):
+        print(board.drop(columns="portfolio").to_string(index=False))
+
+
+def _cmd_batch(args: argparse.Namespace) -> None:
+    from varlab.batch import run_batch
+
+    res = run_batch(args.config, args.out, workers=args.workers, executor=args.executor)
+    print(
+        f"done={len(res['done'])} skipped={len(res['skipped'])} "
+        f"failed={len(res['failed'])}"
+    )
+    if res["changed"]:
+        print(f"recomputed (settings or data changed since the last run): {', '.join(res['changed'])}")
+    for name, tb in res["failed"].items():
+        print(f"\n--- {name} failed ---\n{tb}")
+    if res["failed"]:
+        raise SystemExit(1)
+
+
+def _cmd_render(args: argparse.Namespace) -> None:
+    import pandas as pd
+    from varlab.plots import render_many
+
+    var = pd.read_parquet(args.var_file)
+    jobs = (
+        (name, grp.drop(columns="portfolio").set_index("date"), f"Rolling 1-Day VaR: {name}")
+        for name, grp in var.groupby("portfolio", sort=False)
+    )
+    stats = render_many(
+        jobs, args.out, fmt=args.format, workers=args.workers,
+        max_points=args.max_points or None,
+        executor=args.executor,
+    )
+    print(
+        f"{stats['charts']} charts in {stats['seconds']:.2f}s "
+        f"({stats['charts_per_sec']:.1f} charts/s, median {stats['median_chart_s'] * 1000:.0f} ms, "
+        f"p95 {stats['p95_chart_s'] * 1000:.0f} ms per chart)"
+    )
+
+
+def _cmd_monitor(args: argparse.Namespace) -> None:
+    import asyncio
+    import pandas as pd
+    from varlab.batch import load_config
+    from varlab.monitor import Monitor, replay_feed, socket_feed
+
+    cfg = load_config(args.config)
+    mon = Monitor(
+        {p["name"]: dict(zip(p["tickers"], p["weights"])) for p in cfg["portfolios"]},
+        window=args.window or cfg["window"],
+        alpha=args.alpha or cfg["alpha"],
+        models=args.models,
+        max_pending=args.max_pending,
+    )
+    if args.replay:
+        feed = replay_feed(args.replay, speed=args.speed, columns=mon.tickers)
+    else:
+        feed = socket_feed(args.socket)
+
+    def show(a: dict) -> None:
+        print(f"{a['time']}  BREACH {a['portfolio']} [{a['model']}] "
+              f"loss={a['loss']:.5f} > VaR={a['var']:.5f} (ES {a['es']:.5f})")
+
+    stats = asyncio.run(mon.run(feed, on_alert=show))
+    print(
+        f"\n{stats['ticks']} ticks, {stats['alerts']} alerts in {stats['seconds']:.2f}s "
+        f"({stats['ticks_per_sec']:.0f} ticks/s, feed paused {stats['stalls']} times, "
+        f"max backlog {stats['max_queue']})"
+    )
+    with pd.option_context("display.float_format", "{:.3f}".format):
+        print("latency (ms)")
+        print(mon.latency_percentiles() * 1000)
+
+
+def _cmd_worker(args: argparse.Namespace) -> None:
+    from varlab.executor import run_worker
+
+    authkey = args.authkey or os.environ.get("VARLAB_AUTHKEY")
+    if not authkey:
+        raise SystemExit("varlab worker: pass --authkey or set VARLAB_AUTHKEY")
+    run_worker(args.address, authkey)
+
+
+def _cmd_bench(args: argparse.Namespace) -> None:
+    import pandas as pd
+
+    if args.suite == "kernels":
+        from varlab.kernels import benchmark, default_backend
+
+        print(f"default backend: {default_backend()}")
+        res = benchmark(n_obs=args.n_obs, window=args.window, n_assets=args.n_assets or 10)
+    else:
+        from varlab.precision import benchmark
+
+        res = benchmark(n_obs=args.n_obs, n_assets=args.n_assets or 500, n_sims=args.n_sims)
+
+    with pd.option_context("display.float_format", "{:.3g}".format, "display.width", 120):
+        print(res)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="varlab",
+        description="Rolling VaR estimation and backtesting.",
+    )
+    parser.add_argument("--dtype", choices=["float64", "float32"], default=None,
+                        help="storage precision for returns and MC scenarios (default: $VARLAB_DTYPE or float64)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("single", help="rolling Historical / Parametric VaR for one asset")
+    p.add_argument("--ticker", default="SPY")
+    _add_common(p)
+    p.add_argument("--alpha", type=float, default=0.99, help="confidence level")
+    p.add_argument("--window", type=int, default=250, help="rolling window (trading days)")
+    p.add_argument("--no-plot", action="store_true", help="skip the backtest chart")
+    p.set_defaults(func=_cmd_single)
+
+    p = sub.add_parser("port", help="rolling Historical / Parametric / Monte Carlo VaR for a portfolio")
+    _add_portfolio(p)
+    _add_common(p)
+    p.add_argument("--alpha", type=float, default=0.99, help="confidence level")
+    p.add_argument("--window", type=int, default=250, help="rolling window (trading days)")
+    p.add_argument("--n-sims", type=int, default=25_000, help="Monte Carlo simulations per window")
+    p.add_argument("--no-plot", action="store_true", help="skip the backtest chart")
+    p.add_argument("--store", default=None,
+                   help="SQLite results store; reruns only compute dates added since the last run")
+    p.add_argument("--workers", type=int, default=1, help="Monte Carlo workers")
+    _add_executor(p)
+    p.set_defaults(func=_cmd_port)
+
+    p = sub.add_parser("grid", help="backtest a grid of confidence levels and windows")
+    _add_portfolio(p)
+    _add_common(p)
+    p.add_argument("--alphas", nargs="+", type=float, default=[0.95, 0.99])
+    p.add_argument("--windows", nargs="+", type=int, default=[125, 250, 500])
+    p.set_defaults(func=_cmd_grid)
+
+    p = sub.add_parser("tournament", help="walk-forward model tournament with early elimination")
+    _add_portfolio(p)
+    _add_common(p)
+    p.add_argument("--models", nargs="+", default=None,
+                   help="hist param cf param_t mc mc_t mc_tcop garch evt brw ewma (default: all)")
+    p.add_argument("--alpha", type=float, default=0.99, help="confidence level")
+    p.add_argument("--window", type=int, default=250, help="rolling window (trading days)")
+    p.add_argument("--folds", type=int, default=4, help="walk-forward sub-periods")
+    p.add_argument("--eliminate-p", type=float, default=0.05,
+                   help="drop a model once its pooled conditional coverage p-value falls below this")
+    p.add_argument("--n-sims", type=int, default=10_000, help="Monte Carlo simulations per window")
+    p.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    _add_executor(p)
+    p.set_defaults(func=_cmd_tournament)
+
+    p = sub.add_parser("batch", help="backtest every portfolio in a TOML / YAML config")
+    p.add_argument("config", help="batch config file (.toml, .yaml, .yml)")
+    p.add_argument("--out", required=True, help="output directory (rerun to resume)")
+    p.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    _add_executor(p)
+    p.set_defaults(func=_cmd_batch)
+
+    p = sub.add_parser("render", help="write backtest charts for every portfolio in a batch var.parquet")
+    p.add_argument("var_file", help="var.parquet written by 'varlab batch'")
+    p.add_argument("--out", required=True, help="chart output directory")
+    p.add_argument("--format", choices=["png", "svg", "pdf"], default="png")
+    p.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    p.add_argument("--max-points", type=int, default=2000,
+                   help="per-line vertex budget for decimation (0 = draw every point)")
+    _add_executor(p)
+    p.set_defaults(func=_cmd_render)
+
+    p = sub.add_parser("monitor", help="real-time VaR / ES with breach alerts over a tick feed")
+    p.add_argument("config", help="portfolio config (.toml, .yaml, .yml), as for 'varlab batch'")
+    feed = p.add_mutually_exclusive_group(required=True)
+    feed.add_argument("--replay", metavar="FILE", help="replay a Parquet / CSV price file")
+    feed.add_argument("--socket", metavar="ADDR",
+                      help="HOST:PORT or Unix socket path sending one JSON tick per line")
+    p.add_argument("--speed", type=float, default=None,
+                   help="replay pace as a multiple of real time (default: as fast as possible)")
+    p.add_argument("--alpha", type=float, default=None, help="confidence level (default: config)")
+    p.add_argument("--window", type=int, default=None, help="rolling window in ticks (default: config)")
+    p.add_argument("--models", nargs="+", choices=["hist", "param", "ewma"], default=["hist", "param", "ewma"])
+    p.add_argument("--max-pending", type=int, default=1024,
+                   help="ticks queued before the feed is paused (backpressure)")
+    p.set_defaults(func=_cmd_monitor)
+
+    p = sub.add_parser("bench", help="time compute backends on synthetic data")
+    p.add_argument("suite", choices=["kernels", "precision"],
+                   help="kernels: NumPy vs Numba rolling kernels; precision: float32 vs float64 pipeline")
+    p.add_argument("--n-obs", type=int, default=2_500)
+    p.add_argument("--window", type=int, default=250)
+    p.add_argument("--n-assets", type=int, default=None, help="default 10 (kernels) / 500 (precision)")
+    p.add_argument("--n-sims", type=int, default=50_000, help="precision suite only")
+    p.set_defaults(func=_cmd_bench)
+
+    p = sub.add_parser("worker", help="serve tasks for a cluster executor (varlab.executor)")
+    p.add_argument("address", help="hub address HOST:PORT")
+    p.add_argument("--authkey", default=None, help="hub secret (default: $VARLAB_AUTHKEY)")
+    p.set_defaults(func=_cmd_worker)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if hasattr(args, "weights") and len(args.weights) != len(args.tickers):
+        parser.error(
+            f"number of tickers ({len(args.tickers)}) must match "
+            f"number of weights ({len(args.weights)})"
+        )
+
+    if args.dtype:
+        # environment first so worker processes inherit it, then the already-imported module
+        os.environ["VARLAB_DTYPE"] = args.dtype
+        from varlab.precision import set_dtype
+
+        set_dtype(args.dtype)
+
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,38 +14,57 @@ Controls (sidebar)
 Models
 ------
   Historical          empirical quantile (non-parametric)
-  Parametric Normal   rolling mean + rolling std, Normal z-score
+  Parametric Normal   rolling mean + rolling std, Normal z-score (projected
+                      from cached asset covariances, so weight changes are
+                      cheap)
+  Cornish-Fisher      Normal quantile corrected for rolling skewness and
+                      excess kurtosis
+  Student-t           t fitted to the rolling mean, variance and kurtosis
+                      (method of moments, nu = 4 + 6 / kurtosis)
   GARCH(1,1)          ARCH-filtered conditional volatility (single full-sample
                       fit; parameters fixed, conditional vol updated in-sample)
   EVT-POT             Generalised Pareto fit to exceedances above the 95th-
-                      percentile loss threshold — rolling window
+                      percentile loss threshold — rolling window, vectorised
+                      profile-likelihood fits from evt.py; shape kept at
+                      xi >= -1 as in models.var_evt_pot, so the series
+                      matches the batch / tournament "evt" model
+
+Model state is cached separately from alpha (and, for the parametric model,
+from the weights), so changing only those re-reads cached fits and reapplies
+the quantile formula instead of refitting.
 
 Backtesting
 -----------
   Kupiec POF               unconditional coverage (LR ~ chi2(1))
   Christoffersen Ind.      serial independence of exceptions (LR ~ chi2(1))
   Christoffersen CC        joint conditional coverage (LR ~ chi2(2))
+  Rolling diagnostics      all three tests and the Basel traffic-light zone
+                           over every trailing 250-day window
 """
 
-import sys
-import os
 import warnings
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
-from scipy.stats import norm, genpareto
+from scipy.stats import norm
 
 # ── local imports ────────────────────────────────────────────────────────────
-sys.path.insert(0, os.path.dirname(__file__))
-from data     import get_prices
-from returns  import log_returns, portfolio_returns, normalize_weights
-from backtest import (
-    exception_series,
-    kupiec_pof_test,
+# always through the package: a bare `import kernels` would load the same file
+# as a second module, and numba's on-disk cache (cache=True) would then hold
+# entries compiled under a module name the varlab.* callers cannot import
+from varlab.data     import get_prices
+from varlab.returns  import log_returns, portfolio_returns, normalize_weights
+from varlab.kernels  import rolling_mean_cov
+from varlab.models   import rolling_cornish_fisher, rolling_student_t
+from varlab.evt      import threshold_sweep, mean_excess, pot_var, fit_gpd
+from varlab.backtest import (
+    exception_matrix,
+    coverage_tests,
     christoffersen_independence_test,
-    christoffersen_cc_test,
+    rolling_coverage_tests,
+    traffic_light_bounds,
 )
 
 # ── page config ───────────────────────────────────────────────────────────────
@@ -66,21 +85,31 @@ def load_data(tickers: tuple[str, ...], start: str) -> pd.DataFrame:
     return get_prices(list(tickers), start=start)
 
 
-@st.cache_data(show_spinner=False)
-def rolling_historical_var(port_r: pd.Series, window: int, alpha: float) -> pd.Series:
-    return -port_r.rolling(window).quantile(1 - alpha)
+# ── model state ──────────────────────────────────────────────────────────────
+# The expensive part of each model is cached without alpha, and the
+# parametric state without weights, so a sidebar tweak does not refit:
+#   alpha change   re-reads every cached state (sorted windows, GARCH vol,
+#                  GPD fits) and only reapplies the quantile formula
+#   weight change  the parametric model projects the cached asset covariance
+#                  stack; the historical, GARCH and EVT states are rebuilt
+#                  for the new portfolio series (sort / one fit / vectorised
+#                  GPD fits, all well under a second)
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def asset_rolling_moments(rets: pd.DataFrame, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Rolling asset mean vectors and covariance matrices; row j ends at rets.index[j + window - 1]."""
+    return rolling_mean_cov(rets, window)
 
-@st.cache_data(show_spinner=False)
-def rolling_parametric_var(port_r: pd.Series, window: int, alpha: float) -> pd.Series:
-    z     = norm.ppf(1 - alpha)
-    mu    = port_r.rolling(window).mean()
-    sigma = port_r.rolling(window).std(ddof=1)
-    return -(mu + z * sigma)
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def sorted_windows(port_r: pd.Series, window: int) -> np.ndarray:
+    """Every trailing window of portfolio returns, sorted; row j ends at port_r.index[j + window - 1]."""
+    x = port_r.to_numpy(dtype=float)
+    return np.sort(np.lib.stride_tricks.sliding_window_view(x, window), axis=1)
 
-@st.cache_data(show_spinner=False)
-def rolling_garch_var(port_r: pd.Series, alpha: float) -> pd.Series:
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def garch_conditional_vol(port_r: pd.Series) -> tuple[float, pd.Series]:
     """
     Fit GARCH(1,1) once on the full portfolio-return series.
 
@@ -97,51 +126,128 @@ def rolling_garch_var(port_r: pd.Series, alpha: float) -> pd.Series:
                          dist="normal", rescale=False)
         res = am.fit(disp="off")
 
-    cond_vol              = res.conditional_volatility / 100
-    cond_vol.index        = port_r.index
-    z                     = norm.ppf(1 - alpha)
-    mu                    = float(port_r.mean())
+    cond_vol       = res.conditional_volatility / 100
+    cond_vol.index = port_r.index
+    return float(port_r.mean()), cond_vol
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def evt_rolling_fits(port_r: pd.Series, window: int, threshold_q: float = 0.95) -> pd.DataFrame:
+    """
+    Rolling POT threshold u, exceedance count n_u and GPD (ξ, β) per window,
+    from one vectorised evt.threshold_sweep pass instead of a scipy fit per
+    window.  Row for date t uses the window ending at t - 1.
+    """
+    sweep = threshold_sweep(port_r, window, thresholds=[threshold_q])
+    return pd.DataFrame({k: sweep[k][threshold_q] for k in ("u", "n_u", "xi", "beta")})
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def evt_threshold_fits(port_r: pd.Series, window: int) -> tuple[dict, pd.DataFrame]:
+    """
+    Rolling GPD fits over a grid of threshold quantiles, plus the full-sample
+    mean-excess function.
+
+    evt.threshold_sweep sorts each window once and warm-starts every GPD fit
+    from the neighbouring threshold, so the whole grid costs less than a
+    single per-window scipy pass.
+    """
+    sweep = threshold_sweep(port_r, window)
+    return {k: v for k, v in sweep.items() if k != "var"}, mean_excess(-port_r)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def full_sample_gpd(port_r: pd.Series, threshold_q: float = 0.95) -> dict | None:
+    """Full-sample POT fit for the Tail Analysis tab; None below 10 exceedances."""
+    losses = -port_r.dropna().to_numpy(dtype=float)
+    u      = float(np.quantile(losses, threshold_q))
+    exc    = losses[losses > u] - u
+    if len(exc) < 10:
+        return None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        xi, beta = fit_gpd(exc)
+    return {"u": u, "exc": exc, "xi": xi, "beta": beta}
+
+
+# ── VaR from cached state (cheap, recomputed on every run) ───────────────────
+
+def rolling_historical_var(port_r: pd.Series, window: int, alpha: float) -> pd.Series:
+    """Rolling empirical (1 - alpha) quantile, linear interpolation as in pandas."""
+    if len(port_r) < window:
+        return pd.Series(np.nan, index=port_r.index)
+    s  = sorted_windows(port_r, window)
+    h  = (window - 1) * (1 - alpha)
+    lo = int(np.floor(h))
+    hi = min(lo + 1, window - 1)
+    q  = s[:, lo] + (h - lo) * (s[:, hi] - s[:, lo])
+    return pd.Series(-q, index=port_r.index[window - 1:]).reindex(port_r.index)
+
+
+def rolling_parametric_var(
+    rets: pd.DataFrame,
+    weights: np.ndarray,
+    window: int,
+    alpha: float,
+) -> pd.Series:
+    """Parametric Normal VaR: portfolio mean w'μ and variance w'Σw per window."""
+    if len(rets) < window:
+        return pd.Series(np.nan, index=rets.index)
+    mu, cov = asset_rolling_moments(rets, window)
+    w       = np.asarray(weights, dtype=float)
+    z       = norm.ppf(1 - alpha)
+    sigma   = np.sqrt(np.einsum("i,tij,j->t", w, cov, w))
+    var     = -(mu @ w + z * sigma)
+    return pd.Series(var, index=rets.index[window - 1:]).reindex(rets.index)
+
+
+def rolling_moment_var(port_r: pd.Series, window: int, alpha: float, model: str) -> pd.Series:
+    """
+    Cornish-Fisher ("cf") or Student-t ("t") VaR from rolling power sums,
+    windows aligned like the parametric model; one vectorised pass, no fit.
+    """
+    if len(port_r) < window:
+        return pd.Series(np.nan, index=port_r.index)
+    fn  = rolling_cornish_fisher if model == "cf" else rolling_student_t
+    var = fn(port_r.to_numpy(dtype=float), window, alpha)[0]
+    return pd.Series(var, index=port_r.index[window - 1:]).reindex(port_r.index)
+
+
+def rolling_garch_var(port_r: pd.Series, alpha: float) -> pd.Series:
+    mu, cond_vol = garch_conditional_vol(port_r)
+    z            = norm.ppf(1 - alpha)
     return -(mu + z * cond_vol).rename("VaR_garch")
 
 
-@st.cache_data(show_spinner=False)
 def rolling_evt_var(
     port_r: pd.Series,
     window: int,
     alpha: float,
     threshold_q: float = 0.95,
 ) -> pd.Series:
-    """Proper rolling POT-GPD VaR — refits GPD at each step."""
-    losses   = -port_r
-    var_vals = []
-    idx_vals = []
-
-    for i in range(window, len(losses)):
-        wl  = losses.iloc[i - window : i].to_numpy(dtype=float)
-        u   = float(np.quantile(wl, threshold_q))
-        exc = wl[wl > u] - u
-
-        if len(exc) < 10:
-            var_vals.append(np.nan)
-        else:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                xi, _, beta = genpareto.fit(exc, floc=0)
-
-            n_obs     = len(wl)
-            n_u       = len(exc)
-            p_exceed  = (1 - alpha) * n_obs / n_u
+    """
+    Proper rolling POT-GPD VaR — refits GPD at each step.
 
-            if p_exceed <= 0 or p_exceed >= 1:
-                var_vals.append(np.nan)
-            elif abs(xi) < 1e-8:
-                var_vals.append(float(u + beta * np.log(1.0 / p_exceed)))
-            else:
-                var_vals.append(float(u + (beta / xi) * (p_exceed ** (-xi) - 1.0)))
+    The fits are cached per (series, window, threshold); alpha only enters
+    the closed-form POT quantile.
+    """
+    if len(port_r) <= window:
+        return pd.Series(np.nan, index=port_r.index, name="VaR_evt")
+    fits = evt_rolling_fits(port_r, window, threshold_q)
+    var  = pot_var(fits["u"], fits["xi"], fits["beta"], fits["n_u"], window, alpha)
+    return pd.Series(var, index=fits.index, name="VaR_evt")
 
-        idx_vals.append(losses.index[i])
 
-    return pd.Series(var_vals, index=idx_vals, name="VaR_evt")
+def evt_threshold_sensitivity(
+    port_r: pd.Series,
+    window: int,
+    alpha: float,
+) -> tuple[dict, pd.DataFrame]:
+    """Threshold sweep surfaces with the VaR surface for the current alpha."""
+    fits, me = evt_threshold_fits(port_r, window)
+    var      = pot_var(fits["u"], fits["xi"], fits["beta"], fits["n_u"], window, alpha)
+    return {**fits, "var": pd.DataFrame(var, index=fits["u"].index, columns=fits["u"].columns)}, me
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -154,6 +260,8 @@ _COLOURS = {
     "Parametric":      "#27ae60",
     "GARCH":           "#e67e22",
     "EVT-POT":         "#8e44ad",
+    "Cornish-Fisher":  "#16a085",
+    "Student-t":       "#c0392b",
 }
 
 def _var_chart(df_plot: pd.DataFrame, alpha: float) -> go.Figure:
@@ -165,6 +273,8 @@ def _var_chart(df_plot: pd.DataFrame, alpha: float) -> go.Figure:
         "VaR_param": ("VaR – Parametric Normal", _COLOURS["Parametric"], "lines",       1.8),
         "VaR_garch": ("VaR – GARCH(1,1)",        _COLOURS["GARCH"],      "lines",       1.8),
         "VaR_evt":   ("VaR – EVT-POT",           _COLOURS["EVT-POT"],    "lines",       1.8),
+        "VaR_cf":    ("VaR – Cornish-Fisher",    _COLOURS["Cornish-Fisher"], "lines",   1.8),
+        "VaR_t":     ("VaR – Student-t",         _COLOURS["Student-t"],  "lines",       1.8),
     }
     for col, (label, colour, mode, width) in col_map.items():
         if col not in df_plot.columns:
@@ -193,10 +303,11 @@ def _exception_chart(exc_df: pd.DataFrame) -> go.Figure:
     """
     fig = go.Figure()
     colours = [_COLOURS["Historical"], _COLOURS["Parametric"],
-               _COLOURS["GARCH"], _COLOURS["EVT-POT"]]
+               _COLOURS["GARCH"], _COLOURS["EVT-POT"],
+               _COLOURS["Cornish-Fisher"], _COLOURS["Student-t"]]
 
     for idx, col in enumerate(exc_df.columns):
-        exc_dates = exc_df.index[exc_df[col] == 1]
+        exc_dates = exc_df.index[exc_df[col].to_numpy(dtype=np.int8, na_value=0) == 1]
         if len(exc_dates) == 0:
             continue
         y_offset = idx + 1
@@ -284,25 +395,85 @@ def _backtest_table(results: dict[str, dict], alpha: float) -> pd.DataFrame:
     return pd.DataFrame(rows).set_index("Model")
 
 
+def _traffic_light_chart(
+    rolling: dict[str, pd.DataFrame],
+    window: int,
+    alpha: float,
+) -> go.Figure:
+    """
+    Trailing-window exception counts per model over Basel traffic-light bands.
+    """
+    green_max, yellow_max = traffic_light_bounds(window, alpha)
+    y_top = max(
+        [yellow_max + 3] + [int(df["exceptions"].max()) + 1 for df in rolling.values()]
+    )
+    colours = [_COLOURS["Historical"], _COLOURS["Parametric"],
+               _COLOURS["GARCH"], _COLOURS["EVT-POT"]]
+
+    fig = go.Figure()
+    fig.add_hrect(y0=-0.5, y1=green_max + 0.5, fillcolor="#27ae60",
+                  opacity=0.12, line_width=0)
+    fig.add_hrect(y0=green_max + 0.5, y1=yellow_max + 0.5, fillcolor="#f1c40f",
+                  opacity=0.15, line_width=0)
+    fig.add_hrect(y0=yellow_max + 0.5, y1=y_top, fillcolor="#e74c3c",
+                  opacity=0.12, line_width=0)
+
+    for idx, (model, df) in enumerate(rolling.items()):
+        fig.add_trace(go.Scatter(
+            x=df.index, y=df["exceptions"],
+            name=model, mode="lines", line_shape="hv",
+            line=dict(color=colours[idx % len(colours)], width=1.6),
+        ))
+
+    fig.update_layout(
+        title=f"Basel Traffic Light  (exceptions in trailing {window} days · "
+              f"green ≤ {green_max}, yellow ≤ {yellow_max})",
+        xaxis_title="Date", yaxis_title="# exceptions",
+        yaxis=dict(range=[-0.5, y_top]),
+        hovermode="x unified", height=380,
+        legend=dict(orientation="h", y=-0.18),
+        margin=dict(l=60, r=20, t=50, b=60),
+    )
+    return fig
+
+
+def _rolling_pvalue_chart(rolling: dict[str, pd.DataFrame], column: str, label: str) -> go.Figure:
+    """Rolling p-value of one coverage test per model, with the 5% rejection line."""
+    colours = [_COLOURS["Historical"], _COLOURS["Parametric"],
+               _COLOURS["GARCH"], _COLOURS["EVT-POT"]]
+    fig = go.Figure()
+    for idx, (model, df) in enumerate(rolling.items()):
+        fig.add_trace(go.Scatter(
+            x=df.index, y=df[column],
+            name=model, mode="lines",
+            line=dict(color=colours[idx % len(colours)], width=1.4),
+        ))
+    fig.add_hline(y=0.05, line_dash="dash", line_color="#e74c3c",
+                  annotation_text="5%", annotation_position="top left")
+    fig.update_layout(
+        title=f"Rolling {label} p-value",
+        xaxis_title="Date", yaxis_title="p-value",
+        yaxis=dict(range=[0, 1]),
+        hovermode="x unified", height=340,
+        legend=dict(orientation="h", y=-0.2),
+        margin=dict(l=60, r=20, t=50, b=60),
+    )
+    return fig
+
+
 def _gpd_tail_chart(port_r: pd.Series, threshold_q: float = 0.95) -> go.Figure:
     """
     Plot the empirical tail and fitted GPD survival function.
     Uses the full sample for illustration.
     """
-    losses = -port_r.dropna().to_numpy(dtype=float)
-    u      = float(np.quantile(losses, threshold_q))
-    exc    = losses[losses > u] - u
-
-    if len(exc) < 10:
+    fit = full_sample_gpd(port_r, threshold_q)
+    if fit is None:
         fig = go.Figure()
         fig.add_annotation(text="Insufficient exceedances for GPD fit",
                            xref="paper", yref="paper", x=0.5, y=0.5,
                            showarrow=False)
         return fig
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        xi, _, beta = genpareto.fit(exc, floc=0)
+    exc, xi, beta = fit["exc"], fit["xi"], fit["beta"]
 
     # empirical survival function for exceedances
     sorted_exc = np.sort(exc)
@@ -339,6 +510,81 @@ def _gpd_tail_chart(port_r: pd.Series, threshold_q: float = 0.95) -> go.Figure:
     return fig
 
 
+def _threshold_sensitivity_chart(sweep: dict) -> go.Figure:
+    """
+    ξ and VaR against the threshold quantile: the latest window, plus the
+    median and 10–90% band of ξ over all windows.  A usable threshold sits
+    where ξ is flat.
+    """
+    xi  = sweep["xi"]
+    q   = xi.columns.to_numpy(dtype=float)
+    lo, med, hi = (xi.quantile(p).to_numpy() for p in (0.1, 0.5, 0.9))
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=np.concatenate([q, q[::-1]]), y=np.concatenate([hi, lo[::-1]]),
+        fill="toself", fillcolor="rgba(142,68,173,0.15)", line=dict(width=0),
+        name="ξ 10–90% over windows", hoverinfo="skip",
+    ))
+    fig.add_trace(go.Scatter(
+        x=q, y=med, mode="lines", name="ξ median",
+        line=dict(color=_COLOURS["EVT-POT"], width=2),
+    ))
+    fig.add_trace(go.Scatter(
+        x=q, y=xi.iloc[-1].to_numpy(), mode="lines+markers", name="ξ latest window",
+        line=dict(color=_COLOURS["EVT-POT"], width=1, dash="dot"),
+    ))
+    fig.add_trace(go.Scatter(
+        x=q, y=sweep["var"].iloc[-1].to_numpy(), mode="lines+markers",
+        name="VaR latest window", yaxis="y2",
+        line=dict(color="#c0392b", width=2),
+    ))
+    fig.update_layout(
+        title="Threshold Sensitivity  (rolling POT fits across threshold quantiles)",
+        xaxis_title="Threshold quantile",
+        yaxis=dict(title="Shape  ξ"),
+        yaxis2=dict(title="VaR  (loss units)", overlaying="y", side="right",
+                    showgrid=False),
+        height=420,
+        legend=dict(orientation="h", y=-0.18),
+        margin=dict(l=60, r=60, t=60, b=70),
+    )
+    return fig
+
+
+def _mean_excess_chart(me: pd.DataFrame) -> go.Figure:
+    """
+    Full-sample mean-excess function e(u) with ±2 s.e.  Roughly linear above
+    a threshold where the GPD applies (slope ξ / (1 − ξ)).
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=me["u"], y=me["mean_excess"] + 2 * me["se"],
+        mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip",
+    ))
+    fig.add_trace(go.Scatter(
+        x=me["u"], y=me["mean_excess"] - 2 * me["se"],
+        mode="lines", line=dict(width=0), fill="tonexty",
+        fillcolor="rgba(41,128,185,0.15)", name="±2 s.e.", hoverinfo="skip",
+    ))
+    fig.add_trace(go.Scatter(
+        x=me["u"], y=me["mean_excess"], mode="lines+markers", name="e(u)",
+        customdata=np.column_stack([me.index, me["n_u"]]),
+        hovertemplate="u=%{x:.5f}<br>q=%{customdata[0]:.3f}  n=%{customdata[1]}"
+                      "<br>e(u)=%{y:.5f}<extra></extra>",
+        line=dict(color="#2980b9", width=2),
+    ))
+    fig.update_layout(
+        title="Mean-Excess Plot  (full sample)",
+        xaxis_title="Threshold u  (loss units)",
+        yaxis_title="Mean excess  E[L − u | L > u]",
+        height=420,
+        legend=dict(orientation="h", y=-0.18),
+        margin=dict(l=60, r=20, t=60, b=70),
+    )
+    return fig
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Sidebar
 # ─────────────────────────────────────────────────────────────────────────────
@@ -373,6 +619,8 @@ with st.sidebar:
     run_param = st.checkbox("Parametric Normal",   value=True)
     run_garch = st.checkbox("GARCH(1,1)",           value=True)
     run_evt   = st.checkbox("EVT-POT (GPD)",        value=True)
+    run_cf    = st.checkbox("Cornish-Fisher",       value=False)
+    run_t     = st.checkbox("Student-t",            value=False)
 
     st.divider()
     run_btn = st.button("▶  Run Backtest", type="primary", use_container_width=True)
@@ -383,7 +631,7 @@ with st.sidebar:
 
 st.title("📉 VaR Risk Modeling & Backtesting Dashboard")
 st.caption(
-    "Historical · Parametric Normal · GARCH(1,1) · EVT-POT  ·  "
+    "Historical · Parametric Normal · Cornish-Fisher · Student-t · GARCH(1,1) · EVT-POT  ·  "
     "Kupiec POF · Christoffersen Independence & Conditional Coverage"
 )
 
@@ -449,7 +697,7 @@ if run_hist:
 
 if run_param:
     with st.spinner("Computing Parametric Normal VaR…"):
-        var_series["VaR_param"] = rolling_parametric_var(port_r, window, alpha)
+        var_series["VaR_param"] = rolling_parametric_var(rets, weights_arr, window, alpha)
 
 if run_garch:
     with st.spinner("Fitting GARCH(1,1) — this may take a few seconds…"):
@@ -459,6 +707,12 @@ if run_evt:
     with st.spinner("Computing EVT-POT VaR (rolling GPD fits)…"):
         var_series["VaR_evt"] = rolling_evt_var(port_r, window, alpha)
 
+if run_cf:
+    var_series["VaR_cf"] = rolling_moment_var(port_r, window, alpha, "cf")
+
+if run_t:
+    var_series["VaR_t"] = rolling_moment_var(port_r, window, alpha, "t")
+
 if not var_series:
     st.warning("Select at least one model to run.")
     st.stop()
@@ -475,28 +729,11 @@ label_map = {
     "VaR_param": "Parametric Normal",
     "VaR_garch": "GARCH(1,1)",
     "VaR_evt":   "EVT-POT",
+    "VaR_cf":    "Cornish-Fisher",
+    "VaR_t":     "Student-t",
 }
-exc_dict: dict[str, pd.Series]    = {}
-bt_results: dict[str, dict]       = {}
-
-for key in var_series:
-    exc = exception_series(port_r, out[key])
-    exc_dict[label_map[key]] = exc
-
-    pof = kupiec_pof_test(exc, alpha)
-    ind = christoffersen_independence_test(exc)
-    cc  = christoffersen_cc_test(exc, alpha)
-
-    bt_results[label_map[key]] = {
-        "exceptions": pof["exceptions"],
-        "hit_rate":   pof.get("hit_rate", float("nan")),
-        "LR_pof":     pof["LR_pof"],
-        "p_pof":      pof["p_value"],
-        "LR_ind":     ind["LR_ind"],
-        "p_ind":      ind["p_value"],
-        "LR_cc":      cc["LR_cc"],
-        "p_cc":       cc["p_value"],
-    }
+exc_df = exception_matrix(port_r, out[list(var_series)]).rename(columns=label_map)
+bt_results: dict[str, dict] = coverage_tests(exc_df, alpha).to_dict(orient="index")
 
 # ── summary metric strip ──────────────────────────────────────────────────────
 st.subheader("Summary")
@@ -510,8 +747,9 @@ for col, (model, res) in zip(metric_cols, bt_results.items()):
     )
 
 # ── tabbed results ────────────────────────────────────────────────────────────
-tab1, tab2, tab3, tab4 = st.tabs(
-    ["📈 VaR Lines", "🚨 Exception Timeline", "📊 Backtest Statistics", "🔬 Tail Analysis"]
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["📈 VaR Lines", "🚨 Exception Timeline", "📊 Backtest Statistics",
+     "🚦 Rolling Diagnostics", "🔬 Tail Analysis"]
 )
 
 with tab1:
@@ -526,7 +764,6 @@ with tab1:
         )
 
 with tab2:
-    exc_df = pd.DataFrame(exc_dict)
     st.plotly_chart(_exception_chart(exc_df), use_container_width=True)
     st.plotly_chart(_annual_exception_heatmap(exc_df), use_container_width=True)
 
@@ -549,9 +786,9 @@ with tab3:
 
     st.markdown("---")
     st.markdown("#### Transition matrices (Christoffersen independence test)")
-    ind_cols = st.columns(len(exc_dict))
-    for col, (model, exc) in zip(ind_cols, exc_dict.items()):
-        ind = christoffersen_independence_test(exc)
+    ind_cols = st.columns(len(exc_df.columns))
+    for col, model in zip(ind_cols, exc_df.columns):
+        ind = christoffersen_independence_test(exc_df[model])
         col.markdown(f"**{model}**")
         tm = pd.DataFrame(
             [[ind["T00"], ind["T01"]], [ind["T10"], ind["T11"]]],
@@ -568,6 +805,43 @@ with tab3:
             )
 
 with tab4:
+    tl_window = 250   # Basel backtesting window
+    rolling_bt = {
+        model: rolling_coverage_tests(exc_df[model], alpha, tl_window)
+        for model in exc_df.columns
+        if exc_df[model].count() >= tl_window
+    }
+    if not rolling_bt:
+        st.info(f"Need at least {tl_window} backtest days for rolling diagnostics.")
+    else:
+        st.markdown(
+            f"Coverage tests re-evaluated on every trailing **{tl_window}-day** window. "
+            "Zones follow the Basel traffic light: a count is green while its "
+            "cumulative binomial probability is below 95%, yellow below 99.99%, "
+            "red otherwise."
+        )
+        st.plotly_chart(_traffic_light_chart(rolling_bt, tl_window, alpha),
+                        use_container_width=True)
+
+        # sub-tabs rather than a radio: widgets would rerun the script and reset the Run button
+        for sub, (test_col, label) in zip(
+            st.tabs(["Conditional coverage", "Kupiec POF", "Independence"]),
+            [("p_cc", "Conditional coverage"), ("p_pof", "Kupiec POF"), ("p_ind", "Independence")],
+        ):
+            with sub:
+                st.plotly_chart(_rolling_pvalue_chart(rolling_bt, test_col, label),
+                                use_container_width=True)
+
+        zone_now = pd.DataFrame({
+            model: {"Exceptions (last 250d)": int(df["exceptions"].iloc[-1]),
+                    "Zone":                   df["zone"].iloc[-1].upper(),
+                    "Days in red":            int((df["zone"] == "red").sum()),
+                    "Days in yellow":         int((df["zone"] == "yellow").sum())}
+            for model, df in rolling_bt.items()
+        }).T
+        st.dataframe(zone_now, use_container_width=True)
+
+with tab5:
     st.markdown(
         "**Peaks-over-Threshold (POT):** exceedances above the 95th-percentile "
         "loss are fitted to a Generalised Pareto Distribution.  "
@@ -578,14 +852,10 @@ with tab4:
     st.plotly_chart(_gpd_tail_chart(port_r), use_container_width=True)
 
     # GPD parameters summary
-    losses_full = -port_r.dropna().to_numpy(dtype=float)
-    u_full      = float(np.quantile(losses_full, 0.95))
-    exc_full    = losses_full[losses_full > u_full] - u_full
+    fit = full_sample_gpd(port_r)
 
-    if len(exc_full) >= 10:
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            xi_f, _, beta_f = genpareto.fit(exc_full, floc=0)
+    if fit is not None:
+        xi_f, beta_f, u_full = fit["xi"], fit["beta"], fit["u"]
 
         g1, g2, g3 = st.columns(3)
         g1.metric("Shape  ξ",     f"{xi_f:.4f}")
@@ -599,4 +869,18 @@ with tab4:
             if abs(xi_f) <= 0.05 else
             "Bounded tail (Weibull) — losses have a finite upper bound."
         )
-        st.info(tail_desc)
\ No newline at end of file
+        st.info(tail_desc)
+    st.markdown(
+        "**Threshold choice:** the 95th percentile is a convention.  Below, every "
+        "rolling window is refitted across a grid of threshold quantiles; pick a "
+        "threshold where ξ is stable and the mean-excess plot is roughly linear."
+    )
+    if len(port_r.dropna()) > window:
+        with st.spinner("Sweeping EVT thresholds…"):
+            sweep, me = evt_threshold_sensitivity(port_r, window, alpha)
+        # sub-tabs rather than a radio: widgets would rerun the script and reset the Run button
+        sens_tab, me_tab = st.tabs(["Threshold sensitivity", "Mean excess"])
+        with sens_tab:
+            st.plotly_chart(_threshold_sensitivity_chart(sweep), use_container_width=True)
+        with me_tab:
+            st.plotly_chart(_mean_excess_chart(me), use_container_width=True)
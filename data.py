@@ -1,5 +1,4 @@
 import pandas as pd
-import yfinance as yf
 
 def get_prices(tickers: list[str], start: str = "2015-01-01") -> pd.DataFrame:
     """
@@ -14,6 +13,8 @@ def get_prices(tickers: list[str], start: str = "2015-01-01") -> pd.DataFrame:
             pandas DataFrame indexed by date with one column per ticker
             containing adjusted closing prices.
     """
+    import yfinance as yf # deferred so the CLI only loads yfinance when prices are fetched
+
     df = yf.download( #downloading price data from Yahoo Finance (yfinance)
         tickers, # individual stocks
         start=start, # start date
@@ -37,3 +38,62 @@ def get_prices(tickers: list[str], start: str = "2015-01-01") -> pd.DataFrame:
     prices = prices.dropna(how="all") # drops rows where all tickers are missing prices (non-trading days or partial data)
 
     return prices
+
+def read_price_chunks(
+    path: str,
+    chunk_rows: int = 100_000,
+    columns: list[str] | None = None,
+):
+    """
+    reads a price file in row chunks instead of loading it whole
+
+    the file holds one row per bar and one column per symbol, with the
+    timestamps as the index: a Parquet file written by DataFrame.to_parquet
+    or a CSV whose first column is the timestamp
+
+    parameters
+        path : str
+            .parquet / .pq or .csv file
+        chunk_rows : int
+            rows per chunk, the unit of peak memory
+        columns : list[str] | None
+            symbols to read, defaults to all of them
+
+    yields
+            pandas DataFrames of at most chunk_rows rows, in file order
+    """
+    suffix = str(path).lower().rsplit(".", 1)[-1]
+
+    if suffix in ("parquet", "pq"):
+        import pyarrow.parquet as pq
+
+        # record batches are decoded page by page, so memory follows chunk_rows
+        # whatever row group size the writer used; without pre_buffer pyarrow
+        # would first load a whole row group's column chunks
+        pf = pq.ParquetFile(path, pre_buffer=False, buffer_size=1 << 20)
+        meta = pf.schema_arrow.pandas_metadata or {}
+        if columns is not None:
+            # keep the index column(s) pandas stored alongside the data
+            index_cols = [c for c in meta.get("index_columns", []) if isinstance(c, str)]
+            columns = index_cols + list(columns)
+        # a RangeIndex is stored as metadata only and restarts at 0 in every batch
+        ranged = [c for c in meta.get("index_columns", []) if isinstance(c, dict) and c.get("kind") == "range"]
+        pos = 0
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=columns):
+            frame = batch.to_pandas()
+            if ranged:
+                r = ranged[0]
+                start = r["start"] + pos * r["step"]
+                frame.index = pd.RangeIndex(start, start + len(frame) * r["step"], r["step"], name=r["name"])
+            pos += len(frame)
+            yield frame
+
+    elif suffix == "csv":
+        index_name = pd.read_csv(path, nrows=0).columns[0]
+        usecols = None if columns is None else [index_name, *columns]
+        yield from pd.read_csv(
+            path, index_col=0, parse_dates=True, usecols=usecols, chunksize=chunk_rows
+        )
+
+    else:
+        raise ValueError(f"Unsupported price file '{path}'. Use .parquet or .csv.")
@@ -0,0 +1,337 @@
+"""
+EVT threshold-sensitivity sweep for rolling POT-GPD VaR.
+
+    from varlab.evt import threshold_sweep, mean_excess
+
+    sweep = threshold_sweep(port_r, window=250, alpha=0.99,
+                            thresholds=np.arange(0.85, 0.981, 0.01))
+    sweep["var"]          # dates x thresholds VaR surface
+    sweep["xi"]           # GPD shape surface (look for the stable region)
+    mean_excess(-port_r)  # full-sample mean-excess plot data
+
+var_evt_pot fixes threshold_quantile=0.95. Checking that choice means
+refitting the whole rolling backtest once per candidate threshold. The
+sweep shares the work instead:
+
+  * every window is sorted once (in row blocks) and all thresholds cut
+    their exceedances from the same sorted rows
+  * for one threshold the GPD is fitted for all windows at once. The
+    likelihood is profiled to one parameter, theta = xi / beta:
+    xi(theta) = mean(log(1 + theta y)) is the MLE of xi given theta, and
+    theta solves d/dtheta [log(xi / theta) + xi] = 0 (Grimshaw 1993). A
+    vectorised secant iteration runs on the (windows x exceedances) matrix.
+  * each threshold starts from the neighbouring threshold's theta, so it
+    typically converges in a handful of iterations
+
+The windows where the secant does not settle (an MLE close to the support
+boundary, xi well below 0) get a bounded golden-section search of the same
+profile, again vectorised over windows. The shape is kept at xi >= -1, where the likelihood is
+bounded; windows whose data push it below report the uniform endpoint
+xi = -1, beta = max exceedance. models.var_evt_pot applies the same
+restriction to its scipy fit (fit_gpd), and elsewhere the fitted likelihood
+matches or beats scipy.stats.genpareto.fit, so both give the same VaR up to
+optimiser tolerance.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_THRESHOLDS = np.round(np.arange(0.85, 0.9801, 0.01), 2)
+
+_MIN_EXCEEDANCES = 10 # as in models.var_evt_pot
+
+
+def _h(x: np.ndarray, r: np.ndarray, l: np.ndarray) -> np.ndarray:
+    """x / (1 + x) - log1p(x) from r = x / (1 + x) and l = log1p(x), with a series where the two cancel"""
+    h = r - l
+    small = (np.abs(x) < 1e-4) & (x != 0) # padding zeros are already exact
+    if small.any():
+        xs = x[small]
+        h[small] = -xs ** 2 / 2 + 2 * xs ** 3 / 3 - 3 * xs ** 4 / 4
+    return h
+
+
+def _profile_score(theta: np.ndarray, y: np.ndarray, n_u: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    derivative of the profile objective log(xi / theta) + xi, and xi(theta)
+
+    y is a (rows, k) exceedance matrix padded with zeros (a zero contributes
+    nothing to any of the sums). Written as [mean h(x) / xi + mean x/(1+x)] / theta
+    with x = theta y, which stays accurate as theta -> 0.
+    """
+    x = theta[:, None] * y
+    l = np.log1p(x)
+    r = x / (1 + x)
+    xi = l.sum(axis=1) / n_u
+    s1 = r.sum(axis=1) / n_u
+    sh = _h(x, r, l).sum(axis=1) / n_u
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(
+            theta == 0,
+            (y.sum(axis=1) / n_u) - (y ** 2).sum(axis=1) / (2 * y.sum(axis=1)), # limit at theta = 0
+            (sh / xi + s1) / theta,
+        )
+    return score, xi
+
+
+def _fit_gpd_rows(
+    y: np.ndarray, n_u: np.ndarray, theta0: np.ndarray, max_iter: int = 50, tol: float = 1e-10
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    profile-likelihood GPD fits for every row of a zero-padded exceedance matrix
+
+    returns (xi, beta, theta); rows that did not converge are NaN
+    """
+    y_max = y.max(axis=1)
+    lower = -1.0 / y_max # 1 + theta y > 0 for every exceedance
+
+    t0 = np.maximum(theta0, lower * 0.9)
+    t1 = t0 + np.where(np.abs(t0) > 1e-3 / y_max, 1e-3 * t0, 1e-3 / y_max)
+    f0, _ = _profile_score(t0, y, n_u)
+    done = np.zeros(len(y), dtype=bool)
+
+    for _ in range(max_iter):
+        # only rows still iterating are re-evaluated
+        act = np.flatnonzero(~done)
+        f1 = f0.copy()
+        f1[act], _ = _profile_score(t1[act], y[act], n_u[act])
+        denom = f1 - f0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(denom != 0, f1 * (t1 - t0) / denom, 0.0)
+        t2 = t1 - step
+        # stay inside the support: halve the way towards the boundary instead
+        t2 = np.where(t2 <= lower, (t1 + lower) / 2, t2)
+        t2 = np.where(done | ~np.isfinite(t2), t1, t2)
+        done |= np.abs(t2 - t1) * y_max < tol
+        t0, f0, t1 = t1, f1, t2
+        if done.all():
+            break
+
+    score, xi = _profile_score(t1, y, n_u)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = np.where(t1 == 0, y.sum(axis=1) / n_u, xi / t1)
+    bad = ~done | ~np.isfinite(xi) | ~(beta > 0)
+    return np.where(bad, np.nan, xi), np.where(bad, np.nan, beta), np.where(bad, np.nan, t1)
+
+
+def _fit_gpd_bounded(y: np.ndarray, n_u: np.ndarray, iters: int = 80) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    profile-likelihood fits by golden-section search over theta, all rows at once
+
+    slower to converge than the secant but needs no derivative, so it also
+    settles rows whose minimum sits against the support boundary
+    """
+    y_mean = y.sum(axis=1) / n_u
+    a = -(1 - 1e-9) / y.max(axis=1)
+    b = 1e3 / y_mean
+    g = (np.sqrt(5) - 1) / 2
+
+    def objective(t: np.ndarray) -> np.ndarray:
+        xi = np.log1p(t[:, None] * y).sum(axis=1) / n_u
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(t == 0, np.log(y_mean), np.log(xi / t) + xi)
+
+    c, d = b - g * (b - a), a + g * (b - a)
+    fc, fd = objective(c), objective(d)
+    for _ in range(iters):
+        left = fc < fd # minimum in [a, d]
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        c, d = np.where(left, b - g * (b - a), d), np.where(left, c, a + g * (b - a))
+        f_new = objective(np.where(left, c, d))
+        fc, fd = np.where(left, f_new, fd), np.where(left, fc, f_new)
+
+    t = (a + b) / 2
+    xi = np.log1p(t[:, None] * y).sum(axis=1) / n_u
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = np.where(t == 0, y_mean, xi / t)
+    return xi, beta, t
+
+
+def _restrict_shape(xi, beta, theta, y_max):
+    """
+    keeps xi >= -1: below it the GPD likelihood is unbounded (beta -> |xi| y_max)
+    and no MLE exists. The stationary fit is compared with the xi = -1 endpoint
+    (uniform on [0, y_max], mean NLL log y_max) and the better one is kept
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nll = np.log(beta) + xi + 1 # mean NLL at a stationary point of the profile
+    endpoint = np.isfinite(xi) & ((xi < -1) | (np.log(y_max) < nll))
+    return (
+        np.where(endpoint, -1.0, xi),
+        np.where(endpoint, y_max, beta),
+        np.where(endpoint, -1.0 / y_max, theta),
+    )
+
+
+def _moments_theta(y: np.ndarray, n_u: np.ndarray) -> np.ndarray:
+    """method-of-moments theta = xi / beta, the starting point of the first threshold"""
+    m = y.sum(axis=1) / n_u
+    v = np.maximum((y ** 2).sum(axis=1) / n_u - m ** 2, 1e-300)
+    xi = 0.5 * (1 - m ** 2 / v)
+    beta = 0.5 * m * (1 + m ** 2 / v)
+    return xi / beta
+
+
+def fit_gpd(exceedances: np.ndarray) -> tuple[float, float]:
+    """
+    GPD (xi, beta) of one set of exceedances: scipy's MLE with loc fixed at 0,
+    under the same xi >= -1 restriction as threshold_sweep
+
+    scipy.stats.genpareto.fit has no MLE to find below xi = -1 and stops
+    wherever its optimiser does; the fit is then replaced by the uniform
+    endpoint xi = -1, beta = max exceedance whenever that has the lower mean
+    NLL (log max). models.var_evt_pot uses this, so every EVT path agrees.
+
+    parameters
+        exceedances: np.ndarray
+            positive exceedances over the threshold
+
+    returns
+        (xi, beta)
+    """
+    from scipy.stats import genpareto
+
+    y = np.asarray(exceedances, dtype=float)
+    xi, _, beta = genpareto.fit(y, floc=0)
+    y_max = float(y.max())
+    if xi < -1 or np.log(y_max) < -np.mean(genpareto.logpdf(y, xi, 0, beta)):
+        return -1.0, y_max
+    return float(xi), float(beta)
+
+
+def pot_var(u, xi, beta, n_u, window: int, alpha: float) -> np.ndarray:
+    """
+    POT VaR u + beta / xi (p^-xi - 1), p = (1 - alpha) window / n_u, from fitted
+    GPD parameters (arrays broadcast together)
+
+    NaN where fewer than 10 exceedances were fitted or p is outside (0, 1),
+    matching models.var_evt_pot. The fit does not depend on alpha, so a new
+    confidence level only needs this formula on the stored fits.
+    """
+    u, xi, beta, n_u = (np.asarray(a, dtype=float) for a in (u, xi, beta, n_u))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_exceed = (1 - alpha) * window / n_u
+        log_p = np.log(p_exceed)
+        general = u + beta * np.expm1(-xi * log_p) / xi
+        var = np.where(xi == 0, u - beta * log_p, general)
+    valid = (n_u >= _MIN_EXCEEDANCES) & (p_exceed > 0) & (p_exceed < 1) & np.isfinite(xi)
+    return np.where(valid, var, np.nan)
+
+
+def threshold_sweep(
+    r: pd.Series,
+    window: int = 250,
+    alpha: float = 0.99,
+    thresholds: np.ndarray | list[float] | None = None,
+) -> dict:
+    """
+    rolling POT-GPD VaR for a whole grid of threshold quantiles in one pass
+
+    the VaR for date t uses the window r[t - window : t], as in
+    dashboard.rolling_evt_var; a threshold leaving fewer than 10 exceedances
+    in a window, or with threshold >= alpha, gives NaN there
+
+    parameters
+        r: pd.Series
+            return series
+        window: int
+            rolling window length
+        alpha: float
+            VaR confidence level
+        thresholds: array-like | None
+            threshold quantiles of the window losses, defaults to
+            DEFAULT_THRESHOLDS (0.85 ... 0.98)
+
+    returns
+        dict of dates x thresholds DataFrames
+            var: POT VaR
+            xi, beta: GPD shape and scale
+            u: threshold level (loss units)
+            n_u: exceedance count
+            mean_excess: mean exceedance above u (the mean-excess function
+                         e(u), roughly linear in u where the GPD fits)
+    """
+    thresholds = np.sort(np.asarray(DEFAULT_THRESHOLDS if thresholds is None else thresholds, dtype=float))
+    r = r.dropna()
+    losses = -r.to_numpy(dtype=float)
+    if len(losses) <= window:
+        raise ValueError(f"Need more than window={window} observations, got {len(losses)}.")
+
+    views = np.lib.stride_tricks.sliding_window_view(losses[:-1], window) # window j -> VaR at j + window
+    n_rows = len(views)
+    shape = (n_rows, len(thresholds))
+    out = {k: np.full(shape, np.nan) for k in ("var", "xi", "beta", "u", "n_u", "mean_excess")}
+
+    step = max(1, 2_000_000 // window)
+    for a in range(0, n_rows, step):
+        s = np.sort(views[a : a + step], axis=1) # the only sort each window gets
+        theta_prev = None
+        for k, q in enumerate(thresholds):
+            h = (window - 1) * q
+            lo = int(np.floor(h))
+            hi = min(lo + 1, window - 1)
+            u = s[:, lo] + (h - lo) * (s[:, hi] - s[:, lo]) # np.quantile's linear rule
+            n_u = (s[:, lo:] > u[:, None]).sum(axis=1) # everything above u sits right of lo
+            k_max = max(int(n_u.max()), 1)
+            y = np.clip(s[:, window - k_max :] - u[:, None], 0.0, None) # exceedances, zero-padded
+
+            ok = n_u >= _MIN_EXCEEDANCES
+            n_safe = np.maximum(n_u, 1)
+            theta0 = _moments_theta(y, n_safe) if theta_prev is None else np.where(
+                np.isfinite(theta_prev), theta_prev, _moments_theta(y, n_safe)
+            )
+            xi, beta, theta = _fit_gpd_rows(y, n_safe, theta0)
+
+            # rows the secant cannot settle, typically an MLE hugging the support
+            # boundary (xi well below 0): bounded search instead
+            retry = ok & ~np.isfinite(xi)
+            if retry.any():
+                xi[retry], beta[retry], theta[retry] = _fit_gpd_bounded(y[retry], n_safe[retry])
+
+            xi, beta, theta = _restrict_shape(xi, beta, theta, y.max(axis=1))
+
+            var = pot_var(u, xi, beta, n_u, window, alpha)
+
+            blk = slice(a, a + len(s))
+            out["var"][blk, k] = var
+            out["xi"][blk, k] = np.where(ok, xi, np.nan)
+            out["beta"][blk, k] = np.where(ok, beta, np.nan)
+            out["u"][blk, k] = u
+            out["n_u"][blk, k] = n_u
+            out["mean_excess"][blk, k] = np.where(n_u > 0, y.sum(axis=1) / n_safe, np.nan)
+            theta_prev = theta
+
+    index = r.index[window:]
+    cols = pd.Index(thresholds, name="threshold_q")
+    return {k: pd.DataFrame(v, index=index, columns=cols) for k, v in out.items()}
+
+
+def mean_excess(losses: pd.Series | np.ndarray, thresholds: np.ndarray | list[float] | None = None) -> pd.DataFrame:
+    """
+    empirical mean-excess function e(u) = E[L - u | L > u] on one sample
+
+    parameters
+        losses: pd.Series | np.ndarray
+            losses (-returns)
+        thresholds: array-like | None
+            threshold quantiles, defaults to 0.80 ... 0.99 in 0.005 steps
+
+    returns
+        pd.DataFrame
+            indexed by threshold quantile: u, n_u, mean_excess and its
+            standard error
+    """
+    x = np.sort(np.asarray(pd.Series(losses).dropna(), dtype=float))
+    q = np.asarray(np.arange(0.80, 0.9901, 0.005) if thresholds is None else thresholds, dtype=float)
+    u = np.quantile(x, q)
+    rows = []
+    for ui in u:
+        exc = x[np.searchsorted(x, ui, side="right") :] - ui
+        n = len(exc)
+        rows.append({
+            "u":           float(ui),
+            "n_u":         n,
+            "mean_excess": float(exc.mean()) if n else np.nan,
+            "se":          float(exc.std(ddof=1) / np.sqrt(n)) if n > 1 else np.nan,
+        })
+    return pd.DataFrame(rows, index=pd.Index(np.round(q, 4), name="threshold_q"))
@@ -0,0 +1,634 @@
+"""
+Pluggable execution layer for rolling and batch computations.
+
+    from varlab.executor import get_executor, shared
+
+    def _windows(lo, hi, alpha):                  # module level, so workers can import it
+        rets = shared("rets")                     # attached once per worker, not per task
+        ...
+
+    with get_executor("process", workers=8, shared={"rets": rets}) as ex:
+        parts = ex.map_ranges(_windows, n_windows, alpha=0.99) # contiguous chunks, in order
+        print(ex.timings())                                     # one row per task
+
+Backends
+--------
+  serial    every task runs inline at submit (debugging, workers=1)
+  thread    ThreadPoolExecutor; worthwhile when the work is NumPy / BLAS
+            calls that release the GIL
+  process   ProcessPoolExecutor. Shared arrays / frames are copied once into
+            multiprocessing.shared_memory and every worker process attaches
+            to them; tasks carry only their own arguments
+  cluster   a TCP task hub (multiprocessing.managers) that worker processes
+            on any host connect to with `varlab worker HOST:PORT`. Shared
+            data is pickled once per worker when it connects. `workers`
+            local workers are started as well (0 for remote-only), so the
+            backend runs, and is tested, on a single machine
+
+The backend is the `backend` argument if given, otherwise $VARLAB_EXECUTOR,
+otherwise "process". For the cluster backend $VARLAB_CLUSTER_ADDRESS
+("host:port" to listen on, default 127.0.0.1 on a free port) and
+$VARLAB_AUTHKEY (shared secret, random when unset) apply.
+
+Every backend is a concurrent.futures.Executor: submit, map (chunksize
+batches items into one task on every backend), shutdown and `with` behave
+as usual. On top of that:
+
+  map_ranges(fn, n, ...)   fn(lo, hi, ...) over contiguous [lo, hi) chunks of
+                           range(n), results in order; workers * 4 chunks
+                           by default, so windows stay contiguous and the
+                           pool still balances uneven chunks
+  timings()                per-task worker, run time and submit-to-result
+                           time as a DataFrame
+
+Tasks are module-level functions with picklable arguments, as for any
+process pool. On the cluster backend tasks are pickled at submit and
+unpickled by the worker, so both ends need varlab (and the task's module)
+importable. When a local worker dies its running tasks fail with
+RuntimeError; a remote worker lost mid-task is not detected, its tasks
+are not retried.
+"""
+
+import os
+import pickle
+import queue
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing.managers import BaseManager
+
+import numpy as np
+import pandas as pd
+
+BACKENDS = ("serial", "thread", "process", "cluster")
+
+_HOST = socket.gethostname()
+
+# ── per-process shared data ──────────────────────────────────────────────────
+# filled in-process (serial / thread), by the pool initializer (process) or
+# when a worker connects to the hub (cluster)
+
+_SHARED: dict = {}
+_SEGMENTS: list = [] # attached shared-memory segments, kept alive with their arrays
+
+
+def shared(name: str):
+    """
+    the object registered under `name` by the executor running this task
+
+    parameters
+        name: str
+            key of the executor's `shared` dict
+
+    returns
+        np.ndarray | pd.DataFrame | pd.Series | object
+            arrays and frames are read-only views on process backends
+    """
+    try:
+        return _SHARED[name]
+    except KeyError:
+        raise KeyError(f"No shared object '{name}' in this worker; pass it in get_executor(shared=...).") from None
+
+
+def default_backend() -> str:
+    """backend used when get_executor is called without backend=..."""
+    env = os.environ.get("VARLAB_EXECUTOR", "").strip().lower()
+    if env and env not in BACKENDS:
+        raise ValueError(f"VARLAB_EXECUTOR must be one of {BACKENDS}, got '{env}'.")
+    return env or "process"
+
+
+def chunk_bounds(n: int, n_chunks: int) -> list[tuple[int, int]]:
+    """[lo, hi) bounds of n_chunks contiguous, near-equal chunks of range(n)"""
+    n_chunks = max(1, min(int(n_chunks), n))
+    edges = [n * k // n_chunks for k in range(n_chunks + 1)]
+    return [(lo, hi) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+# ── task wrapper: runs in the worker ─────────────────────────────────────────
+
+def _call(fn, args: tuple, kwargs: dict) -> tuple:
+    """runs one task; returns (ok, result or exception, timing) and never raises"""
+    t0 = time.perf_counter()
+    try:
+        out, ok = fn(*args, **kwargs), True
+    except Exception as e:
+        e.add_note(f"\nworker traceback:\n{traceback.format_exc()}")
+        out, ok = e, False
+    timing = {
+        "worker":  f"{_HOST}:{os.getpid()}/{threading.current_thread().name}",
+        "seconds": time.perf_counter() - t0,
+    }
+    return ok, out, timing
+
+
+def _run_batch(fn, items: list) -> list:
+    return [fn(*args) for args in items]
+
+
+# ── common front end ─────────────────────────────────────────────────────────
+
+class _Backend(Executor):
+    """submit / map / map_ranges / timings on top of a backend's _submit_call"""
+
+    backend = ""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._timings: list[dict] = []
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _submit_call(self, fn, args: tuple, kwargs: dict) -> Future:
+        """future of _call(fn, args, kwargs), run by the backend"""
+        raise NotImplementedError
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._lock:
+            task, self._next = self._next, self._next + 1
+        queued = time.perf_counter()
+        outer = Future()
+
+        def _done(inner: Future) -> None:
+            try:
+                ok, value, timing = inner.result()
+            except BaseException as e: # the backend itself failed (broken pool, lost hub)
+                outer.set_exception(e)
+                return
+            timing.update(task=task, fn=getattr(fn, "__name__", repr(fn)),
+                          wall=time.perf_counter() - queued)
+            with self._lock:
+                self._timings.append(timing)
+            if ok:
+                outer.set_result(value)
+            else:
+                outer.set_exception(value)
+
+        self._submit_call(fn, args, kwargs).add_done_callback(_done)
+        return outer
+
+    def map(self, fn, *iterables, timeout=None, chunksize: int = 1):
+        items = list(zip(*iterables))
+        if chunksize <= 1:
+            futures = [self.submit(fn, *args) for args in items]
+        else:
+            futures = [self.submit(_run_batch, fn, items[i : i + chunksize])
+                       for i in range(0, len(items), chunksize)]
+
+        def _results():
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for f in futures:
+                res = f.result(None if deadline is None else max(deadline - time.monotonic(), 0))
+                yield from (res if chunksize > 1 else (res,))
+
+        return _results()
+
+    def default_chunks(self, n: int) -> int:
+        """chunk count for n items: a few per worker so uneven chunks still balance"""
+        return 1 if self.workers <= 1 else min(n, self.workers * 4)
+
+    def map_ranges(self, fn, n: int, *args, chunks: int | None = None, **kwargs) -> list:
+        """
+        runs fn(lo, hi, *args, **kwargs) over contiguous chunks of range(n)
+
+        parameters
+            fn: callable
+                module-level task taking the chunk bounds first
+            n: int
+                number of items (windows, dates, portfolios ...)
+            chunks: int | None
+                number of chunks, defaults to default_chunks(n)
+
+        returns
+            list
+                one result per chunk, in range order
+        """
+        bounds = chunk_bounds(n, chunks or self.default_chunks(n))
+        futures = [self.submit(fn, lo, hi, *args, **kwargs) for lo, hi in bounds]
+        return [f.result() for f in futures]
+
+    def timings(self) -> pd.DataFrame:
+        """
+        one row per finished task: task (submit order), fn, worker
+        (host:pid/thread), seconds (run time in the worker) and wall (submit
+        to result, including queueing and transfer)
+        """
+        with self._lock:
+            rows = list(self._timings)
+        cols = ["task", "fn", "worker", "seconds", "wall"]
+        return pd.DataFrame(rows, columns=cols).sort_values("task").reset_index(drop=True)
+
+
+def _install_local(shared_objs: dict | None) -> dict:
+    """registers shared objects in this process, returns what they replaced"""
+    previous = {k: _SHARED[k] for k in (shared_objs or {}) if k in _SHARED}
+    _SHARED.update(shared_objs or {})
+    return previous
+
+
+def _restore_local(shared_objs: dict | None, previous: dict) -> None:
+    for k in shared_objs or {}:
+        _SHARED.pop(k, None)
+    _SHARED.update(previous)
+
+
+class SerialExecutor(_Backend):
+    """runs each task inline at submit; shared objects are used as they are"""
+
+    backend = "serial"
+
+    def __init__(self, shared: dict | None = None, initializer=None, initargs: tuple = ()):
+        super().__init__(1)
+        self._shared = shared
+        self._previous = _install_local(shared)
+        if initializer is not None:
+            initializer(*initargs)
+
+    def _submit_call(self, fn, args, kwargs) -> Future:
+        f = Future()
+        f.set_result(_call(fn, args, kwargs))
+        return f
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if self._shared is not None:
+            _restore_local(self._shared, self._previous)
+            self._shared = None
+
+
+class ThreadExecutor(_Backend):
+    """thread pool in this process; shared objects are used as they are"""
+
+    backend = "thread"
+
+    def __init__(self, workers: int | None = None, shared: dict | None = None,
+                 initializer=None, initargs: tuple = ()):
+        super().__init__(workers or os.cpu_count() or 1)
+        self._shared = shared
+        self._previous = _install_local(shared)
+        self._pool = ThreadPoolExecutor(self.workers, initializer=initializer, initargs=initargs)
+
+    def _submit_call(self, fn, args, kwargs) -> Future:
+        return self._pool.submit(_call, fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if self._shared is not None:
+            _restore_local(self._shared, self._previous)
+            self._shared = None
+
+
+# ── process backend: shared memory ───────────────────────────────────────────
+
+def _pack(objs: dict) -> tuple[dict, list]:
+    """
+    copies arrays, Series and numeric DataFrames into shared-memory segments
+
+    returns (specs, segments): specs rebuild the objects in a worker, other
+    objects are passed through as they are (pickled once per worker)
+    """
+    specs, segments = {}, []
+    for name, obj in objs.items():
+        if isinstance(obj, pd.DataFrame):
+            values, meta = obj.to_numpy(), ("frame", obj.index, obj.columns)
+        elif isinstance(obj, pd.Series):
+            values, meta = obj.to_numpy(), ("series", obj.index, obj.name)
+        elif isinstance(obj, np.ndarray):
+            values, meta = obj, ("array",)
+        else:
+            specs[name] = ("object", obj)
+            continue
+        if values.dtype.hasobject: # mixed / object columns cannot live in a raw buffer
+            specs[name] = ("object", obj)
+            continue
+        # keep the memory order (a DataFrame's values are usually column-major):
+        # a different layout can change BLAS / reduction rounding in the workers
+        order = "F" if values.flags.f_contiguous and not values.flags.c_contiguous else "C"
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        segments.append(shm)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, order=order)[...] = values
+        specs[name] = ("shm", shm.name, values.shape, values.dtype.str, order, meta)
+    return specs, segments
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # Python >= 3.13
+    except TypeError:
+        # older Pythons register the segment again, but with the parent's resource
+        # tracker (a set), so the parent's unlink still releases it exactly once
+        return shared_memory.SharedMemory(name=name)
+
+
+def _unpack(specs: dict) -> dict:
+    out = {}
+    for name, spec in specs.items():
+        if spec[0] == "object":
+            out[name] = spec[1]
+            continue
+        _, shm_name, shape, dtype, order, meta = spec
+        shm = _attach(shm_name)
+        _SEGMENTS.append(shm)
+        values = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order=order)
+        values.flags.writeable = False # one copy serves every worker: no writes
+        if meta[0] == "frame":
+            out[name] = pd.DataFrame(values, index=meta[1], columns=meta[2], copy=False)
+        elif meta[0] == "series":
+            out[name] = pd.Series(values, index=meta[1], name=meta[2], copy=False)
+        else:
+            out[name] = values
+    return out
+
+
+def _init_process(specs: dict, initializer, initargs: tuple) -> None:
+    _SHARED.update(_unpack(specs))
+    if initializer is not None:
+        initializer(*initargs)
+
+
+class ProcessExecutor(_Backend):
+    """process pool whose workers see the shared objects through shared memory"""
+
+    backend = "process"
+
+    def __init__(self, workers: int | None = None, shared: dict | None = None,
+                 initializer=None, initargs: tuple = (), mp_context=None):
+        super().__init__(workers or os.cpu_count() or 1)
+        specs, self._segments = _pack(shared or {})
+        try:
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=mp_context,
+                initializer=_init_process, initargs=(specs, initializer, initargs),
+            )
+        except BaseException:
+            self._release()
+            raise
+
+    def _submit_call(self, fn, args, kwargs) -> Future:
+        return self._pool.submit(_call, fn, args, kwargs)
+
+    def _release(self) -> None:
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self._release()
+
+
+# ── cluster backend: TCP task hub ────────────────────────────────────────────
+
+class _Hub:
+    """task queue served to worker processes; lives in the submitting process"""
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+        self._tasks: queue.Queue = queue.Queue()
+        self._futures: dict[int, Future] = {}
+        self._taken: dict[int, str] = {} # task -> worker running it
+        self._workers: set[str] = set()
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._closed = threading.Event()
+
+    # called by the executor
+    def put(self, fn, args: tuple, kwargs: dict) -> Future:
+        blob = pickle.dumps((fn, args, kwargs)) # unpicklable tasks fail here, at submit
+        f = Future()
+        with self._lock:
+            tid, self._ids = self._ids, self._ids + 1
+            self._futures[tid] = f
+        self._tasks.put((tid, blob))
+        return f
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def workers(self) -> set[str]:
+        with self._lock:
+            return set(self._workers)
+
+    def fail(self, worker: str | None, reason: str) -> None:
+        """fails the tasks a lost worker was running (every unfinished task for None)"""
+        if worker is None: # nobody left to run queued tasks either
+            while True:
+                try:
+                    self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+        with self._lock:
+            tids = [t for t in self._futures if worker is None or self._taken.get(t) == worker]
+            futures = [self._futures.pop(t) for t in tids]
+            for t in tids:
+                self._taken.pop(t, None)
+        for f in futures:
+            f.set_exception(RuntimeError(reason))
+
+    def close(self) -> None:
+        self._closed.set()
+
+    # called by workers, through the manager
+    def attach(self, worker: str) -> bytes:
+        with self._lock:
+            self._workers.add(worker)
+        return self._payload
+
+    def next_task(self, worker: str, timeout: float) -> tuple | None:
+        try:
+            tid, blob = self._tasks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._taken[tid] = worker
+        return tid, blob
+
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def done(self, tid: int, result: tuple) -> None:
+        with self._lock:
+            f = self._futures.pop(tid, None)
+            self._taken.pop(tid, None)
+        if f is not None:
+            f.set_result(result)
+
+
+class _HubClient(BaseManager):
+    pass
+
+
+_HubClient.register("hub")
+
+
+def _parse_address(address) -> tuple[str, int]:
+    if isinstance(address, str):
+        host, _, port = address.rpartition(":")
+        return host or "127.0.0.1", int(port)
+    return tuple(address)
+
+
+def run_worker(address, authkey: bytes | str, poll: float = 1.0) -> int:
+    """
+    worker loop for the cluster backend: connects to a hub, pulls tasks until
+    the hub closes (or goes away) and returns the number of tasks run
+
+    parameters
+        address: str | tuple
+            hub address, "host:port" or (host, port)
+        authkey: bytes | str
+            the hub's shared secret
+        poll: float
+            seconds to wait for a task before checking for shutdown
+    """
+    authkey = authkey.encode() if isinstance(authkey, str) else authkey
+    client = _HubClient(address=_parse_address(address), authkey=authkey)
+    client.connect()
+    hub = client.hub()
+    worker = f"{_HOST}:{os.getpid()}"
+    shared_objs, initializer, initargs = pickle.loads(hub.attach(worker))
+    _SHARED.update(shared_objs)
+    if initializer is not None:
+        initializer(*initargs)
+
+    n = 0
+    try:
+        while True:
+            task = hub.next_task(worker, poll)
+            if task is None:
+                if hub.closed():
+                    break
+                continue
+            tid, blob = task
+            try:
+                fn, args, kwargs = pickle.loads(blob)
+            except Exception as e: # e.g. the task's module is not importable on this host
+                result = (False, RuntimeError(f"task {tid} could not be loaded on {worker}: {e!r}"),
+                          {"worker": worker, "seconds": 0.0})
+            else:
+                result = _call(fn, args, kwargs)
+            try:
+                hub.done(tid, result)
+            except (EOFError, ConnectionError):
+                raise
+            except Exception as e: # result could not be pickled back
+                hub.done(tid, (False, RuntimeError(f"task {tid}: result not transferable: {e!r}"), result[2]))
+            n += 1
+    except (EOFError, ConnectionError): # hub shut down under us
+        pass
+    return n
+
+
+class ClusterExecutor(_Backend):
+    """
+    task hub on a TCP address; local and remote `varlab worker` processes pull
+    from it. `address` / `authkey` are what remote workers connect with
+    """
+
+    backend = "cluster"
+
+    def __init__(self, workers: int | None = None, shared: dict | None = None,
+                 initializer=None, initargs: tuple = (),
+                 address=None, authkey: bytes | str | None = None):
+        local = (os.cpu_count() or 1) if workers is None else workers
+        super().__init__(max(local, 1))
+        address = address or os.environ.get("VARLAB_CLUSTER_ADDRESS") or ("127.0.0.1", 0)
+        authkey = authkey or os.environ.get("VARLAB_AUTHKEY") or secrets.token_hex(16)
+        self.authkey = authkey.encode() if isinstance(authkey, str) else authkey
+
+        self._hub = _Hub(pickle.dumps((dict(shared or {}), initializer, initargs)))
+        manager = type("_HubServer", (BaseManager,), {})
+        manager.register("hub", callable=lambda: self._hub)
+        self._server = manager(address=_parse_address(address), authkey=self.authkey).get_server()
+        self.address = self._server.address
+        threading.Thread(target=self._server.serve_forever, name="varlab-hub", daemon=True).start()
+
+        # local workers are started exactly like remote ones (`varlab worker`),
+        # with this interpreter's import path so they can load the same tasks
+        env = {**os.environ, "VARLAB_AUTHKEY": self.authkey.decode(),
+               "PYTHONPATH": os.pathsep.join(p or os.getcwd() for p in sys.path)}
+        cmd = [sys.executable, "-m", "varlab.cli", "worker", "{}:{}".format(*self.address)]
+        self._procs = [subprocess.Popen(cmd, env=env) for _ in range(local)]
+        self._watchdog = threading.Thread(target=self._watch, name="varlab-hub-watch", daemon=True)
+        self._watchdog.start()
+
+    def _watch(self) -> None:
+        """fails the tasks of local workers that die, and everything once none are left"""
+        lost = set()
+        while not self._hub.closed():
+            for p in self._procs:
+                if p.pid not in lost and p.poll() is not None:
+                    lost.add(p.pid)
+                    self._hub.fail(f"{_HOST}:{p.pid}", f"worker {_HOST}:{p.pid} exited with code {p.returncode}")
+            remote = self._hub.workers() - {f"{_HOST}:{p.pid}" for p in self._procs}
+            if self._procs and len(lost) == len(self._procs) and not remote:
+                self._hub.fail(None, "all cluster workers exited")
+            time.sleep(0.2)
+
+    def _submit_call(self, fn, args, kwargs) -> Future:
+        return self._hub.put(fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            self._hub.fail(None, "cancelled by shutdown")
+        while wait and self._hub.pending():
+            time.sleep(0.01)
+        self._hub.close()
+        for p in self._procs:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.terminate()
+        self._server.stop_event.set()
+        self._server.listener.close()
+
+
+def get_executor(
+    backend: str | None = None,
+    workers: int | None = None,
+    shared: dict | None = None,
+    initializer=None,
+    initargs: tuple = (),
+    **options,
+) -> _Backend:
+    """
+    executor for one of BACKENDS
+
+    parameters
+        backend: str | None
+            'serial', 'thread', 'process' or 'cluster'; defaults to
+            default_backend()
+        workers: int | None
+            thread / process count, local worker processes for 'cluster';
+            defaults to os.cpu_count(). workers=1 on the thread or process
+            backend runs serially in-process
+        shared: dict | None
+            name -> array / DataFrame / Series / picklable object, made
+            available to tasks through shared(name)
+        initializer, initargs
+            run once in every worker after the shared objects are attached
+        options
+            backend-specific: mp_context (process), address and authkey
+            (cluster)
+
+    returns
+        executor
+            a concurrent.futures.Executor with map_ranges and timings
+    """
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown executor backend '{backend}'. Use one of {BACKENDS}.")
+    if backend == "serial" or (workers == 1 and backend in ("thread", "process")):
+        return SerialExecutor(shared, initializer, initargs)
+    if backend == "thread":
+        return ThreadExecutor(workers, shared, initializer, initargs)
+    if backend == "process":
+        return ProcessExecutor(workers, shared, initializer, initargs, **options)
+    return ClusterExecutor(workers, shared, initializer, initargs, **options)
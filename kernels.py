@@ -0,0 +1,852 @@
+"""
+Compute kernels for the rolling loops, with an optional Numba backend.
+
+Every kernel has two implementations with identical outputs:
+
+    numpy   vectorised NumPy / SciPy, always available
+    numba   compiled loops (incremental window updates), used when numba
+            is installed
+
+The backend is picked once per call: the `backend` argument if given,
+otherwise $VARLAB_KERNELS ("numpy" / "numba"), otherwise numba when it is
+importable. numba itself is only imported (and each loop compiled) the first
+time a numba kernel runs, so importing this module stays cheap. Compiled
+loops are cached on disk, but the numba import itself still costs a few
+hundred milliseconds per process; VARLAB_KERNELS=numpy avoids it for short
+interactive runs.
+
+Kernels
+-------
+  rolling_mean_cov     rolling mean vectors and covariance matrices (MC VaR)
+  rolling_moments      rolling mean / variance / skewness / excess kurtosis
+  pot_exceedances      rolling POT threshold and sorted exceedances (EVT VaR)
+  rolling_brw          age-weighted (BRW) historical VaR / ES
+  garch11_filter       GARCH(1,1) conditional variance recursion
+  garch11_neg_loglik   Gaussian GARCH(1,1) negative log-likelihood
+  fit_garch11          GARCH(1,1) MLE on top of the likelihood kernel
+  ewma_variance        RiskMetrics EWMA variance (GARCH filter with omega = 0)
+  ewma_covariance      RiskMetrics EWMA covariance matrices
+"""
+
+import importlib.util
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKENDS = ("numpy", "numba")
+
+
+def default_backend() -> str:
+    """backend used when a kernel is called without backend=..."""
+    env = os.environ.get("VARLAB_KERNELS", "").strip().lower()
+    if env:
+        if env not in BACKENDS:
+            raise ValueError(f"VARLAB_KERNELS must be one of {BACKENDS}, got '{env}'.")
+        return env
+    return "numba" if importlib.util.find_spec("numba") is not None else "numpy"
+
+
+def _resolve(backend: str | None) -> str:
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend '{backend}'. Use one of {BACKENDS}.")
+    if backend == "numba" and importlib.util.find_spec("numba") is None:
+        raise ImportError("backend='numba' requested but numba is not installed.")
+    return backend
+
+
+_JITTED: dict = {}
+
+
+def _jit(fn):
+    """
+    compiles fn with numba on first use and memoises the dispatcher
+
+    the on-disk cache is keyed by module name, so it is only used when this file
+    is loaded as varlab.kernels; entries written under any other name (a bare
+    `import kernels`) would make every varlab.kernels caller fail to load them
+    """
+    if fn not in _JITTED:
+        import numba
+
+        _JITTED[fn] = numba.njit(cache=__name__ == "varlab.kernels")(fn)
+    return _JITTED[fn]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rolling mean / covariance
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _mean_cov_loop(xc, window, mu_out, cov_out):
+    t_len, n = xc.shape
+    s1 = np.zeros(n)
+    s2 = np.zeros((n, n))
+    for t in range(t_len):
+        for a in range(n):
+            s1[a] += xc[t, a]
+            for b in range(n):
+                s2[a, b] += xc[t, a] * xc[t, b]
+        if t >= window:
+            for a in range(n):
+                s1[a] -= xc[t - window, a]
+                for b in range(n):
+                    s2[a, b] -= xc[t - window, a] * xc[t - window, b]
+        if t >= window - 1:
+            j = t - window + 1
+            for a in range(n):
+                mu_out[j, a] = s1[a] / window
+                for b in range(n):
+                    cov_out[j, a, b] = (s2[a, b] - s1[a] * s1[b] / window) / (window - 1)
+
+
+def rolling_mean_cov(
+    x: np.ndarray | pd.DataFrame,
+    window: int,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    mean vector and sample covariance (ddof=1) of every trailing window
+
+    row j covers x[j : j + window], so row i - window matches the window
+    returns.iloc[i - window : i] used for the VaR at date i.
+
+    parameters
+        x: np.ndarray | pd.DataFrame
+            T x N returns
+        window: int
+            window length
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        (mu, cov)
+            (T - window + 1, N) and (T - window + 1, N, N) arrays
+    """
+    x = np.asarray(x, dtype=float)
+    t_len, n = x.shape
+    if window < 2 or window > t_len:
+        raise ValueError(f"window must be in [2, {t_len}], got {window}.")
+
+    # centre on the full-sample mean so the running sums do not cancel badly
+    c = x.mean(axis=0)
+    xc = x - c
+
+    if _resolve(backend) == "numba":
+        mu = np.empty((t_len - window + 1, n))
+        cov = np.empty((t_len - window + 1, n, n))
+        _jit(_mean_cov_loop)(xc, window, mu, cov)
+    else:
+        c1 = np.concatenate([np.zeros((1, n)), np.cumsum(xc, axis=0)])
+        c2 = np.concatenate([
+            np.zeros((1, n, n)),
+            np.cumsum(xc[:, :, None] * xc[:, None, :], axis=0),
+        ])
+        s1 = c1[window:] - c1[:-window]
+        s2 = c2[window:] - c2[:-window]
+        mu = s1 / window
+        cov = (s2 - s1[:, :, None] * s1[:, None, :] / window) / (window - 1)
+
+    return mu + c, cov
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rolling higher moments
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _power_sums_loop(xc, window, out):
+    t_len, k = xc.shape
+    for col in range(k):
+        s1 = 0.0
+        s2 = 0.0
+        s3 = 0.0
+        s4 = 0.0
+        for t in range(t_len):
+            v = xc[t, col]
+            v2 = v * v
+            s1 += v
+            s2 += v2
+            s3 += v2 * v
+            s4 += v2 * v2
+            if t >= window:
+                o = xc[t - window, col]
+                o2 = o * o
+                s1 -= o
+                s2 -= o2
+                s3 -= o2 * o
+                s4 -= o2 * o2
+            if t >= window - 1:
+                j = t - window + 1
+                out[j, col, 0] = s1
+                out[j, col, 1] = s2
+                out[j, col, 2] = s3
+                out[j, col, 3] = s4
+
+
+def rolling_power_sums(
+    x: np.ndarray,
+    window: int,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    rolling sums of (x - c)^k for k = 1..4 over every trailing window
+
+    parameters
+        x: np.ndarray
+            (T,) or (T, K) series; K series are processed at once
+        window: int
+            window length
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        (sums, c)
+            sums: (T - window + 1, K, 4) power sums
+            c: (K,) full-sample column means the sums are centred on
+    """
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 1:
+        x = x[:, None]
+    t_len, k = x.shape
+    if window < 2 or window > t_len:
+        raise ValueError(f"window must be in [2, {t_len}], got {window}.")
+
+    c = x.mean(axis=0)
+    xc = x - c
+
+    if _resolve(backend) == "numba":
+        sums = np.empty((t_len - window + 1, k, 4))
+        _jit(_power_sums_loop)(np.ascontiguousarray(xc), window, sums)
+    else:
+        powers = np.stack([xc, xc ** 2, xc ** 3, xc ** 4], axis=-1)
+        cs = np.concatenate([np.zeros((1, k, 4)), np.cumsum(powers, axis=0)])
+        sums = cs[window:] - cs[:-window]
+
+    return sums, c
+
+
+def rolling_moments(
+    x: np.ndarray,
+    window: int,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    rolling mean, sample variance (ddof=1), skewness and excess kurtosis
+
+    skewness and kurtosis are the moment estimators m3 / m2^1.5 and
+    m4 / m2^2 - 3 (population central moments m_k), as in scipy.stats.skew /
+    kurtosis with bias=True.
+
+    parameters
+        x: np.ndarray
+            (T,) or (T, K) series
+        window: int
+            window length
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        (mean, var, skew, kurt)
+            each (T - window + 1, K); row j covers x[j : j + window]
+    """
+    sums, c = rolling_power_sums(x, window, backend=backend)
+    n = float(window)
+    a1, a2, a3, a4 = (sums[..., i] / n for i in range(4)) # raw moments of x - c
+
+    # raw -> central moments (binomial expansion around the window mean a1),
+    # Horner form with products and one sqrt instead of float powers
+    a1sq = a1 * a1
+    m2 = a2 - a1sq
+    m3 = a3 - a1 * (3 * a2 - 2 * a1sq)
+    m4 = a4 - a1 * (4 * a3 - a1 * (6 * a2 - 3 * a1sq))
+    m2 = np.maximum(m2, 0.0) # guard tiny negative round-off
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skew = m3 / (m2 * np.sqrt(m2))
+        kurt = m4 / (m2 * m2) - 3.0
+
+    return a1 + c, m2 * n / (n - 1), skew, kurt
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rolling POT threshold / exceedances
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _pot_loop(losses, window, threshold_q, u_out, nu_out, exc_out):
+    n_rows = u_out.shape[0]
+    buf = np.sort(losses[:window].copy())
+    h = (window - 1) * threshold_q
+    lo = int(np.floor(h))
+    hi = min(lo + 1, window - 1)
+    frac = h - lo
+
+    for j in range(n_rows):
+        u = buf[lo] + frac * (buf[hi] - buf[lo])
+        k = 0
+        while k < window and buf[window - 1 - k] > u:
+            k += 1
+        for m in range(k):
+            exc_out[j, m] = buf[window - k + m] - u
+        u_out[j] = u
+        nu_out[j] = k
+
+        if j + window >= losses.shape[0]:
+            break
+
+        # slide: drop losses[j], insert losses[j + window], keep buf sorted
+        old = losses[j]
+        new = losses[j + window]
+        pos = np.searchsorted(buf, old)
+        if new >= old:
+            while pos + 1 < window and buf[pos + 1] < new:
+                buf[pos] = buf[pos + 1]
+                pos += 1
+        else:
+            while pos > 0 and buf[pos - 1] > new:
+                buf[pos] = buf[pos - 1]
+                pos -= 1
+        buf[pos] = new
+
+
+def pot_exceedances(
+    losses: np.ndarray,
+    window: int,
+    threshold_q: float = 0.95,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Peaks-over-Threshold inputs for every trailing window of losses
+
+    the threshold is np.quantile(window, threshold_q) (linear interpolation)
+    and exceedances are window[window > u] - u, exactly as in var_evt_pot.
+
+    parameters
+        losses: np.ndarray
+            (T,) finite losses (-returns)
+        window: int
+            window length
+        threshold_q: float
+            threshold quantile of the window losses
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        (u, n_u, exc)
+            u: (T - window + 1,) thresholds
+            n_u: (T - window + 1,) exceedance counts
+            exc: (T - window + 1, max(n_u)) ascending exceedances, row j
+                 holds n_u[j] values followed by NaN padding
+    """
+    losses = np.ascontiguousarray(losses, dtype=float)
+    t_len = len(losses)
+    if window < 2 or window > t_len:
+        raise ValueError(f"window must be in [2, {t_len}], got {window}.")
+    n_rows = t_len - window + 1
+
+    if _resolve(backend) == "numba":
+        u = np.empty(n_rows)
+        n_u = np.empty(n_rows, dtype=np.int64)
+        exc = np.full((n_rows, window), np.nan)
+        _jit(_pot_loop)(losses, window, float(threshold_q), u, n_u, exc)
+        return u, n_u, exc[:, : max(int(n_u.max()), 1)]
+
+    s = np.sort(np.lib.stride_tricks.sliding_window_view(losses, window), axis=1)
+    h = (window - 1) * threshold_q
+    lo = int(np.floor(h))
+    hi = min(lo + 1, window - 1)
+    u = s[:, lo] + (h - lo) * (s[:, hi] - s[:, lo])
+
+    n_u = (s > u[:, None]).sum(axis=1)
+    k_max = max(int(n_u.max()), 1)
+
+    # exceedances are the top n_u entries of each sorted row: left-align them
+    tail = s[:, window - k_max :] - u[:, None]
+    cols = np.arange(k_max)[None, :] + (k_max - n_u)[:, None]
+    exc = np.take_along_axis(tail, np.minimum(cols, k_max - 1), axis=1)
+    exc[cols >= k_max] = np.nan
+
+    return u, n_u, exc
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Age-weighted (BRW) historical VaR / ES
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _brw_loop(r, rank, sorted_r, window, tail_p, log_g, rebase_every, var_out, es_out):
+    t_len = r.shape[0]
+    size = t_len + 1
+    fw = np.zeros(size)  # Fenwick tree of weights, indexed by global rank + 1
+    fwr = np.zeros(size) # Fenwick tree of weight * return
+    top = 1
+    while top * 2 < size:
+        top *= 2
+
+    base = 0
+    stored = np.empty(t_len) # weight each observation was inserted with
+    for t in range(t_len):
+        j = t - window + 1 # first observation of the window ending at t
+        if t - base > rebase_every:
+            # lazy rescale: weights are stored as g^(t - base) with g = 1 / lam and
+            # only their ratios matter, so once they approach overflow every live
+            # entry (and the trees, which are linear) is scaled down in one pass
+            scale = np.exp(-(j - 1 - base) * log_g)
+            fw *= scale
+            fwr *= scale
+            for k in range(max(j - 1, 0), t): # live entries plus the one about to leave
+                stored[k] *= scale
+            base = j - 1
+
+        stored[t] = np.exp((t - base) * log_g)
+        # insert r[t], and drop r[j - 1] once the window is full
+        for obs, sign in ((t, 1.0), (j - 1, -1.0)):
+            if obs < 0:
+                continue
+            v = sign * stored[obs]
+            vr = v * r[obs]
+            i = rank[obs] + 1
+            while i < size:
+                fw[i] += v
+                fwr[i] += vr
+                i += i & -i
+        if j < 0:
+            continue
+
+        total = 0.0
+        i = t_len
+        while i > 0:
+            total += fw[i]
+            i -= i & -i
+
+        # descend to the first rank whose cumulative weight reaches tail_p * total
+        pos = 0
+        rem = tail_p * total
+        step = top
+        while step > 0:
+            nxt = pos + step
+            if nxt < size and fw[nxt] < rem:
+                pos = nxt
+                rem -= fw[nxt]
+            step //= 2
+        pos = min(pos, t_len - 1) # 0-based rank of the quantile observation
+
+        # the quantile observation itself enters the tail with its full weight
+        w_q = 0.0
+        wr_q = 0.0
+        i = pos + 1
+        while i > 0:
+            w_q += fw[i]
+            wr_q += fwr[i]
+            i -= i & -i
+        var_out[j] = -sorted_r[pos]
+        es_out[j] = -wr_q / w_q
+
+
+def rolling_brw(
+    r: np.ndarray,
+    window: int,
+    alpha: float = 0.99,
+    lam: float = 0.97,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Boudoukh-Richardson-Whitelaw age-weighted historical VaR and ES for every
+    trailing window
+
+    row j covers r[j : j + window]; the observation of age k (k = 0 newest)
+    gets weight lam^k (1 - lam) / (1 - lam^window), exactly as in
+    models.var_brw / models.cvar_brw.
+
+    numpy sorts every window (O(T w log w), vectorised over blocks of rows). numba keeps all
+    returns ranked once and slides a window over two Fenwick trees indexed by
+    rank (weights and weight * return): each day inserts one observation,
+    removes one and finds the weighted quantile by a tree descent, O(log T).
+    The decay is never applied to the stored weights; new observations enter
+    with growing weight 1 / lam^t instead, and the trees are rescaled in one
+    pass only when those weights approach overflow.
+
+    parameters
+        r: np.ndarray
+            (T,) finite returns
+        window: int
+            window length
+        alpha: float
+            confidence level
+        lam: float
+            decay factor in (0, 1]
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        (var, es)
+            (T - window + 1,) positive VaR and ES
+    """
+    r = np.ascontiguousarray(r, dtype=float)
+    t_len = len(r)
+    if window < 2 or window > t_len:
+        raise ValueError(f"window must be in [2, {t_len}], got {window}.")
+    if not 0 < lam <= 1:
+        raise ValueError(f"lam must be in (0, 1], got {lam}.")
+    log_g = -np.log(lam)
+    if window * log_g > 600:
+        raise ValueError(f"lam={lam} underflows over a {window}-day window; use a larger lam.")
+    n_rows = t_len - window + 1
+    tail_p = 1 - alpha
+
+    if _resolve(backend) == "numba":
+        order = np.argsort(r, kind="stable")
+        rank = np.empty(t_len, dtype=np.int64)
+        rank[order] = np.arange(t_len)
+        var = np.empty(n_rows)
+        es = np.empty(n_rows)
+        # stored weights stay below g^(rebase_every + 1) <= e^650
+        rebase_every = int(650 / log_g) - 1 if log_g > 0 else t_len
+        _jit(_brw_loop)(r, rank, r[order], window, tail_p, log_g, rebase_every, var, es)
+        return var, es
+
+    views = np.lib.stride_tricks.sliding_window_view(r, window)
+    w = lam ** np.arange(window - 1, -1, -1.0) # position i in the window has age window - 1 - i
+    var = np.empty(n_rows)
+    es = np.empty(n_rows)
+    step = max(1, 2_000_000 // window) # rows sorted at once, bounds the (rows, window) temporaries
+    for a in range(0, n_rows, step):
+        order = np.argsort(views[a : a + step], axis=1, kind="stable")
+        vals = np.take_along_axis(views[a : a + step], order, axis=1)
+        cw = np.cumsum(w[order], axis=1)
+        k = (cw >= tail_p * cw[:, -1:]).argmax(axis=1)
+        rows = np.arange(len(order))
+        var[a : a + step] = -vals[rows, k]
+        es[a : a + step] = -np.cumsum(w[order] * vals, axis=1)[rows, k] / cw[rows, k]
+    return var, es
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# GARCH(1,1)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _garch_filter_loop(eps, omega, alpha, beta, sigma2_0, out):
+    out[0] = sigma2_0
+    for t in range(1, out.shape[0]):
+        out[t] = omega + alpha * eps[t - 1] * eps[t - 1] + beta * out[t - 1]
+
+
+def garch11_filter(
+    eps: np.ndarray,
+    omega: float,
+    alpha: float,
+    beta: float,
+    sigma2_0: float | None = None,
+    backend: str | None = None,
+) -> np.ndarray:
+    """
+    GARCH(1,1) conditional variance recursion
+
+        sigma2_t = omega + alpha * eps_{t-1}^2 + beta * sigma2_{t-1}
+
+    parameters
+        eps: np.ndarray
+            (T,) demeaned returns
+        omega, alpha, beta: float
+            GARCH(1,1) parameters
+        sigma2_0: float | None
+            starting variance, defaults to the sample variance of eps
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        np.ndarray
+            (T + 1,) variances; sigma2[t] is the variance of eps[t] given
+            information up to t - 1 and sigma2[T] is the one-step forecast
+    """
+    eps = np.ascontiguousarray(eps, dtype=float)
+    if sigma2_0 is None:
+        sigma2_0 = float(eps.var())
+
+    if _resolve(backend) == "numba":
+        out = np.empty(len(eps) + 1)
+        _jit(_garch_filter_loop)(eps, float(omega), float(alpha), float(beta), float(sigma2_0), out)
+        return out
+
+    # the recursion is a first-order IIR filter of the shocks
+    from scipy.signal import lfilter
+
+    drive = np.empty(len(eps) + 1)
+    drive[0] = sigma2_0
+    drive[1:] = omega + alpha * eps ** 2
+    return lfilter([1.0], [1.0, -beta], drive)
+
+
+def _garch_nll_loop(r, mu, omega, alpha, beta, sigma2_0):
+    s2 = sigma2_0
+    nll = 0.0
+    for t in range(r.shape[0]):
+        e = r[t] - mu
+        nll += 0.5 * (np.log(2.0 * np.pi) + np.log(s2) + e * e / s2)
+        s2 = omega + alpha * e * e + beta * s2
+    return nll
+
+
+def garch11_neg_loglik(
+    params: np.ndarray,
+    r: np.ndarray,
+    sigma2_0: float | None = None,
+    backend: str | None = None,
+) -> float:
+    """
+    Gaussian GARCH(1,1) negative log-likelihood
+
+    parameters
+        params: np.ndarray
+            (mu, omega, alpha, beta)
+        r: np.ndarray
+            (T,) returns
+        sigma2_0: float | None
+            starting variance, defaults to the sample variance of r
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        float
+            negative log-likelihood (inf for non-positive variances)
+    """
+    mu, omega, alpha, beta = (float(p) for p in params)
+    r = np.ascontiguousarray(r, dtype=float)
+    if sigma2_0 is None:
+        sigma2_0 = float(r.var())
+
+    if _resolve(backend) == "numba":
+        nll = _jit(_garch_nll_loop)(r, mu, omega, alpha, beta, float(sigma2_0))
+    else:
+        eps = r - mu
+        s2 = garch11_filter(eps, omega, alpha, beta, sigma2_0, backend="numpy")[:-1]
+        if np.any(s2 <= 0):
+            return float("inf")
+        nll = 0.5 * np.sum(np.log(2.0 * np.pi) + np.log(s2) + eps ** 2 / s2)
+
+    return float(nll) if np.isfinite(nll) else float("inf")
+
+
+def fit_garch11(r: np.ndarray, backend: str | None = None) -> dict:
+    """
+    GARCH(1,1) with normal innovations fitted by MLE (L-BFGS-B)
+
+    works in percentage returns internally, like arch_model(r * 100), and
+    reports parameters for the original return scale.
+
+    parameters
+        r: np.ndarray
+            (T,) returns
+        backend: str | None
+            likelihood kernel backend
+
+    returns
+        dict with mu, omega, alpha, beta, the one-step-ahead variance
+        sigma2_next and the optimiser's success flag
+    """
+    from scipy.optimize import minimize
+
+    x = np.asarray(r, dtype=float) * 100
+    backend = _resolve(backend)
+    var0 = float(x.var())
+
+    def objective(p):
+        if p[2] + p[3] >= 0.9999: # covariance stationarity
+            return 1e10
+        return garch11_neg_loglik(p, x, var0, backend=backend)
+
+    start = np.array([x.mean(), 0.05 * var0, 0.05, 0.90])
+    bounds = [(None, None), (1e-8 * var0, 10 * var0), (0.0, 1.0), (0.0, 1.0)]
+    res = minimize(objective, start, method="L-BFGS-B", bounds=bounds)
+
+    mu, omega, alpha, beta = res.x
+    sigma2 = garch11_filter(x - mu, omega, alpha, beta, var0, backend=backend)
+
+    return {
+        "mu":          mu / 100,
+        "omega":       omega / 100 ** 2,
+        "alpha":       alpha,
+        "beta":        beta,
+        "sigma2_next": float(sigma2[-1]) / 100 ** 2,
+        "success":     bool(res.success),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EWMA (RiskMetrics) variance / covariance
+# ─────────────────────────────────────────────────────────────────────────────
+
+def ewma_variance(
+    r: np.ndarray,
+    lam: float = 0.94,
+    sigma2_0: float | None = None,
+    backend: str | None = None,
+) -> np.ndarray:
+    """
+    RiskMetrics EWMA variance recursion
+
+        sigma2_t = lam * sigma2_{t-1} + (1 - lam) * r_{t-1}^2
+
+    this is garch11_filter with omega = 0, alpha = 1 - lam, beta = lam (an
+    lfilter call on the numpy backend), so a whole history costs one pass
+
+    parameters
+        r: np.ndarray
+            (T,) returns (RiskMetrics assumes a zero mean)
+        lam: float
+            decay factor, 0.94 for daily data
+        sigma2_0: float | None
+            starting variance, defaults to the sample variance of r
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        np.ndarray
+            (T + 1,) variances; sigma2[t] uses returns up to t - 1 and
+            sigma2[T] is the one-step forecast
+    """
+    return garch11_filter(r, 0.0, 1.0 - lam, lam, sigma2_0=sigma2_0, backend=backend)
+
+
+def ewma_update(sigma: np.ndarray | float, r: np.ndarray | float, lam: float = 0.94):
+    """
+    one streaming step of the EWMA recursion: lam * sigma + (1 - lam) r r^T
+
+    sigma is a variance (scalar r) or a covariance matrix (vector r); feed it
+    the forecast saved by the previous run and today's returns to roll the
+    model forward by a day in O(N^2) without touching the history
+    """
+    r = np.asarray(r, dtype=float)
+    return lam * np.asarray(sigma, dtype=float) + (1.0 - lam) * np.multiply.outer(r, r)
+
+
+def _ewma_cov_loop(x, lam, cov_0, out):
+    t_len, n = x.shape
+    out[0] = cov_0
+    for t in range(t_len):
+        for a in range(n):
+            for b in range(a, n):
+                v = lam * out[t, a, b] + (1.0 - lam) * x[t, a] * x[t, b]
+                out[t + 1, a, b] = v
+                out[t + 1, b, a] = v
+
+
+def ewma_covariance(
+    x: np.ndarray | pd.DataFrame,
+    lam: float = 0.94,
+    cov_0: np.ndarray | None = None,
+    backend: str | None = None,
+) -> np.ndarray:
+    """
+    RiskMetrics EWMA covariance recursion
+
+        Sigma_t = lam * Sigma_{t-1} + (1 - lam) * r_{t-1} r_{t-1}^T
+
+    numpy runs the rank-1 updates as batches: the outer products of a block
+    of days are formed at once and pushed through one lfilter call along
+    time, with the filter state carried between blocks (blocks keep the
+    temporary below ~32 MB). numba runs the recursion in place on the upper
+    triangle.
+
+    parameters
+        x: np.ndarray | pd.DataFrame
+            T x N returns
+        lam: float
+            decay factor
+        cov_0: np.ndarray | None
+            starting covariance, defaults to the sample covariance of x
+        backend: str | None
+            'numpy', 'numba' or None for default_backend()
+
+    returns
+        np.ndarray
+            (T + 1, N, N); cov[t] uses returns up to t - 1, cov[T] is the
+            one-step forecast
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    t_len, n = x.shape
+    cov_0 = np.cov(x, rowvar=False).reshape(n, n) if cov_0 is None else np.asarray(cov_0, dtype=float)
+    out = np.empty((t_len + 1, n, n))
+
+    if _resolve(backend) == "numba":
+        _jit(_ewma_cov_loop)(x, float(lam), cov_0, out)
+        return out
+
+    from scipy.signal import lfilter
+
+    out[0] = cov_0
+    block = max(1, 4_000_000 // (n * n))
+    for a in range(0, t_len, block):
+        xb = x[a : a + block]
+        drive = (1.0 - lam) * xb[:, :, None] * xb[:, None, :]
+        # zi = lam * Sigma_{a}: the filter state is the previous output times the pole
+        out[a + 1 : a + 1 + len(xb)] = lfilter(
+            [1.0], [1.0, -lam], drive, axis=0, zi=lam * out[a][None]
+        )[0]
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backend comparison
+# ─────────────────────────────────────────────────────────────────────────────
+
+def benchmark(
+    n_obs: int = 5_000,
+    window: int = 250,
+    n_assets: int = 10,
+    repeat: int = 3,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    times every kernel on both backends and checks that they agree
+
+    numba timings exclude the one-off compilation (a warm-up call runs first).
+
+    returns
+        pd.DataFrame
+            one row per kernel: numpy_s, numba_s (best of `repeat`), speedup
+            and max_abs_diff between the two backends' outputs
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.standard_t(4, size=(n_obs, n_assets)) * 0.01
+    r = x[:, 0]
+
+    cases = {
+        "rolling_mean_cov":   lambda b: rolling_mean_cov(x, window, backend=b),
+        "rolling_moments":    lambda b: rolling_moments(x, window, backend=b),
+        "pot_exceedances":    lambda b: pot_exceedances(-r, window, 0.95, backend=b),
+        "rolling_brw":        lambda b: rolling_brw(r, window, 0.99, 0.97, backend=b),
+        "garch11_filter":     lambda b: (garch11_filter(r, 1e-6, 0.08, 0.9, backend=b),),
+        "garch11_neg_loglik": lambda b: (garch11_neg_loglik((0.0, 1e-6, 0.08, 0.9), r, backend=b),),
+        "ewma_covariance":    lambda b: (ewma_covariance(x, 0.94, backend=b),),
+    }
+
+    have_numba = importlib.util.find_spec("numba") is not None
+    rows = []
+    for name, fn in cases.items():
+        timings, outputs = {}, {}
+        for b in BACKENDS:
+            if b == "numba" and not have_numba:
+                continue
+            outputs[b] = fn(b) # warm-up / compile
+            best = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn(b)
+                best = min(best, time.perf_counter() - t0)
+            timings[b] = best
+
+        diff = float("nan")
+        if "numba" in outputs:
+            diff = max(
+                float(np.nanmax(np.abs(np.asarray(a, dtype=float) - np.asarray(c, dtype=float))))
+                for a, c in zip(outputs["numpy"], outputs["numba"])
+            )
+        rows.append({
+            "kernel":       name,
+            "numpy_s":      timings["numpy"],
+            "numba_s":      timings.get("numba", float("nan")),
+            "speedup":      timings["numpy"] / timings["numba"] if "numba" in timings else float("nan"),
+            "max_abs_diff": diff,
+        })
+
+    return pd.DataFrame(rows).set_index("kernel")
@@ -1,6 +1,12 @@
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
-from scipy.stats import norm, genpareto
+
+from varlab.precision import get_dtype
+
+# scipy is imported inside the functions that need it so that importing
+# varlab.models (e.g. from the CLI) does not pay its start-up cost
 
 def var_historical(r: pd.Series, alpha: float = 0.99) -> float:
     """
@@ -43,6 +49,59 @@ def cvar_historical(r: pd.Series, alpha: float = 0.99) -> float:
     tail = r[r <= cutoff] # select returns that are worse than or equal VaR cutoff
     return float(-tail.mean()) # computes mean of tail losses, negate so CVaR is expressed as positive loss
 
+def _brw_tail(r: pd.Series, alpha: float, lam: float) -> tuple[float, float]:
+    """(quantile, weighted mean of the returns up to it) under BRW age weights"""
+    x = np.asarray(r, dtype=float)
+    w = lam ** np.arange(len(x) - 1, -1, -1.0) # newest observation (last) gets weight 1
+    order = np.argsort(x, kind="stable")
+    cw = np.cumsum(w[order])
+    k = int(np.argmax(cw >= (1 - alpha) * cw[-1])) # first sorted return whose cumulative weight reaches 1 - alpha
+    tail = order[: k + 1]
+    return float(x[order[k]]), float(np.dot(w[tail], x[tail]) / cw[k])
+
+def var_brw(r: pd.Series, alpha: float = 0.99, lam: float = 0.97) -> float:
+    """
+    age-weighted historical VaR (Boudoukh, Richardson & Whitelaw)
+
+    the observation of age k (k = 0 is the most recent) gets probability
+    lam^k (1 - lam) / (1 - lam^n); VaR is minus the first sorted return whose
+    cumulative weight reaches 1 - alpha. lam = 1 gives equal weights.
+
+    parameters
+        r: pd.Series
+            historical returns, oldest first
+        alpha: float
+            confidence level
+        lam: float
+            decay factor, BRW use 0.97 and 0.99
+
+    returns
+        float
+            positive VaR value represents loss threshold
+    """
+    return -_brw_tail(r, alpha, lam)[0]
+
+def cvar_brw(r: pd.Series, alpha: float = 0.99, lam: float = 0.97) -> float:
+    """
+    age-weighted historical expected shortfall
+
+    weighted mean loss of the returns at or below the BRW VaR quantile,
+    using the same weights as var_brw
+
+    parameters
+        r: pd.Series
+            historical returns, oldest first
+        alpha: float
+            confidence level
+        lam: float
+            decay factor
+
+    returns
+        float
+            positive expected loss beyond VaR
+    """
+    return -_brw_tail(r, alpha, lam)[1]
+
 def var_parametric_normal(r: pd.Series, alpha: float = 0.99) -> float:
     """
     parametric VaR assuming returns follow a norm distribution
@@ -56,22 +115,267 @@ def var_parametric_normal(r: pd.Series, alpha: float = 0.99) -> float:
         alpha: float
             confidence level
     """
+    from scipy.stats import norm
+
     mu = r.mean() # mean return 
     sigma = r.std(ddof=1) # estimate sd, ddof=1 uses unbiased sample sd
     z = norm.ppf(1 - alpha)  # compute z-score linked to left tail, alpha=0.99 -> norm.ppf(0.01) ~ -2.33
     return float(-(mu + z * sigma)) # combine mean and vol into VaR formula, multiply by -1
 
+# ── higher-moment parametric VaR / ES ──────────────────────────────────────
+# Cornish-Fisher and Student-t VaR / ES only need the window mean, variance,
+# skewness and excess kurtosis, so kernels.rolling_moments (rolling power sums)
+# gives a whole history -- for many series at once -- in one pass followed by
+# elementwise formulas, at the cost of the rolling Normal VaR. The single
+# window functions are the same formulas on one window.
+
+_T_INV_NU_MAX = 0.25  # 1 / nu; nu >= 4 keeps the kurtosis the t is matched to finite
+_T_INV_NU_SIZE = 1025
+
+@lru_cache(maxsize=16)
+def _t_tail_table(alpha: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    unit-variance Student-t quantile and ES factor at tail 1 - alpha on a
+    uniform 1 / nu grid (1 / nu = 0 is the Normal), with increments for _lerp_table
+    """
+    from scipy.stats import norm, t
+
+    p = 1 - alpha
+    inv_nu = np.linspace(0.0, _T_INV_NU_MAX, _T_INV_NU_SIZE)
+    nu = 1.0 / inv_nu[1:]
+    tq = t.ppf(p, nu)
+    unit = np.sqrt((nu - 2) / nu) # t(nu) has variance nu / (nu - 2)
+    z = norm.ppf(p)
+    q = np.concatenate([[z], unit * tq])
+    es = np.concatenate([[norm.pdf(z) / p], unit * t.pdf(tq, nu) / p * (nu + tq ** 2) / (nu - 1)])
+    return q, np.append(np.diff(q), 0.0), es, np.append(np.diff(es), 0.0)
+
+def _cornish_fisher_var_es(mean, var, skew, kurt, alpha: float):
+    """
+    Cornish-Fisher VaR and ES from moments
+
+    the return is modelled as mean + sd f(Z) with Z standard Normal and f the
+    Cornish-Fisher expansion; ES is E[f(Z) | Z < z] in closed form from the
+    truncated Normal moments (exact for f, valid while f is monotone, i.e.
+    for moderate skewness and kurtosis)
+    """
+    from scipy.stats import norm
+
+    p = 1 - alpha
+    z = norm.ppf(p)
+    skew = np.nan_to_num(skew) # zero-variance windows: the sd multiplies them away
+    kurt = np.nan_to_num(kurt)
+    z_cf = z + (z ** 2 - 1) * skew / 6 + (z ** 3 - 3 * z) * kurt / 24 - (2 * z ** 3 - 5 * z) * skew ** 2 / 36
+    tail = norm.pdf(z) / p * (-1 - z * skew / 6 + (1 - z ** 2) * kurt / 24 - (1 - 2 * z ** 2) * skew ** 2 / 36)
+    sd = np.sqrt(var)
+    return -(mean + z_cf * sd), -(mean + tail * sd)
+
+def _student_t_var_es(mean, var, kurt, alpha: float):
+    """
+    Student-t VaR and ES fitted by the method of moments: the mean and
+    variance are matched directly and nu from the excess kurtosis 6 / (nu - 4);
+    windows without excess kurtosis get the Normal (nu = inf)
+    """
+    q, dq, es, des = _t_tail_table(float(alpha))
+    kurt = np.nan_to_num(np.asarray(kurt, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_nu = np.where(kurt > 0, kurt / (4 * kurt + 6), 0.0) # 1 / nu, in [0, 0.25)
+    inv_h = (_T_INV_NU_SIZE - 1) / _T_INV_NU_MAX
+    q_nu = _lerp_table(inv_nu.copy(), q, dq, 0.0, inv_h)
+    es_nu = _lerp_table(inv_nu, es, des, 0.0, inv_h)
+    sd = np.sqrt(var)
+    return -(mean + q_nu * sd), -mean + es_nu * sd
+
+def _rolling_moment_model(x, window: int, alpha: float, model: str, backend: str | None):
+    from varlab.kernels import rolling_moments
+
+    x = np.asarray(x, dtype=float)
+    mean, var, skew, kurt = rolling_moments(x, window, backend=backend)
+    if model == "cf":
+        v, e = _cornish_fisher_var_es(mean, var, skew, kurt, alpha)
+    else:
+        v, e = _student_t_var_es(mean, var, kurt, alpha)
+    if x.ndim == 1:
+        v, e = v[:, 0], e[:, 0]
+    return v, e
+
+def rolling_cornish_fisher(
+    x: np.ndarray,
+    window: int,
+    alpha: float = 0.99,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    rolling Cornish-Fisher (skewness / kurtosis adjusted) VaR and ES
+
+        VaR = -(mu + z_cf * sd)
+        z_cf = z + (z^2 - 1) S / 6 + (z^3 - 3z) K / 24 - (2z^3 - 5z) S^2 / 36
+
+    with S, K the window skewness and excess kurtosis (kernels.rolling_moments)
+
+    parameters
+        x: np.ndarray
+            (T,) or (T, K) returns; K series are processed at once
+        window: int
+            window length
+        alpha: float
+            confidence level
+        backend: str | None
+            rolling power sums backend, see kernels.rolling_power_sums
+
+    returns
+        (var, es)
+            (T - window + 1,) or (T - window + 1, K) positive losses; row j
+            uses x[j : j + window], i.e. it is the forecast for row j + window
+    """
+    return _rolling_moment_model(x, window, alpha, "cf", backend)
+
+def rolling_student_t(
+    x: np.ndarray,
+    window: int,
+    alpha: float = 0.99,
+    backend: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    rolling Student-t VaR and ES, fitted to every window by the method of moments
+
+    mean and variance are the window's, nu = 4 + 6 / K from its excess
+    kurtosis K (Normal when K <= 0); the t quantile and ES factor come from a
+    table over 1 / nu, so there is no per-window fit and no per-element scipy call
+
+    parameters
+        x, window, alpha, backend
+            see rolling_cornish_fisher
+
+    returns
+        (var, es)
+            as in rolling_cornish_fisher
+    """
+    return _rolling_moment_model(x, window, alpha, "t", backend)
+
+def var_cornish_fisher(r: pd.Series, alpha: float = 0.99) -> float:
+    """
+    Cornish-Fisher VaR: Normal VaR with the quantile corrected for the
+    window's skewness and excess kurtosis (see rolling_cornish_fisher)
+
+    parameters
+        r: pd.Series
+            historical returns
+        alpha: float
+            confidence level
+
+    returns
+        float
+            positive VaR value represents loss threshold
+    """
+    return float(rolling_cornish_fisher(np.asarray(r, dtype=float), len(r), alpha)[0][0])
+
+def cvar_cornish_fisher(r: pd.Series, alpha: float = 0.99) -> float:
+    """Cornish-Fisher expected shortfall, see rolling_cornish_fisher"""
+    return float(rolling_cornish_fisher(np.asarray(r, dtype=float), len(r), alpha)[1][0])
+
+def var_student_t(r: pd.Series, alpha: float = 0.99) -> float:
+    """
+    Student-t VaR with mean, variance and nu matched to the window's moments
+    (see rolling_student_t)
+
+    parameters
+        r: pd.Series
+            historical returns
+        alpha: float
+            confidence level
+
+    returns
+        float
+            positive VaR value represents loss threshold
+    """
+    return float(rolling_student_t(np.asarray(r, dtype=float), len(r), alpha)[0][0])
+
+def cvar_student_t(r: pd.Series, alpha: float = 0.99) -> float:
+    """Student-t expected shortfall, see rolling_student_t"""
+    return float(rolling_student_t(np.asarray(r, dtype=float), len(r), alpha)[1][0])
+
+def var_ewma(r: pd.Series, alpha: float = 0.99, lam: float = 0.94) -> float:
+    """
+    RiskMetrics EWMA VaR
+
+    sigma2 follows lam * sigma2 + (1 - lam) * r^2 through the window (seeded with
+    the window's sample variance) and
+
+        VaR = -z_alpha * sigma_{T+1|T}
+
+    with the zero mean RiskMetrics assumes
+
+    parameters
+        r: pd.Series
+            historical returns, oldest first
+        alpha: float
+            confidence level
+        lam: float
+            decay factor, 0.94 for daily data
+
+    returns
+        float
+            positive VaR value represents loss threshold
+    """
+    from scipy.stats import norm
+    from varlab.kernels import ewma_variance
+
+    sigma2 = ewma_variance(np.asarray(r, dtype=float), lam)[-1] # one-step forecast
+    return float(-norm.ppf(1 - alpha) * np.sqrt(sigma2))
+
+def var_ewma_portfolio(
+    returns: pd.DataFrame,
+    weights: np.ndarray,
+    alpha: float = 0.99,
+    lam: float = 0.94,
+) -> float:
+    """
+    RiskMetrics EWMA covariance VaR for a portfolio
+
+        VaR = -z_alpha * sqrt(w' Sigma_{T+1|T} w)
+
+    parameters
+        returns: pd.DataFrame
+            historical asset returns (rows=time, columns=assets)
+        weights: np.ndarray
+            port weights length N (auto-normalised)
+        alpha: float
+            confidence level
+        lam: float
+            decay factor
+
+    returns
+        float
+            positive VaR value represents loss threshold
+    """
+    from scipy.stats import norm
+    from varlab.kernels import ewma_covariance
+
+    w = np.asarray(weights, dtype=float)
+    w = w / w.sum()
+    cov = ewma_covariance(returns.to_numpy(dtype=float), lam)[-1]
+    return float(-norm.ppf(1 - alpha) * np.sqrt(w @ cov @ w))
+
 def var_monte_carlo_portfolio(
     returns: pd.DataFrame,
     weights: np.ndarray,
     alpha: float = 0.99,
     n_sims: int = 50_000,
     seed: int = 42,
+    dtype=None,
+    dist: str = "normal",
+    nu: float = 5.0,
+    workers: int | None = None,
+    executor: str | None = None,
 ) -> float:
     """
     Monte Carlo VaR for multi-asset port
 
-    assumes returns follow multivariate norm distro with empirical mean and covariance from data
+    by default returns follow a multivariate norm distro with empirical mean and
+    covariance from data; dist='t' keeps the moments with multivariate Student-t
+    tails and dist='t_copula' keeps each asset's empirical distribution joined by
+    a Student-t copula (see simulate_t_scenarios / simulate_t_copula_scenarios)
 
     parameters
         returns: pd.DataFrame
@@ -84,24 +388,609 @@ def var_monte_carlo_portfolio(
             n of Monte Carlo simulations 
         seed: int
             random seed for reproduciblity
+        dtype: str | np.dtype | None
+            scenario precision, defaults to the pipeline dtype (see varlab.precision)
+        dist: str
+            'normal', 't' or 't_copula'
+        nu: float
+            Student-t degrees of freedom ('t' / 't_copula' only)
+        workers: int | None
+            None draws every scenario from one stream of seed; an int switches to
+            the block-streamed simulation of var_monte_carlo_parallel, which gives
+            the same VaR for any worker count
+        executor: str | None
+            varlab.executor backend when workers is set
 
         returns:
             float
                 port VaR positive loss format
     """
-    rng = np.random.default_rng(seed) # NumPy rand num generator
-    mu = returns.mean().to_numpy() # compute mean return vector length N
-    cov = returns.cov().to_numpy() # compute covariance matrix N x N
+    if workers is not None:
+        return var_monte_carlo_parallel(returns, weights, alpha=alpha, n_sims=n_sims, seed=seed, dtype=dtype,
+                                        dist=dist, nu=nu, workers=workers, executor=executor)
+    if dist == "t_copula":
+        return var_monte_carlo_t_copula(returns, weights, alpha=alpha, nu=nu, n_sims=n_sims, seed=seed, dtype=dtype)
+
+    mu = returns.mean().to_numpy(dtype=float) # compute mean return vector length N
+    cov = returns.cov().to_numpy(dtype=float) # compute covariance matrix N x N
+
+    if dist == "t":
+        return var_monte_carlo_t(mu, cov, weights, alpha=alpha, nu=nu, n_sims=n_sims, seed=seed, dtype=dtype)
+    if dist != "normal":
+        raise ValueError(f"Unknown dist '{dist}'. Use 'normal', 't' or 't_copula'.")
+    return var_monte_carlo_normal(mu, cov, weights, alpha=alpha, n_sims=n_sims, seed=seed, dtype=dtype)
 
-    sims = rng.multivariate_normal(mu, cov, size=n_sims) # sim multivariate normal returns, output shape = n_sims, N
+
+def var_monte_carlo_normal(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    weights: np.ndarray,
+    alpha: float = 0.99,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+) -> float:
+    """
+    Monte Carlo VaR for multi-asset port from a given mean vector and covariance
+
+    same simulation as var_monte_carlo_portfolio, but takes the moments directly so
+    rolling backtests can precompute every window's moments in one pass
+    (see kernels.rolling_mean_cov) instead of rebuilding them from a DataFrame slice
+
+    parameters
+        mu: np.ndarray
+            mean return vector length N
+        cov: np.ndarray
+            covariance matrix N x N
+        weights: np.ndarray
+            port weights length of N
+        alpha: float
+            confidence level
+        n_sims: int
+            n of Monte Carlo simulations
+        seed: int
+            random seed for reproduciblity
+        dtype: str | np.dtype | None
+            scenario precision, defaults to the pipeline dtype (see varlab.precision).
+            float32 halves the scenario matrix; the quantile is still taken in float64
+
+    returns
+        float
+            port VaR positive loss format
+    """
     w = np.asarray(weights, dtype=float) # converts weights to NumPy array
     w = w / w.sum() # normalize weights to ensure they sum to 1, protects against user input error 
-    port = sims @ w  # compute simulated port returns, matrix multiplication
-    q = np.quantile(port, 1 - alpha) # left-tail quantile of port returns
+
+    sims = simulate_normal_scenarios(mu, cov, n_sims=n_sims, seed=seed, dtype=dtype) # n_sims x N
+    port = sims @ w.astype(sims.dtype)  # compute simulated port returns, matrix multiplication
+    q = np.quantile(np.asarray(port, dtype=np.float64), 1 - alpha) # left-tail quantile of port returns, in float64
 
     return float(-q) # convert to positive loss value
 
 
+def _cov_factor(cov: np.ndarray, dtype) -> np.ndarray:
+    """F^T with cov = F F^T (eigh, tolerates a singular cov), so z @ F^T has covariance cov"""
+    vals, vecs = np.linalg.eigh(np.asarray(cov, dtype=float))
+    return (vecs * np.sqrt(np.clip(vals, 0.0, None))).T.astype(dtype)
+
+
+def simulate_normal_scenarios(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+) -> np.ndarray:
+    """
+    multivariate normal return scenarios, as used by the Monte Carlo VaR models
+
+    exposed so callers can keep the scenario matrix and reuse it (e.g. risk
+    attribution in varlab.attribution) instead of re-simulating
+
+    parameters
+        mu: np.ndarray
+            mean return vector length N
+        cov: np.ndarray
+            covariance matrix N x N
+        n_sims: int
+            n of scenarios
+        seed: int
+            random seed for reproduciblity
+        dtype: str | np.dtype | None
+            scenario precision, defaults to the pipeline dtype (see varlab.precision)
+
+    returns
+        np.ndarray
+            n_sims x N scenario matrix
+    """
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    rng = np.random.default_rng(seed) # NumPy rand num generator
+
+    if dtype == np.float64:
+        return rng.multivariate_normal(mu, cov, size=n_sims) # sim multivariate normal returns, output shape = n_sims, N
+
+    # multivariate_normal only returns float64, so build the draws from a factor of cov:
+    # sims = z F^T + mu with z ~ N(0, I) in float32
+    factor = _cov_factor(cov, dtype)
+    sims = rng.standard_normal((n_sims, len(factor)), dtype=dtype) @ factor
+    sims += np.asarray(mu, dtype=dtype)
+    return sims
+
+
+def monte_carlo_scenarios(
+    returns: pd.DataFrame,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    dist: str = "normal",
+    nu: float = 5.0,
+) -> pd.DataFrame:
+    """
+    the scenario matrix behind var_monte_carlo_portfolio, kept instead of discarded
+
+    the same (returns, n_sims, seed, dtype, dist, nu) gives exactly the scenarios
+    var_monte_carlo_portfolio draws, so VaR computed from them matches it
+
+    parameters
+        returns: pd.DataFrame
+            T x N matrix of asset returns
+        n_sims: int
+            n of Monte Carlo simulations
+        seed: int
+            random seed for reproduciblity
+        dtype: str | np.dtype | None
+            scenario precision, defaults to the pipeline dtype (see varlab.precision)
+        dist: str
+            'normal', 't' or 't_copula', see var_monte_carlo_portfolio
+        nu: float
+            Student-t degrees of freedom ('t' / 't_copula' only)
+
+    returns
+        pd.DataFrame
+            n_sims x N simulated asset returns, columns as in returns
+    """
+    if dist == "t_copula":
+        sims = simulate_t_copula_scenarios(returns, nu=nu, n_sims=n_sims, seed=seed, dtype=dtype)
+        return pd.DataFrame(sims, columns=returns.columns, copy=False)
+
+    mu = returns.mean().to_numpy(dtype=float)
+    cov = returns.cov().to_numpy(dtype=float)
+    if dist == "t":
+        sims = simulate_t_scenarios(mu, cov, nu=nu, n_sims=n_sims, seed=seed, dtype=dtype)
+    elif dist == "normal":
+        sims = simulate_normal_scenarios(mu, cov, n_sims=n_sims, seed=seed, dtype=dtype)
+    else:
+        raise ValueError(f"Unknown dist '{dist}'. Use 'normal', 't' or 't_copula'.")
+    return pd.DataFrame(sims, columns=returns.columns, copy=False)
+
+
+# ── fat-tailed Monte Carlo ───────────────────────────────────────────────────
+# Scenarios are drawn in chunks of chunk_rows rows, so the VaR functions only
+# ever hold one chunk of asset returns plus the n_sims port returns. Normal
+# draws and chi-square mixing variables come from two child streams of the
+# seed, which makes the scenarios independent of chunk_rows. Nothing calls
+# scipy per scenario: the chi-square draws are NumPy's vectorised sampler, the
+# t CDF of the copula is a precomputed table (_t_cdf_table) and the marginal
+# inverse CDFs are the sorted window itself.
+
+_T_TABLE_MAX = 50.0   # |x| beyond this maps to u = 0 / 1, i.e. the window's extreme
+_T_TABLE_SIZE = 8193  # grid step 0.0122, interpolation error < 1e-5 in u
+
+
+@lru_cache(maxsize=16)
+def _t_cdf_table(nu: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Student-t CDF on a uniform grid over [-_T_TABLE_MAX, _T_TABLE_MAX] and its
+    increments, once per nu; one extra flat step lets _lerp_table skip a clamp
+    """
+    from scipy.stats import t
+
+    cdf = t.cdf(np.linspace(-_T_TABLE_MAX, _T_TABLE_MAX, _T_TABLE_SIZE), nu)
+    return cdf, np.append(np.diff(cdf), 0.0)
+
+
+def _lerp_table(x: np.ndarray, values: np.ndarray, steps: np.ndarray, x0: float, inv_h: float) -> np.ndarray:
+    """
+    linear interpolation in a table on the uniform grid x0 + i / inv_h, clamped
+    at both ends (steps[-1] must be 0); index arithmetic instead of
+    np.interp's binary search. Overwrites x.
+    """
+    x -= x0
+    x *= inv_h
+    np.clip(x, 0, len(values) - 1, out=x)
+    i = x.astype(np.intp)
+    x -= i
+    x *= steps[i]
+    x += values[i]
+    return x
+
+
+def _check_nu(nu: float) -> None:
+    if not nu > 2:
+        raise ValueError(f"nu must be > 2 for a finite covariance, got {nu}.")
+
+
+def _t_draws(factor: np.ndarray, nu: float, n_sims: int, seed: int, chunk_rows: int):
+    """
+    yields chunks of z F^T * sqrt(nu / W) with z ~ N(0, I), W ~ chi2(nu):
+    multivariate t with scale matrix F F^T
+    """
+    rng_z, rng_w = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
+    dtype = factor.dtype
+    for a in range(0, n_sims, chunk_rows):
+        rows = min(chunk_rows, n_sims - a)
+        x = rng_z.standard_normal((rows, len(factor)), dtype=dtype) @ factor
+        x *= np.sqrt(nu / rng_w.chisquare(nu, rows)).astype(dtype)[:, None]
+        yield x
+
+
+def _t_chunks(mu, cov, nu, n_sims, seed, dtype, chunk_rows):
+    """chunks of multivariate t scenarios with mean mu and covariance cov"""
+    _check_nu(nu)
+    # a t with scale S has covariance S nu / (nu - 2), so scale cov down
+    factor = _cov_factor(np.asarray(cov, dtype=float) * (nu - 2) / nu, dtype)
+    mu = np.asarray(mu, dtype=dtype)
+    for x in _t_draws(factor, nu, n_sims, seed, chunk_rows):
+        x += mu
+        yield x
+
+
+def _t_copula_setup(returns, nu, dtype) -> dict:
+    """copula factor and lookup tables for the t-copula scenarios of one return window"""
+    from scipy.stats import norm
+
+    _check_nu(nu)
+    x = np.asarray(returns, dtype=float)
+    t_len, n = x.shape
+    if t_len < 2:
+        raise ValueError("t-copula needs at least 2 return observations.")
+
+    # copula correlation from normal scores (ranks -> Normal quantiles), which
+    # unlike the Pearson correlation of the returns ignores the marginals
+    ranks = x.argsort(axis=0).argsort(axis=0) + 1
+    corr = np.atleast_2d(np.corrcoef(norm.ppf(ranks / (t_len + 1)), rowvar=False))
+
+    # u = t CDF from the table, then u * (T - 1) is the fractional order statistic
+    # (as np.quantile), so both lookups collapse into one uniform-grid table per asset
+    cdf, dcdf = _t_cdf_table(float(nu))
+    scale = t_len - 1
+    # marginal inverse CDFs: the sorted window, a repeated last row so pos = T - 1 needs no clamp
+    table = np.sort(x, axis=0).astype(dtype)
+    steps = np.vstack([np.diff(table, axis=0), np.zeros((1, n), dtype=dtype)]).ravel()
+    return {
+        "factor":    _cov_factor(corr, dtype),
+        "pos_table": (cdf * scale).astype(dtype),
+        "pos_steps": (dcdf * scale).astype(dtype),
+        "table":     table.ravel(),
+        "steps":     steps,
+    }
+
+
+def _t_copula_map(z: np.ndarray, cop: dict) -> np.ndarray:
+    """maps a chunk of t draws through the copula tables to asset returns, overwriting z"""
+    n = z.shape[1]
+    inv_h = (_T_TABLE_SIZE - 1) / (2 * _T_TABLE_MAX)
+    pos = _lerp_table(z, cop["pos_table"], cop["pos_steps"], -_T_TABLE_MAX, inv_h)
+    flat = pos.astype(np.intp)
+    pos -= flat
+    flat *= n
+    flat += np.arange(n)
+    pos *= cop["steps"][flat]
+    pos += cop["table"][flat]
+    return pos
+
+
+def _t_copula_chunks(returns, nu, n_sims, seed, dtype, chunk_rows):
+    """chunks of t-copula scenarios with the empirical marginals of returns"""
+    cop = _t_copula_setup(returns, nu, dtype)
+    for z in _t_draws(cop["factor"], nu, n_sims, seed, chunk_rows):
+        yield _t_copula_map(z, cop)
+
+
+def _collect(chunks, n_sims: int, n: int, dtype) -> np.ndarray:
+    out = np.empty((n_sims, n), dtype=dtype)
+    a = 0
+    for chunk in chunks:
+        out[a : a + len(chunk)] = chunk
+        a += len(chunk)
+    return out
+
+
+def _var_from_chunks(chunks, weights: np.ndarray, alpha: float, n_sims: int) -> float:
+    """port VaR from scenario chunks, keeping only the port returns"""
+    w = np.asarray(weights, dtype=float)
+    w = w / w.sum()
+    port = np.empty(n_sims)
+    a = 0
+    for chunk in chunks:
+        port[a : a + len(chunk)] = chunk @ w.astype(chunk.dtype)
+        a += len(chunk)
+    return float(-np.quantile(port, 1 - alpha))
+
+
+def simulate_t_scenarios(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    nu: float = 5.0,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    chunk_rows: int = 16_384,
+) -> np.ndarray:
+    """
+    multivariate Student-t return scenarios with the given mean and covariance
+
+        x = mu + sqrt(nu / W) z F^T,  z ~ N(0, I),  W ~ chi2(nu),  F F^T = cov (nu - 2) / nu
+
+    one mixing variable per scenario makes all assets fat-tailed together, so
+    joint crashes are more likely than under the Normal with the same moments
+
+    parameters
+        mu: np.ndarray
+            mean return vector length N
+        cov: np.ndarray
+            covariance matrix N x N
+        nu: float
+            degrees of freedom, > 2 (smaller = fatter tails)
+        n_sims: int
+            n of scenarios
+        seed: int
+            random seed for reproduciblity
+        dtype: str | np.dtype | None
+            scenario precision, defaults to the pipeline dtype (see varlab.precision)
+        chunk_rows: int
+            scenarios generated per chunk; the result does not depend on it
+
+    returns
+        np.ndarray
+            n_sims x N scenario matrix
+    """
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    chunks = _t_chunks(mu, cov, nu, n_sims, seed, dtype, chunk_rows)
+    return _collect(chunks, n_sims, len(mu), dtype)
+
+
+def simulate_t_copula_scenarios(
+    returns: pd.DataFrame | np.ndarray,
+    nu: float = 5.0,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    chunk_rows: int = 16_384,
+) -> np.ndarray:
+    """
+    Student-t copula scenarios with empirical marginals
+
+    draws u from a t copula (correlation from normal scores of returns) and
+    maps each asset's u through the empirical quantile function of its own
+    returns, so every asset keeps its observed distribution while the
+    dependence gets t tail dependence. Scenarios never leave the range of
+    the observed returns.
+
+    parameters
+        returns: pd.DataFrame | np.ndarray
+            T x N window of asset returns
+        nu: float
+            copula degrees of freedom, > 2
+        n_sims: int
+            n of scenarios
+        seed: int
+            random seed for reproduciblity
+        dtype: str | np.dtype | None
+            scenario precision, defaults to the pipeline dtype (see varlab.precision)
+        chunk_rows: int
+            scenarios generated per chunk; the result does not depend on it
+
+    returns
+        np.ndarray
+            n_sims x N scenario matrix
+    """
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    chunks = _t_copula_chunks(returns, nu, n_sims, seed, dtype, chunk_rows)
+    return _collect(chunks, n_sims, np.shape(returns)[1], dtype)
+
+
+def var_monte_carlo_t(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    weights: np.ndarray,
+    alpha: float = 0.99,
+    nu: float = 5.0,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    chunk_rows: int = 16_384,
+) -> float:
+    """
+    Monte Carlo VaR with multivariate Student-t returns
+
+    same moments as var_monte_carlo_normal, fatter joint tails; scenarios as
+    in simulate_t_scenarios but only one chunk of them is held at a time
+
+    parameters
+        mu, cov, weights, alpha, n_sims, seed, dtype
+            see var_monte_carlo_normal
+        nu: float
+            degrees of freedom, > 2
+        chunk_rows: int
+            scenarios per chunk
+
+    returns
+        float
+            port VaR positive loss format
+    """
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    return _var_from_chunks(_t_chunks(mu, cov, nu, n_sims, seed, dtype, chunk_rows), weights, alpha, n_sims)
+
+
+def var_monte_carlo_t_copula(
+    returns: pd.DataFrame | np.ndarray,
+    weights: np.ndarray,
+    alpha: float = 0.99,
+    nu: float = 5.0,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    chunk_rows: int = 16_384,
+) -> float:
+    """
+    Monte Carlo VaR from a Student-t copula with empirical marginals
+
+    scenarios as in simulate_t_copula_scenarios, one chunk at a time
+
+    parameters
+        returns: pd.DataFrame | np.ndarray
+            T x N window of asset returns
+        weights, alpha, n_sims, seed, dtype
+            see var_monte_carlo_normal
+        nu: float
+            copula degrees of freedom, > 2
+        chunk_rows: int
+            scenarios per chunk
+
+    returns
+        float
+            port VaR positive loss format
+    """
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    chunks = _t_copula_chunks(returns, nu, n_sims, seed, dtype, chunk_rows)
+    return _var_from_chunks(chunks, weights, alpha, n_sims)
+
+
+# ── block-streamed parallel Monte Carlo ──────────────────────────────────────
+# The functions above draw all scenarios from one stream of the seed, so their
+# result depends on drawing them in one sequence. Here scenario block b (rows
+# b * _MC_BLOCK_ROWS onwards) draws from its own stream SeedSequence(seed,
+# spawn_key=(b,)), the b-th child of SeedSequence(seed).spawn(). Streams are
+# keyed by block, never by worker, so blocks can run anywhere in any order and
+# the VaR is bit-identical for any worker count. The block size is a constant
+# for the same reason: changing it changes the scenarios.
+
+_MC_BLOCK_ROWS = 16_384
+
+
+def _mc_spec(returns: pd.DataFrame, dist: str, nu: float, dtype) -> dict:
+    """what a worker needs to simulate any block: the factor, mean and (t-copula) tables"""
+    if dist == "t_copula":
+        return {"dist": dist, "nu": float(nu), "dtype": dtype, **_t_copula_setup(returns, nu, dtype)}
+
+    mu = returns.mean().to_numpy(dtype=float)
+    cov = returns.cov().to_numpy(dtype=float)
+    if dist == "t":
+        _check_nu(nu)
+        cov = cov * (nu - 2) / nu # a t with scale S has covariance S nu / (nu - 2)
+    elif dist != "normal":
+        raise ValueError(f"Unknown dist '{dist}'. Use 'normal', 't' or 't_copula'.")
+    return {"dist": dist, "nu": float(nu), "dtype": dtype,
+            "factor": _cov_factor(cov, dtype), "mu": mu.astype(dtype)}
+
+
+def _mc_block(spec: dict, seed: int, b: int, rows: int) -> np.ndarray:
+    """scenario block b (rows x N) from its own child stream of seed"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(b,)))
+    factor = spec["factor"]
+    x = rng.standard_normal((rows, len(factor)), dtype=spec["dtype"]) @ factor
+    if spec["dist"] != "normal":
+        x *= np.sqrt(spec["nu"] / rng.chisquare(spec["nu"], rows)).astype(x.dtype)[:, None]
+    if spec["dist"] == "t_copula":
+        return _t_copula_map(x, spec)
+    x += spec["mu"]
+    return x
+
+
+def _mc_block_task(lo: int, hi: int, spec: dict, seed: int, n_sims: int, w: np.ndarray | None) -> np.ndarray:
+    """blocks lo..hi stacked, or only their port returns (float64) when weights are given"""
+    out = []
+    for b in range(lo, hi):
+        x = _mc_block(spec, seed, b, min(_MC_BLOCK_ROWS, n_sims - b * _MC_BLOCK_ROWS))
+        out.append(x if w is None else np.asarray(x @ w.astype(x.dtype), dtype=np.float64))
+    return np.concatenate(out)
+
+
+def _mc_blocks(spec: dict, seed: int, n_sims: int, w, workers: int, executor: str | None) -> np.ndarray:
+    n_blocks = -(-n_sims // _MC_BLOCK_ROWS) # ceil division
+    if workers == 1 or n_blocks == 1:
+        return _mc_block_task(0, n_blocks, spec, seed, n_sims, w)
+
+    from varlab.executor import get_executor
+
+    with get_executor(executor, workers) as ex:
+        parts = ex.map_ranges(_mc_block_task, n_blocks, spec, seed, n_sims, w)
+    return np.concatenate(parts) # map_ranges keeps block order
+
+
+def monte_carlo_block_scenarios(
+    returns: pd.DataFrame,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    dist: str = "normal",
+    nu: float = 5.0,
+    workers: int = 1,
+    executor: str | None = None,
+) -> pd.DataFrame:
+    """
+    block-streamed scenario matrix behind var_monte_carlo_parallel, identical for any workers
+
+    parameters
+        returns, n_sims, seed, dtype, dist, nu
+            see monte_carlo_scenarios
+        workers: int
+            workers the scenario blocks are spread over
+        executor: str | None
+            varlab.executor backend for workers > 1, defaults to
+            $VARLAB_EXECUTOR or 'process'
+
+    returns
+        pd.DataFrame
+            n_sims x N simulated asset returns, columns as in returns
+    """
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    sims = _mc_blocks(_mc_spec(returns, dist, nu, dtype), seed, n_sims, None, workers, executor)
+    return pd.DataFrame(sims, columns=returns.columns, copy=False)
+
+
+def var_monte_carlo_parallel(
+    returns: pd.DataFrame,
+    weights: np.ndarray,
+    alpha: float = 0.99,
+    n_sims: int = 50_000,
+    seed: int = 42,
+    dtype=None,
+    dist: str = "normal",
+    nu: float = 5.0,
+    workers: int = 1,
+    executor: str | None = None,
+) -> float:
+    """
+    Monte Carlo VaR for multi-asset port with scenario blocks spread over workers
+
+    same models as var_monte_carlo_portfolio, but every block of
+    _MC_BLOCK_ROWS scenarios draws from its own SeedSequence child keyed by
+    block index, so the VaR is bit-identical for 1, 4 or 32 workers (it
+    differs from the single-stream var_monte_carlo_portfolio draws). Workers
+    send back only the port returns of their blocks
+
+    parameters
+        returns, weights, alpha, n_sims, seed, dtype, dist, nu
+            see var_monte_carlo_portfolio
+        workers: int
+            workers the scenario blocks are spread over
+        executor: str | None
+            varlab.executor backend for workers > 1, defaults to
+            $VARLAB_EXECUTOR or 'process'
+
+    returns
+        float
+            port VaR positive loss format
+    """
+    w = np.asarray(weights, dtype=float)
+    w = w / w.sum()
+    dtype = np.dtype(get_dtype() if dtype is None else dtype)
+    port = _mc_blocks(_mc_spec(returns, dist, nu, dtype), seed, n_sims, w, workers, executor)
+    return float(-np.quantile(port, 1 - alpha))
+
+
 def var_garch(r: pd.Series, alpha: float = 0.99) -> float:
     """
     1-day-ahead parametric VaR using GARCH(1,1) conditional volatility.
@@ -125,6 +1014,7 @@ def var_garch(r: pd.Series, alpha: float = 0.99) -> float:
             positive VaR value (loss convention)
     """
     from arch import arch_model
+    from scipy.stats import norm
 
     # arch works in percentage space for numerical stability
     scaled = r * 100
@@ -156,7 +1046,8 @@ def var_evt_pot(
     1. Convert returns to losses: L = -r
     2. Choose threshold u = quantile(L, threshold_quantile)
     3. Extract exceedances: e = L[L > u] - u
-    4. Fit GPD(xi, beta) to e using MLE with loc fixed at 0
+    4. Fit GPD(xi, beta) to e using MLE with loc fixed at 0, keeping xi >= -1
+       (evt.fit_gpd, the same restriction as evt.threshold_sweep)
     5. Invert the POT survival function to get VaR at level alpha:
 
            VaR = u + (beta/xi) * [(n/N_u * (1-alpha))^(-xi) - 1]   (xi ≠ 0)
@@ -178,6 +1069,8 @@ def var_evt_pot(
         ValueError
             if fewer than 10 exceedances remain after applying the threshold
     """
+    from varlab.evt import fit_gpd
+
     losses = -r.to_numpy(dtype=float)
     u      = float(np.quantile(losses, threshold_quantile))
 
@@ -187,8 +1080,8 @@ def var_evt_pot(
             f"Only {len(exceedances)} exceedances above threshold — need ≥ 10 for GPD fit."
         )
 
-    # MLE fit with location fixed at 0; returns (shape=xi, loc=0, scale=beta)
-    xi, _, beta = genpareto.fit(exceedances, floc=0)
+    # MLE fit with location fixed at 0: shape xi, scale beta
+    xi, beta = fit_gpd(exceedances)
 
     n   = len(losses)
     n_u = len(exceedances)
@@ -0,0 +1,398 @@
+"""
+Asyncio real-time VaR monitoring with breach alerts.
+
+    import asyncio
+    from varlab.monitor import Monitor, replay_feed
+
+    mon = Monitor({"balanced": {"SPY": 0.6, "TLT": 0.4}, ...}, window=390, alpha=0.99)
+    stats = asyncio.run(mon.run(replay_feed("bars.parquet"), on_alert=print))
+    print(mon.latency_percentiles())
+
+A feed is any async iterable of (timestamp, prices) ticks, prices being a
+mapping (dict, pd.Series) of symbol -> price. Two are included:
+
+    replay_feed    replays a Parquet / CSV price file (data.read_price_chunks),
+                   as fast as possible or paced at a multiple of real time
+    socket_feed    newline-delimited JSON ticks from a TCP (HOST:PORT) or Unix
+                   socket: {"time": "...", "prices": {"SPY": 512.3, ...}}
+
+Each tick becomes asset log returns as in returns.log_returns (a symbol
+missing from a tick keeps its last price; ticks before every symbol has a
+price only warm up), is projected onto every portfolio with one
+matrix-vector product and compared with the VaR forecast made before the
+tick using the exception_series rule, loss = -r_t > VaR_t. The estimators
+are then rolled forward by one return:
+
+    hist     ring buffer of the last `window` returns, np.partition quantile
+    param    running sum / sum of squares, re-summed every `window` ticks
+    ewma     RiskMetrics recursion, seeded with the first window's variance
+
+so VaR at tick t uses the `window` returns ending at t - 1 and matches
+streaming.rolling_var_blocks tick for tick. All portfolios are updated
+together, a tick costs O(portfolios x window) numpy work at most.
+
+The feed is read by its own task into a queue of at most max_pending ticks.
+When the computation falls behind the queue fills and the reader stops
+pulling: a socket feed then leaves ticks in the kernel buffers, so TCP flow
+control slows the sender down, and a file replay simply pauses.
+"""
+
+import asyncio
+import inspect
+import json
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from varlab.precision import get_dtype
+from varlab.returns import normalize_weights
+
+MODELS = ("hist", "param", "ewma")
+
+_LATENCY_KEEP = 100_000 # latencies kept for the percentiles, most recent ticks
+
+
+async def replay_feed(
+    path: str,
+    speed: float | None = None,
+    columns: list[str] | None = None,
+    chunk_rows: int = 100_000,
+) -> AsyncIterator[tuple[pd.Timestamp, dict[str, float]]]:
+    """
+    replays a Parquet / CSV price file as a tick feed
+
+    parameters
+        path: str
+            price file, see data.read_price_chunks
+        speed: float | None
+            None replays as fast as the consumer keeps up; otherwise the
+            recorded spacing between bars is divided by speed (1.0 = real time)
+        columns: list[str] | None
+            symbols to read, defaults to all of them
+        chunk_rows: int
+            price rows read per chunk
+
+    yields
+        (timestamp, {symbol: price})
+    """
+    from varlab.data import read_price_chunks
+
+    prev = None
+    for chunk in read_price_chunks(path, chunk_rows=chunk_rows, columns=columns):
+        symbols = list(chunk.columns)
+        for ts, row in zip(chunk.index, chunk.to_numpy(dtype=float)):
+            if speed and prev is not None:
+                await asyncio.sleep(max((ts - prev).total_seconds() / speed, 0.0))
+            else:
+                await asyncio.sleep(0) # hand the loop to the consumer between ticks
+            prev = ts
+            yield ts, dict(zip(symbols, row))
+
+
+async def socket_feed(
+    address: str,
+    limit: int = 2 ** 20,
+) -> AsyncIterator[tuple[pd.Timestamp, dict[str, float]]]:
+    """
+    ticks from a socket sending one JSON object per line
+
+        {"time": "2024-03-01T14:30:00", "prices": {"SPY": 512.3, "TLT": 93.1}}
+
+    "time" is optional (the arrival time is used instead). The feed ends when
+    the sender closes the connection.
+
+    parameters
+        address: str
+            HOST:PORT for TCP, anything else is a Unix socket path
+        limit: int
+            longest accepted line in bytes
+
+    yields
+        (timestamp, {symbol: price})
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        reader, writer = await asyncio.open_connection(host, int(port), limit=limit)
+    else:
+        reader, writer = await asyncio.open_unix_connection(address, limit=limit)
+
+    try:
+        async for line in reader:
+            if not line.strip():
+                continue
+            msg = json.loads(line)
+            ts = pd.Timestamp(msg["time"]) if "time" in msg else pd.Timestamp.now()
+            yield ts, msg["prices"]
+    finally:
+        writer.close()
+
+
+class Monitor:
+    """
+    incremental VaR / ES for many portfolios over a live tick stream
+
+    parameters
+        portfolios: dict[str, dict[str, float]]
+            portfolio name -> {ticker: weight} (weights auto-normalised)
+        window: int
+            rolling window length in ticks
+        alpha: float
+            confidence level
+        models: iterable of str
+            any of MODELS
+        lam: float
+            EWMA decay factor ('ewma' only)
+        max_pending: int
+            ticks queued between the feed and the computation before the
+            feed is paused (see run)
+    """
+
+    def __init__(
+        self,
+        portfolios: dict[str, dict[str, float]],
+        window: int = 250,
+        alpha: float = 0.99,
+        models: Iterable[str] = MODELS,
+        lam: float = 0.94,
+        max_pending: int = 1024,
+    ):
+        from scipy.stats import norm
+
+        self.models = list(models)
+        unknown = set(self.models) - set(MODELS)
+        if unknown:
+            raise ValueError(f"Unknown models {sorted(unknown)}. Use any of {MODELS}.")
+        if not portfolios:
+            raise ValueError("At least one portfolio is required.")
+        if window < 2:
+            raise ValueError(f"window must be at least 2, got {window}.")
+
+        self.names = list(portfolios)
+        self.tickers = list(dict.fromkeys(t for w in portfolios.values() for t in w))
+        col = {t: j for j, t in enumerate(self.tickers)}
+        weights = np.zeros((len(self.names), len(self.tickers)))
+        for i, w in enumerate(portfolios.values()):
+            weights[i, [col[t] for t in w]] = normalize_weights(np.array(list(w.values()), dtype=float))
+        self.weights = weights
+
+        self.window = window
+        self.alpha = alpha
+        self.lam = lam
+        self.max_pending = max_pending
+
+        z = norm.ppf(1 - alpha)
+        self._z = z
+        self._es_k = norm.pdf(z) / (1 - alpha) # Normal ES = -mu + sd * pdf(z) / (1 - alpha)
+        self._h = (window - 1) * (1 - alpha)   # linear-interpolation quantile position, as in pandas
+        self._lo = int(np.floor(self._h))
+        self._hi = min(self._lo + 1, window - 1)
+
+        n_port = len(self.names)
+        self._last = np.full(len(self.tickers), np.nan)  # last price per symbol
+        self._buf = np.zeros((n_port, window))           # last `window` portfolio returns
+        self._pos = 0                                    # next ring-buffer slot
+        self._n = 0                                      # portfolio returns seen
+        self._shift = None                               # first return, keeps the running sums small
+        self._s1 = np.zeros(n_port)
+        self._s2 = np.zeros(n_port)
+        self._sigma2 = None                              # EWMA variance of the next tick, once seeded
+
+        self.var = {m: np.full(n_port, np.nan) for m in self.models}
+        self.es = {m: np.full(n_port, np.nan) for m in self.models}
+        self.ticks = 0
+        self.alerts = 0
+        self._lat = np.full((2, _LATENCY_KEEP), np.nan)  # queue wait, compute per tick
+
+    def update(self, timestamp, prices: Mapping[str, float]) -> list[dict]:
+        """
+        processes one tick
+
+        the realised portfolio losses are checked against the current
+        forecasts first, then the forecasts are rolled forward
+
+        parameters
+            timestamp
+                tick time, copied into the alerts
+            prices: Mapping[str, float]
+                symbol -> price; symbols not in the portfolios are ignored
+
+        returns
+            list[dict]
+                one alert per (portfolio, model) whose VaR was exceeded, with
+                keys time, portfolio, model, loss, var, es
+        """
+        p = np.fromiter((prices.get(t, np.nan) for t in self.tickers), dtype=float, count=len(self.tickers))
+        p = np.where(np.isnan(p), self._last, p)
+        prev, self._last = self._last, p
+        self.ticks += 1
+
+        r = np.log(p / prev).astype(get_dtype())
+        if np.isnan(r).any():
+            return [] # first tick of a symbol, dropped as log_returns drops the first row
+
+        y = self.weights @ r.astype(float)
+        loss = -y
+        alerts = []
+        for m in self.models:
+            v = self.var[m]
+            for i in np.flatnonzero(loss > v): # NaN forecasts (warm-up) never breach
+                alerts.append({
+                    "time": timestamp, "portfolio": self.names[i], "model": m,
+                    "loss": float(loss[i]), "var": float(v[i]), "es": float(self.es[m][i]),
+                })
+        self.alerts += len(alerts)
+
+        self._push(y)
+        return alerts
+
+    def _push(self, y: np.ndarray) -> None:
+        """adds one portfolio return per portfolio and refreshes the forecasts"""
+        w = self.window
+        old = self._buf[:, self._pos].copy()
+        self._buf[:, self._pos] = y
+        self._pos = (self._pos + 1) % w
+        self._n += 1
+
+        if "param" in self.models:
+            if self._shift is None:
+                self._shift = y.copy()
+            d = y - self._shift
+            if self._n > w:
+                d_old = old - self._shift
+                self._s1 += d - d_old
+                self._s2 += d * d - d_old * d_old
+            else:
+                self._s1 += d
+                self._s2 += d * d
+            if self._n % w == 0:
+                # re-sum from the buffer so add / subtract rounding cannot build up
+                dev = self._buf - self._shift[:, None]
+                self._s1 = dev.sum(axis=1)
+                self._s2 = (dev * dev).sum(axis=1)
+
+        if "ewma" in self.models:
+            if self._sigma2 is not None:
+                self._sigma2 = self.lam * self._sigma2 + (1 - self.lam) * y * y
+            elif self._n == w:
+                # the ring has not wrapped yet, so the buffer is the first window in order
+                s2 = self._buf.var(axis=1, ddof=1)
+                for j in range(w):
+                    s2 = self.lam * s2 + (1 - self.lam) * self._buf[:, j] ** 2
+                self._sigma2 = s2
+
+        if self._n >= w:
+            self._forecast()
+
+    def _forecast(self) -> None:
+        """VaR / ES for the next tick from the current state"""
+        w = self.window
+        if "hist" in self.models:
+            part = np.partition(self._buf, [self._lo, self._hi], axis=1)
+            q = part[:, self._lo] + (self._h - self._lo) * (part[:, self._hi] - part[:, self._lo])
+            tail = self._buf <= q[:, None] # as models.cvar_historical: returns at or below the cutoff
+            self.var["hist"] = -q
+            self.es["hist"] = -(self._buf * tail).sum(axis=1) / tail.sum(axis=1)
+        if "param" in self.models:
+            mu = self._shift + self._s1 / w
+            sd = np.sqrt(np.maximum(self._s2 - self._s1 ** 2 / w, 0.0) / (w - 1))
+            self.var["param"] = -(mu + self._z * sd)
+            self.es["param"] = -mu + self._es_k * sd
+        if "ewma" in self.models:
+            sd = np.sqrt(self._sigma2)
+            self.var["ewma"] = -self._z * sd
+            self.es["ewma"] = self._es_k * sd
+
+    def snapshot(self) -> pd.DataFrame:
+        """current VaR_<model> / ES_<model> forecasts, one row per portfolio"""
+        cols = {}
+        for m in self.models:
+            cols[f"VaR_{m}"] = self.var[m]
+            cols[f"ES_{m}"] = self.es[m]
+        return pd.DataFrame(cols, index=pd.Index(self.names, name="portfolio"))
+
+    async def run(
+        self,
+        feed: AsyncIterable[tuple],
+        on_alert: Callable[[dict], object] | None = None,
+    ) -> dict:
+        """
+        consumes a feed until it ends
+
+        the feed is read by its own task into a queue of at most max_pending
+        ticks; while the queue is full the reader awaits instead of pulling
+        more ticks (backpressure)
+
+        parameters
+            feed: AsyncIterable[tuple]
+                (timestamp, prices) ticks, e.g. replay_feed / socket_feed
+            on_alert: Callable[[dict], object] | None
+                called with every alert (see update); coroutine functions
+                are awaited, so a slow sink also pushes back on the feed
+
+        returns
+            dict
+                ticks, alerts, seconds, ticks_per_sec, stalls (ticks that
+                found the queue full) and max_queue (deepest backlog seen)
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.max_pending)
+        stats = {"stalls": 0, "max_queue": 0}
+        ticks0, alerts0 = self.ticks, self.alerts
+
+        async def read():
+            async for tick in feed:
+                if queue.full():
+                    stats["stalls"] += 1
+                await queue.put((time.perf_counter(), tick))
+                stats["max_queue"] = max(stats["max_queue"], queue.qsize())
+            await queue.put(None)
+
+        async def compute():
+            while (item := await queue.get()) is not None:
+                received, (ts, prices) = item
+                start = time.perf_counter()
+                for alert in self.update(ts, prices):
+                    if on_alert is not None:
+                        res = on_alert(alert)
+                        if inspect.isawaitable(res):
+                            await res
+                slot = (self.ticks - 1) % _LATENCY_KEEP
+                self._lat[0, slot] = start - received
+                self._lat[1, slot] = time.perf_counter() - start
+                await asyncio.sleep(0) # let the reader refill the queue
+
+        t0 = time.perf_counter()
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(read())
+            tg.create_task(compute())
+        seconds = time.perf_counter() - t0
+
+        ticks = self.ticks - ticks0
+        return {
+            "ticks": ticks,
+            "alerts": self.alerts - alerts0,
+            "seconds": seconds,
+            "ticks_per_sec": ticks / seconds if seconds > 0 else float("nan"),
+            **stats,
+        }
+
+    def latency_percentiles(self, q: Iterable[float] = (50, 90, 99, 99.9)) -> pd.DataFrame:
+        """
+        latency of the most recent ticks handled by run, in seconds
+
+        rows
+            queue     tick read from the feed -> computation starts
+            compute   update plus alert delivery
+            total     end to end, feed -> alerts delivered
+        """
+        q = list(q)
+        lat = self._lat[:, ~np.isnan(self._lat[0])]
+        rows = {"queue": lat[0], "compute": lat[1], "total": lat[0] + lat[1]}
+        cols = [f"p{x:g}" for x in q] + ["max"]
+        if lat.shape[1] == 0:
+            return pd.DataFrame(np.nan, index=list(rows), columns=cols)
+        return pd.DataFrame(
+            [np.append(np.percentile(v, q), v.max()) for v in rows.values()],
+            index=list(rows), columns=cols,
+        )
@@ -1,6 +1,12 @@
-import matplotlib.pyplot as plt
+import os
+import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from varlab.executor import get_executor
+
 def plot_var_backtest(df: pd.DataFrame, title: str):
     """
     plots realized losses against one or more VaR estimates.
@@ -16,7 +22,8 @@ def plot_var_backtest(df: pd.DataFrame, title: str):
         title: str
             plot title
     """
-    
+    import matplotlib.pyplot as plt # deferred, matplotlib is slow to import
+
     plt.figure() # create new figure, avoids overwriting 
     
     plt.plot(
@@ -52,4 +59,173 @@ def plot_var_backtest(df: pd.DataFrame, title: str):
     plt.legend() # displays legend to distinguish plotted series
     plt.tight_layout() # adjust spacing to prevent label/title overlap
 
-    plt.show() # render plot 
+    plt.show() # render plot
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Headless rendering
+# Uses the Agg canvas directly (no pyplot, no GUI event loop) so charts can be
+# written from batch jobs and worker processes.
+# ─────────────────────────────────────────────────────────────────────────────
+
+_LABELS = {
+    "Loss":      "Realized Loss (-r)",
+    "VaR_hist":  "VaR (Historical)",
+    "VaR_param": "VaR (Parametric Normal)",
+    "VaR_mc":    "VaR (Monte Carlo)",
+    "VaR_garch": "VaR (GARCH(1,1))",
+    "VaR_evt":   "VaR (EVT-POT)",
+}
+
+# one figure per process, cleared and redrawn for every chart
+_FIG = None
+
+
+def decimate_minmax(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    positions of a min / max decimation of y
+
+    splits y into max_points // 2 equal buckets and keeps the position of the
+    minimum and maximum in each bucket, so loss spikes (exceptions) survive
+    downsampling while a 10-year daily series draws only ~max_points vertices.
+
+    parameters
+        y: np.ndarray
+            1D series (NaNs are ignored)
+        max_points: int
+            upper bound on returned positions
+
+    returns
+        np.ndarray
+            sorted integer positions into y
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    n_buckets = max(max_points // 2, 1)
+    size = -(-n // n_buckets) # ceil division
+    pad = n_buckets * size - n
+
+    # NaNs (and padding) must never win the argmin / argmax of a bucket
+    lo = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(pad, np.inf)])
+    hi = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(pad, -np.inf)])
+    base = np.arange(n_buckets) * size
+    i_min = base + lo.reshape(n_buckets, size).argmin(axis=1)
+    i_max = base + hi.reshape(n_buckets, size).argmax(axis=1)
+
+    return np.unique(np.minimum(np.concatenate([i_min, i_max]), n - 1))
+
+
+def render_var_backtest(
+    df: pd.DataFrame,
+    title: str,
+    path: str | os.PathLike,
+    max_points: int | None = 2000,
+    dpi: int = 100,
+):
+    """
+    writes the plot_var_backtest chart straight to a PNG / SVG / PDF file
+
+    parameters
+        df: pd.DataFrame
+            Loss plus any of the VaR_* columns, datetime-like index
+        title: str
+            chart title
+        path: str | os.PathLike
+            output file, format taken from the suffix
+        max_points: int | None
+            per-line vertex budget for min / max decimation, None draws every point
+        dpi: int
+            raster resolution
+    """
+    global _FIG
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if _FIG is None:
+        _FIG = Figure(figsize=(10, 5))
+        FigureCanvasAgg(_FIG)
+    fig = _FIG
+    fig.clf()
+    ax = fig.add_subplot()
+
+    x = df.index.to_numpy()
+    for col, label in _LABELS.items():
+        if col not in df.columns:
+            continue
+        y = df[col].to_numpy(dtype=float)
+        pos = decimate_minmax(y, max_points) if max_points else slice(None)
+        ax.plot(
+            x[pos], y[pos],
+            label=label,
+            linewidth=0.6 if col == "Loss" else 1.2,
+            color="#7f8c8d" if col == "Loss" else None,
+        )
+
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Loss / VaR")
+    ax.legend(loc="upper left", fontsize="small")
+    # fixed margins instead of tight_layout, which costs an extra full draw per chart
+    fig.subplots_adjust(left=0.08, right=0.98, top=0.92, bottom=0.11)
+    fig.savefig(path, dpi=dpi)
+
+
+def _render_job(job: tuple, out_dir: str, fmt: str, max_points: int | None, dpi: int) -> None:
+    name, df, title = job
+    render_var_backtest(df, title, Path(out_dir) / f"{name}.{fmt}", max_points=max_points, dpi=dpi)
+
+
+def render_many(
+    jobs,
+    out_dir: str | os.PathLike,
+    fmt: str = "png",
+    workers: int | None = None,
+    max_points: int | None = 2000,
+    dpi: int = 100,
+    executor: str | None = None,
+) -> dict:
+    """
+    renders many backtest charts across worker processes (varlab.executor)
+
+    parameters
+        jobs: iterable of (name, df, title)
+            one chart per tuple, written to <out_dir>/<name>.<fmt>
+        out_dir: str | os.PathLike
+            output directory, created if missing
+        fmt: str
+            'png', 'svg' or 'pdf'
+        workers: int | None
+            process count, defaults to os.cpu_count(); 1 renders in-process
+        max_points: int | None
+            decimation budget per line (see render_var_backtest)
+        dpi: int
+            raster resolution
+        executor: str | None
+            executor backend, defaults to $VARLAB_EXECUTOR or 'process'
+
+    returns
+        dict
+            charts, wall-clock seconds, charts_per_sec and the median / p95
+            per-chart render time in seconds
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    jobs = list(jobs)
+    args = (str(out_dir), fmt, max_points, dpi)
+
+    t0 = time.perf_counter()
+    with get_executor(executor, workers) as pool:
+        for f in [pool.submit(_render_job, job, *args) for job in jobs]:
+            f.result()
+        per_chart = pool.timings()["seconds"].to_numpy()
+    elapsed = time.perf_counter() - t0
+
+    per_chart = per_chart if len(per_chart) else np.zeros(1)
+    return {
+        "charts":         len(jobs),
+        "seconds":        elapsed,
+        "charts_per_sec": len(jobs) / elapsed if elapsed > 0 else float("inf"),
+        "median_chart_s": float(np.median(per_chart)),
+        "p95_chart_s":    float(np.quantile(per_chart, 0.95)),
+    }
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from varlab.precision import get_dtype
+
 def log_returns(prices: pd.DataFrame) -> pd.DataFrame:
     """
     computes log returns from price levels
@@ -14,10 +16,12 @@ def log_returns(prices: pd.DataFrame) -> pd.DataFrame:
 
     returns
         pd.DateFrame
-            log returns with the same columns
+            log returns with the same columns, stored in the pipeline dtype
+            (see varlab.precision)
     
     """
-    return np.log(prices / prices.shift(1)).dropna() 
+    prices = prices.astype(np.float64) # take the log in float64, only storage follows the pipeline dtype
+    return np.log(prices / prices.shift(1)).dropna().astype(get_dtype()) 
     # moves prices down by one row
     # aligns each prices with previous period value
     # computes gross returns    
@@ -64,4 +68,31 @@ def portfolio_returns(returns: pd.DataFrame, weights: np.ndarray) -> pd.Series:
     if returns.shape[1] != len(w): # ensure num of assets matches num of weights
         raise ValueError("weights length must match number of assets") # throw exception
 
+    w = w.astype(get_dtype()) # float32 weights keep a float32 return matrix from being upcast
     return returns @ w # matrix multiplication, each row computes weighted sum of asset returns
+
+def log_returns_chunked(price_chunks):
+    """
+    log returns of a price stream, one block per price chunk
+
+    the last price row of each chunk is carried into the next one, so the
+    concatenated blocks equal log_returns(pd.concat(price_chunks)) exactly
+    while only one chunk is ever held in memory
+
+    parameters
+        price_chunks: iterable of pd.DataFrame
+            consecutive price chunks with identical columns (e.g.
+            data.read_price_chunks)
+
+    yields
+        pd.DataFrame
+            log returns of the chunk's rows, in the pipeline dtype
+    """
+    carry = None
+    for chunk in price_chunks:
+        prices = chunk if carry is None else pd.concat([carry, chunk])
+        if len(chunk):
+            carry = chunk.iloc[-1:]
+        block = log_returns(prices)
+        if len(block):
+            yield block
@@ -0,0 +1,85 @@
+import pandas as pd
+from varlab.data import get_prices
+from varlab.returns import log_returns, portfolio_returns
+from varlab.backtest import exception_series, kupiec_pof_test, christoffersen_cc_test
+
+
+def main(
+    tickers: list[str] | None = None,
+    weights: list[float] | None = None,
+    start: str = "2015-01-01",
+    alphas: list[float] | None = None,
+    windows: list[int] | None = None,
+) -> pd.DataFrame:
+    """
+    grid backtest of rolling Historical and Parametric VaR over confidence levels and windows
+
+    prices are downloaded and converted to port returns once, every (alpha, window)
+    combination is then backtested on the same return series
+
+    parameters
+        tickers: list[str] | None
+            asset universe, defaults to SPY / QQQ / TLT / GLD
+        weights: list[float] | None
+            port weights aligned with tickers, defaults to 0.4 / 0.3 / 0.2 / 0.1
+        start: str
+            start date for historical data (YYYY-MM-DD)
+        alphas: list[float] | None
+            confidence levels to test, defaults to 0.95 / 0.99
+        windows: list[int] | None
+            rolling window lengths in trading days, defaults to 125 / 250 / 500
+
+    returns
+        pd.DataFrame
+            one row per (alpha, window, model) with Kupiec and conditional coverage results
+    """
+    from scipy.stats import norm
+
+    if tickers is None:
+        tickers = ["SPY", "QQQ", "TLT", "GLD"]
+    if weights is None:
+        weights = [0.4, 0.3, 0.2, 0.1]
+    if alphas is None:
+        alphas = [0.95, 0.99]
+    if windows is None:
+        windows = [125, 250, 500]
+
+    prices = get_prices(tickers, start=start)
+    port_r = portfolio_returns(log_returns(prices), weights)
+
+    rows = []
+    for window in windows:
+        # rolling moments do not depend on alpha, compute them once per window
+        mu = port_r.rolling(window).mean()
+        sigma = port_r.rolling(window).std(ddof=1)
+
+        for alpha in alphas:
+            var_models = {
+                "Historical": -port_r.rolling(window).quantile(1 - alpha),
+                "Parametric": -(mu + norm.ppf(1 - alpha) * sigma),
+            }
+            for model, var in var_models.items():
+                exc = exception_series(port_r, var)
+                pof = kupiec_pof_test(exc, alpha)
+                cc = christoffersen_cc_test(exc, alpha)
+                rows.append({
+                    "alpha": alpha,
+                    "window": window,
+                    "model": model,
+                    "exceptions": pof["exceptions"],
+                    "n": pof["n"],
+                    "hit_rate": pof.get("hit_rate", float("nan")),
+                    "p_pof": pof["p_value"],
+                    "p_cc": cc["p_value"],
+                })
+
+    results = pd.DataFrame(rows)
+
+    print(f"\nGrid VaR Backtest: {tickers} | weights={weights}")
+    print(results.to_string(index=False))
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,66 @@
 import pandas as pd
 from varlab.data import get_prices
 from varlab.returns import log_returns, portfolio_returns
-from varlab.models import var_monte_carlo_portfolio
-from varlab.backtest import exception_series, kupiec_pof_test
-from varlab.plots import plot_var_backtest
-from scipy.stats import norm
+from varlab.models import var_monte_carlo_normal
+from varlab.kernels import rolling_mean_cov
+from varlab.backtest import exception_matrix, kupiec_pof_test
+from varlab.executor import get_executor, shared
+from varlab.precision import get_dtype
 
-def main():
+def _var_hist(port_r: pd.Series, alpha: float, window: int, start: int = 0) -> pd.Series:
+    """rolling historical VaR for port_r.index[start:], looking back one window"""
+    lo = max(start - window + 1, 0)
+    return -port_r.iloc[lo:].rolling(window).quantile(1 - alpha).iloc[start - lo :] # rolling empirical (1 - alpha) quantile of port returns
+
+def _var_param(port_r: pd.Series, alpha: float, window: int, start: int = 0) -> pd.Series:
+    """rolling parametric Normal VaR for port_r.index[start:], looking back one window"""
+    from scipy.stats import norm
+
+    lo = max(start - window + 1, 0)
+    r = port_r.iloc[lo:]
+    z = norm.ppf(1 - alpha) # z score for parametric norm VaR
+    mu = r.rolling(window).mean() # rolling mean of port returns
+    sigma = r.rolling(window).std(ddof=1) # rolling vol (sample sd)
+    return -(mu + z * sigma).iloc[start - lo :] # parametric norm VaR form, VaR = -(mu + z * sd)
+
+def _mc_block(lo: int, hi: int, weights: list[float], alpha: float, n_sims: int) -> list[float]:
+    """Monte Carlo VaR for rows lo..hi of the shared rolling moments"""
+    mu_roll, cov_roll = shared("mu"), shared("cov")
+    return [var_monte_carlo_normal(mu_roll[j], cov_roll[j], weights, alpha=alpha, n_sims=n_sims, seed=42)
+            for j in range(lo, hi)] # compute Monte Carlo VaR for port
+
+def _var_mc(
+    rets: pd.DataFrame, weights: list[float], alpha: float, window: int, n_sims: int, start: int = 0,
+    workers: int = 1, executor: str | None = None,
+) -> pd.Series:
+    """
+    rolling Monte Carlo VaR for rets.index[start:], the row for date i simulates from rets.iloc[i-window:i]
+
+    windows are split into contiguous blocks over a varlab.executor backend;
+    every window keeps seed 42, so the result does not depend on workers
+    """
+    first = max(start, window)
+    # mean vector and covariance of every window in one pass, row j <-> rets.iloc[first-window+j : first+j]
+    mu_roll, cov_roll = rolling_mean_cov(rets.iloc[first - window :], window)
+
+    with get_executor(executor, workers, shared={"mu": mu_roll, "cov": cov_roll}) as ex:
+        blocks = ex.map_ranges(_mc_block, len(rets) - first, list(weights), alpha, n_sims)
+    var_mc = [v for block in blocks for v in block] # rolling Monte Carlo VaR values in date order
+
+    return pd.Series(var_mc, index=rets.index[first:], name="VaR_mc", dtype=float) # convert Monte Carlo to panda Series
+
+def main(
+    tickers: list[str] | None = None,
+    weights: list[float] | None = None,
+    start: str = "2015-01-01",
+    alpha: float = 0.99,
+    window: int = 250,
+    n_sims: int = 25_000,
+    plot: bool = True,
+    store: str | None = None,
+    workers: int = 1,
+    executor: str | None = None,
+) -> pd.DataFrame:
     """
     end to end rolling VaR backtesting pipeline for multi asset port
 
@@ -17,64 +71,87 @@ def main():
         compute rolling VaR (Hist, Para, MC)
         backtest VaR models using POF
         plot results
+
+    parameters
+        tickers: list[str] | None
+            asset universe, defaults to SPY / QQQ / TLT / GLD
+        weights: list[float] | None
+            port weights aligned with tickers, defaults to 0.4 / 0.3 / 0.2 / 0.1
+        start: str
+            start date for historical data (YYYY-MM-DD)
+        alpha: float
+            confidence level
+        window: int
+            rolling window length in trading days
+        n_sims: int
+            Monte Carlo simulations per window
+        plot: bool
+            show the backtest chart when finished
+        store: str | None
+            SQLite results store (see varlab.store); when given, VaR series
+            from earlier runs are reused and only newly appended dates are
+            computed
+        workers: int
+            Monte Carlo windows are spread over this many workers
+        executor: str | None
+            varlab.executor backend for workers > 1, defaults to
+            $VARLAB_EXECUTOR or 'process'
+
+    returns
+        pd.DataFrame
+            realized losses and rolling VaR estimates per model
     """
-    tickers = ["SPY", "QQQ", "TLT", "GLD"] # asset universe
-    weights = [0.4, 0.3, 0.2, 0.1]   # port weights must align with tickers order
-    start = "2015-01-01" # start date for historical data
-    alpha = 0.99 # confidence level (99%)
-    window = 250 # ~1 trading year
+    if tickers is None:
+        tickers = ["SPY", "QQQ", "TLT", "GLD"] # asset universe
+    if weights is None:
+        weights = [0.4, 0.3, 0.2, 0.1]   # port weights must align with tickers order
 
     prices = get_prices(tickers, start=start) # download adjusted price data
     rets = log_returns(prices) # convert price levels to log returns
 
     port_r = portfolio_returns(rets, weights) # compute port return series using normlized weights
 
-    var_hist = -port_r.rolling(window).quantile(1 - alpha) # rolling empirical (1 - alpha) quantile of port returns
-    z = norm.ppf(1 - alpha) # z score for parametric norm VaR
-    mu = port_r.rolling(window).mean() # rolling mean of port returns
-    sigma = port_r.rolling(window).std(ddof=1) # rolling vol (sample sd)
-    var_param = -(mu + z * sigma) # parametric norm VaR form, VaR = -(mu + z * sd)
-
-    var_mc = [] # declared list to store rolling Monte Carlo VaR values
-    idx = [] # and dates
-    
-    for i in range(window, len(rets)): # loop through time using a rolling window
-        w_rets = rets.iloc[i-window:i]  # extract rolling window of asset returns
-        v = var_monte_carlo_portfolio(
-            w_rets,
-            weights,
-            alpha=alpha, 
-            n_sims=25_000,
-            seed=42
-        ) # compute Monte Carlo VaR for port
-        
-        var_mc.append(v) # store results
-        idx.append(rets.index[i]) 
-
-    var_mc = pd.Series(var_mc, index=idx, name="VaR_mc") # convert Monte Carlo to panda Series
+    compute = {
+        "VaR_hist":  lambda r, s: _var_hist(portfolio_returns(r, weights), alpha, window, s),
+        "VaR_param": lambda r, s: _var_param(portfolio_returns(r, weights), alpha, window, s),
+        "VaR_mc":    lambda r, s: _var_mc(r, weights, alpha, window, n_sims, s, workers, executor),
+    }
+    if store is None:
+        var = {name: fn(rets, 0) for name, fn in compute.items()}
+    else:
+        from varlab.store import cached_series
+
+        # float32 runs round differently and draw MC normals with another RNG
+        # routine (varlab.precision), so they must never top up a float64 series
+        params = {"tickers": list(rets.columns), "weights": list(weights), "alpha": alpha,
+                  "window": window, "n_sims": n_sims, "seed": 42, "dtype": get_dtype().name}
+        var = {name: cached_series(store, name, params, rets, fn) for name, fn in compute.items()}
 
     out = pd.DataFrame({ # combine realized losses and VaR estimates
         "Loss": -port_r, # realized losses (positive)
-        "VaR_hist": var_hist,
-        "VaR_param": var_param,
-    }).join(var_mc, how="inner").dropna()
+        "VaR_hist": var["VaR_hist"],
+        "VaR_param": var["VaR_param"],
+    }).join(var["VaR_mc"].rename("VaR_mc"), how="inner").dropna()
 
-    # compute exception series for each VaR model
-    exc_hist = exception_series(port_r, out["VaR_hist"])
-    exc_param = exception_series(port_r, out["VaR_param"])
-    exc_mc = exception_series(port_r, out["VaR_mc"])
+    # compute exception series for every VaR model in one aligned pass
+    exc = exception_matrix(port_r, out[["VaR_hist", "VaR_param", "VaR_mc"]])
 
     print(f"\nPortfolio VaR Backtest: {tickers} | weights={weights} | alpha={alpha} | window={window}")
     # freq backtesting for each VaR method
-    print("Historical:", kupiec_pof_test(exc_hist, alpha))
-    print("Parametric:", kupiec_pof_test(exc_param, alpha))
-    print("MonteCarlo:", kupiec_pof_test(exc_mc, alpha))
+    print("Historical:", kupiec_pof_test(exc["VaR_hist"], alpha))
+    print("Parametric:", kupiec_pof_test(exc["VaR_param"], alpha))
+    print("MonteCarlo:", kupiec_pof_test(exc["VaR_mc"], alpha))
 
     # visualization
-    plot_var_backtest(
-        out, 
-        f"Rolling 1-Day Portfolio VaR (alpha={alpha}, window={window})"
-    )
+    if plot:
+        from varlab.plots import plot_var_backtest
+
+        plot_var_backtest(
+            out, 
+            f"Rolling 1-Day Portfolio VaR (alpha={alpha}, window={window})"
+        )
+
+    return out
 
 if __name__ == "__main__": # ensures main() only runs when script is run directly
     main()
@@ -2,19 +2,35 @@ import pandas as pd
 from varlab.data import get_prices
 from varlab.returns import log_returns
 from varlab.backtest import exception_series, kupiec_pof_test
-from varlab.plots import plot_var_backtest
-from scipy.stats import norm
 
-def main():
+def main(
+    ticker: str = "SPY",
+    start: str = "2015-01-01",
+    alpha: float = 0.99,
+    window: int = 250,
+    plot: bool = True,
+) -> pd.DataFrame:
     """
     rolling 1 day VaR backtest for single asset
     evals historical and parametric VaR using a fixed rolling window and valdiates models using POF
+
+    parameters
+        ticker: str
+            single asset ticker
+        start: str
+            start date for historical data (YYYY-MM-DD)
+        alpha: float
+            confidence level
+        window: int
+            rolling window length in trading days (~ 1 trading year)
+        plot: bool
+            show the backtest chart when finished
+
+    returns
+        pd.DataFrame
+            realized losses and rolling VaR estimates per model
     """
-    
-    ticker = "SPY" # single asset ticker
-    start = "2015-01-01" # start date for historical data
-    alpha = 0.99 # confidence level
-    window = 250 # ~ 1 trading year
+    from scipy.stats import norm
 
     prices = get_prices([ticker], start=start) # download adjusted price data for the asset
     r = log_returns(prices)[ticker] # compute log returns and extract the single asset Series
@@ -39,8 +55,8 @@ def main():
 
     
     print(
-        f"\nSingle-Asset VaR Backtest: {ticker} | 
-        alpha={alpha} | window={window}"
+        f"\nSingle-Asset VaR Backtest: {ticker} | "
+        f"alpha={alpha} | window={window}"
     )
 
     # test whether exception freq matches expectation
@@ -48,7 +64,12 @@ def main():
     print("Parametric:", kupiec_pof_test(exc_param, alpha))
 
     # plot realized losses against rolling VaR estimates
-    plot_var_backtest(out, f"Rolling 1-Day VaR Backtest: {ticker} (alpha={alpha}, window={window})")
+    if plot:
+        from varlab.plots import plot_var_backtest
+
+        plot_var_backtest(out, f"Rolling 1-Day VaR Backtest: {ticker} (alpha={alpha}, window={window})")
+
+    return out
 
 # only runs when executed directly
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""
+Local results store for rolling VaR series, with incremental top-up.
+
+    from varlab.store import cached_series
+
+    var = cached_series(
+        "results.sqlite", "VaR_mc",
+        {"weights": w, "alpha": 0.99, "window": 250, "dtype": get_dtype().name},
+        rets, lambda rets, start: rolling_mc_var(rets, start),
+    )
+
+A series is stored under a key built from (model, parameters, code
+version). The parameters must include everything that changes the values,
+the pipeline dtype (varlab.precision) among them. Next to it the store keeps a fingerprint of the returns it was
+computed from (a hash of the dates and values) and the number of rows
+covered. On the next call:
+
+  * same key, and the first n rows of the new returns hash to the stored
+    fingerprint: the history is unchanged, only rows n.. are new, so
+    compute(rets, n) runs for those dates alone and they are appended
+  * same key, nothing new: the stored series is returned, nothing runs
+  * anything else (revised history, different weights / parameters, a new
+    varlab version or edited source): the key's series is recomputed in full
+
+Everything lives in one SQLite file (stdlib, no extra dependency); each
+call is one transaction, so an interrupted run leaves the previous state
+intact and re-running is always safe.
+
+The compute contract: compute(rets, start) returns a pd.Series of VaR
+values for dates in rets.index[start:] (it may look back before `start`
+for its estimation windows); start is 0 for a full recompute.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    key          TEXT PRIMARY KEY,
+    model        TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    code_version TEXT NOT NULL,
+    fingerprint  TEXT NOT NULL,
+    n_obs        INTEGER NOT NULL,
+    updated      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series (
+    key   TEXT NOT NULL,
+    date  TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (key, date)
+) WITHOUT ROWID;
+"""
+
+_CODE_VERSION: str | None = None
+
+
+def code_version() -> str:
+    """
+    installed varlab version plus a short hash of the package's source files
+
+    editing any module invalidates stored results even without a version bump
+    """
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        try:
+            version = metadata.version("varlab")
+        except metadata.PackageNotFoundError:
+            version = "0+unknown"
+        h = hashlib.sha256()
+        for path in sorted(Path(__file__).parent.glob("*.py")):
+            h.update(path.name.encode())
+            h.update(path.read_bytes())
+        _CODE_VERSION = f"{version}+{h.hexdigest()[:12]}"
+    return _CODE_VERSION
+
+
+def returns_fingerprint(returns: pd.DataFrame | pd.Series) -> str:
+    """
+    hash of a return history's dates, columns and values
+
+    values are rounded to 12 decimals first so that re-downloaded prices that
+    differ only in the last bits of a float still match
+    """
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in frame.columns]).encode())
+    h.update(np.asarray(frame.index.astype("int64") if isinstance(frame.index, pd.DatetimeIndex)
+                        else frame.index.astype(str)).tobytes())
+    h.update(np.ascontiguousarray(np.round(frame.to_numpy(dtype=np.float64), 12)).tobytes())
+    return h.hexdigest()
+
+
+def series_key(model: str, params: dict, version: str | None = None) -> str:
+    """store key of a model / parameter set under a code version"""
+    payload = json.dumps(
+        {"model": model, "params": params, "code_version": version or code_version()},
+        sort_keys=True,
+        default=lambda x: np.asarray(x).tolist(), # numpy arrays / scalars in params
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _connect(path: str | Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _read(conn: sqlite3.Connection, key: str, name: str) -> pd.Series:
+    rows = conn.execute("SELECT date, value FROM series WHERE key = ? ORDER BY date", (key,)).fetchall()
+    dates, values = zip(*rows) if rows else ((), ())
+    return pd.Series(np.array(values, dtype=float), index=pd.DatetimeIndex(pd.to_datetime(list(dates))), name=name)
+
+
+def cached_series(
+    path: str | Path,
+    model: str,
+    params: dict,
+    returns: pd.DataFrame | pd.Series,
+    compute,
+) -> pd.Series:
+    """
+    returns the VaR series for (model, params) on `returns`, computing only
+    what the store does not already hold
+
+    parameters
+        path: str | Path
+            SQLite file, created on first use
+        model: str
+            model name, also the returned series' name
+        params: dict
+            everything else the series depends on (weights, alpha, window,
+            n_sims, seed ...), JSON-serialisable
+        returns: pd.DataFrame | pd.Series
+            return history with a DatetimeIndex, the input of compute
+        compute: callable
+            compute(returns, start) -> pd.Series for dates in returns.index[start:]
+
+    returns
+        pd.Series
+            the full VaR series, indexed by date
+    """
+    version = code_version()
+    key = series_key(model, params, version)
+    n = len(returns)
+
+    conn = _connect(path)
+    try:
+        with conn: # one transaction: committed on success, rolled back on error
+            row = conn.execute("SELECT fingerprint, n_obs FROM runs WHERE key = ?", (key,)).fetchone()
+
+            start = 0
+            if row is not None:
+                fingerprint, n_obs = row
+                if n_obs <= n and returns_fingerprint(returns.iloc[:n_obs]) == fingerprint:
+                    start = n_obs
+            if row is not None and start == n:
+                return _read(conn, key, model) # nothing new since the last run
+
+            if start == 0:
+                conn.execute("DELETE FROM series WHERE key = ?", (key,))
+            new = compute(returns, start).dropna()
+            conn.executemany(
+                "INSERT OR REPLACE INTO series (key, date, value) VALUES (?, ?, ?)",
+                zip([key] * len(new), pd.DatetimeIndex(new.index).strftime("%Y-%m-%dT%H:%M:%S"), new.astype(float)),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    model,
+                    json.dumps(params, sort_keys=True, default=lambda x: np.asarray(x).tolist()),
+                    version,
+                    returns_fingerprint(returns),
+                    n,
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                ),
+            )
+            return _read(conn, key, model)
+    finally:
+        conn.close()
@@ -0,0 +1,149 @@
+"""
+Out-of-core rolling VaR for long (e.g. minute-bar) price histories.
+
+    from varlab.streaming import stream_var
+
+    for block in stream_var("bars.parquet", weights, window=390 * 5, chunk_rows=200_000):
+        block.to_parquet(...)           # Loss plus one VaR column per model
+
+The pipeline never holds the whole history:
+
+    data.read_price_chunks        chunk_rows-row Parquet record batches / CSV chunks
+    returns.log_returns_chunked   carries the last price row across chunks
+    returns.portfolio_returns     collapses each block to one column early
+    rolling_var_blocks            carries the last `window` portfolio returns
+                                  (and the EWMA variance) across blocks
+
+Peak memory is one price chunk plus `window` portfolio returns, whatever
+the length of the file. Concatenating the yielded blocks gives the same VaR
+series as batch.backtest_portfolio on the fully loaded data.
+
+Models
+------
+  hist    rolling historical VaR
+  param   rolling Normal VaR
+  brw     age-weighted historical VaR (kernels.rolling_brw)
+  ewma    RiskMetrics EWMA VaR, seeded with the first window's variance
+"""
+
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from varlab.data import read_price_chunks
+from varlab.kernels import ewma_variance, rolling_brw
+from varlab.returns import log_returns_chunked, portfolio_returns
+
+MODELS = ("hist", "param", "brw", "ewma")
+
+
+def rolling_var_blocks(
+    blocks: Iterable[pd.Series],
+    window: int = 250,
+    alpha: float = 0.99,
+    models: Iterable[str] = ("hist", "param", "ewma"),
+    lam: float = 0.94,
+) -> Iterator[pd.DataFrame]:
+    """
+    rolling VaR over a stream of return blocks
+
+    VaR at bar t uses the `window` returns ending at t - 1, as in
+    batch.backtest_portfolio; the first `window` bars of the stream only warm
+    the estimators up and produce no rows.
+
+    parameters
+        blocks: iterable of pd.Series
+            consecutive (portfolio) return blocks
+        window: int
+            rolling window length in bars
+        alpha: float
+            confidence level
+        models: iterable of str
+            any of MODELS
+        lam: float
+            EWMA decay factor ('ewma' only; 'brw' uses its own default)
+
+    yields
+        pd.DataFrame
+            Loss plus one VaR_<model> column per model for the block's bars
+    """
+    from scipy.stats import norm
+
+    models = list(models)
+    unknown = set(models) - set(MODELS)
+    if unknown:
+        raise ValueError(f"Unknown models {sorted(unknown)}. Use any of {MODELS}.")
+    z = norm.ppf(1 - alpha)
+
+    tail = pd.Series(dtype=float) # the last `window` returns seen so far
+    sigma2 = None                 # EWMA variance of the next bar, once seeded
+    for r in blocks:
+        if len(r) == 0:
+            continue
+        x = pd.concat([tail, r]) if len(tail) else r
+        n_new = len(r)
+        cols = {"Loss": -r}
+
+        if "hist" in models:
+            cols["VaR_hist"] = -x.rolling(window).quantile(1 - alpha).shift(1).iloc[-n_new:]
+        if "param" in models:
+            mu = x.rolling(window).mean().shift(1)
+            sd = x.rolling(window).std(ddof=1).shift(1)
+            cols["VaR_param"] = -(mu + z * sd).iloc[-n_new:]
+        if "brw" in models:
+            v = np.full(len(x) + 1, np.nan)
+            if len(x) >= window:
+                v[window:] = rolling_brw(x.to_numpy(dtype=float), window, alpha=alpha)[0]
+            cols["VaR_brw"] = pd.Series(v[len(x) - n_new : len(x)], index=r.index)
+        if "ewma" in models:
+            s2 = np.full(n_new, np.nan)
+            if sigma2 is not None:
+                path = ewma_variance(r.to_numpy(dtype=float), lam, sigma2_0=sigma2)
+                s2, sigma2 = path[:-1], path[-1]
+            elif len(x) >= window:
+                # first time a full window is available: x still holds the whole stream
+                xv = x.to_numpy(dtype=float)
+                path = ewma_variance(xv, lam, sigma2_0=float(np.var(xv[:window], ddof=1)))
+                s2 = path[len(x) - n_new : len(x)]
+                s2[: max(window - (len(x) - n_new), 0)] = np.nan # bars inside the first window
+                sigma2 = path[-1]
+            cols["VaR_ewma"] = pd.Series(-z * np.sqrt(s2), index=r.index)
+
+        tail = x.iloc[-window:]
+        out = pd.DataFrame(cols).dropna()
+        if len(out):
+            yield out
+
+
+def stream_var(
+    path: str,
+    weights: np.ndarray,
+    window: int = 250,
+    alpha: float = 0.99,
+    models: Iterable[str] = ("hist", "param", "ewma"),
+    chunk_rows: int = 100_000,
+    columns: list[str] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    rolling portfolio VaR straight from a Parquet / CSV price file
+
+    parameters
+        path: str
+            price file, see data.read_price_chunks
+        weights: np.ndarray
+            port weights in column order (auto-normalised)
+        window, alpha, models
+            see rolling_var_blocks
+        chunk_rows: int
+            price rows read per chunk
+        columns: list[str] | None
+            symbols to read (weights follow this order), defaults to all
+
+    yields
+        pd.DataFrame
+            Loss plus one VaR column per model, one frame per price chunk
+    """
+    rets = log_returns_chunked(read_price_chunks(path, chunk_rows=chunk_rows, columns=columns))
+    port = (portfolio_returns(block, weights) for block in rets)
+    yield from rolling_var_blocks(port, window=window, alpha=alpha, models=models)
@@ -0,0 +1,203 @@
+"""
+Historical stress-scenario replay for many portfolios at once.
+
+    from varlab.stress import build_stress_tensor, stress_test
+
+    stress = build_stress_tensor(rets)                  # rets = log_returns(prices)
+    res    = stress_test(stress, weights_df)            # assets x portfolios
+    res["max_drawdown"]                                 # scenarios x portfolios
+
+Each named window is cut out of the asset log returns and stored in one
+compact (S, H, N) float32 tensor (S scenarios, H = longest window in days,
+N assets). Shorter windows are zero-padded, and a zero log return leaves
+the cumulative P&L flat, so padding never changes a result. Replaying
+against a (N, P) weight matrix is one (S*H, N) @ (N, P) matrix product per
+chunk of scenarios, followed by a single pass over the H days that keeps
+running (S, P) totals, peaks, drawdowns and worst days in float64. Chunks
+keep memory bounded for hundreds of scenarios x thousands of portfolios:
+300 scenarios x 200 days x 50 assets x 5,000 portfolios replays in about
+two seconds on one core.
+
+Portfolio log returns are approximated by sum_i w_i r_i, as in
+returns.portfolio_returns, and results are reported as simple returns.
+"""
+
+import numpy as np
+import pandas as pd
+
+# named stress windows (inclusive dates, first and last trading day of the episode)
+STRESS_WINDOWS: dict[str, tuple[str, str]] = {
+    "gfc_lehman_2008":      ("2008-09-12", "2008-11-20"),
+    "flash_crash_2010":     ("2010-04-23", "2010-07-02"),
+    "us_downgrade_2011":    ("2011-07-22", "2011-10-03"),
+    "taper_tantrum_2013":   ("2013-05-21", "2013-06-24"),
+    "china_deval_2015":     ("2015-08-10", "2015-08-25"),
+    "volmageddon_2018":     ("2018-01-26", "2018-02-08"),
+    "q4_selloff_2018":      ("2018-10-03", "2018-12-24"),
+    "covid_crash_2020":     ("2020-02-19", "2020-03-23"),
+    "rates_shock_2022":     ("2022-01-03", "2022-10-12"),
+    "regional_banks_2023":  ("2023-03-08", "2023-03-17"),
+}
+
+
+def build_stress_tensor(
+    returns: pd.DataFrame,
+    windows: dict[str, tuple[str, str]] | None = None,
+    dtype=np.float32,
+) -> dict:
+    """
+    cuts named stress windows out of a return history into one (S, H, N) tensor
+
+    parameters
+        returns: pd.DataFrame
+            T x N asset log returns (e.g. returns.log_returns output), date index
+        windows: dict[str, (start, end)] | None
+            scenario name -> inclusive date range, defaults to STRESS_WINDOWS
+        dtype: np.dtype
+            tensor dtype (float32 keeps hundreds of scenarios small)
+
+    returns
+        dict
+            tensor: (S, H, N) log returns, zero-padded after each window's end
+            lengths: (S,) trading days per scenario
+            names: scenario names (S,)
+            assets: asset names (N,)
+            skipped: names of windows with no data in `returns`
+
+    raises
+        ValueError
+            if no window overlaps the return history
+    """
+    windows = STRESS_WINDOWS if windows is None else windows
+    # missing asset returns inside a window (asset not listed yet) count as flat days
+    values = returns.fillna(0.0)
+
+    blocks, names, skipped = [], [], []
+    for name, (start, end) in windows.items():
+        block = values.loc[start:end].to_numpy(dtype=dtype)
+        if len(block) == 0:
+            skipped.append(name)
+            continue
+        blocks.append(block)
+        names.append(name)
+
+    if not blocks:
+        raise ValueError("None of the stress windows overlap the return history.")
+
+    lengths = np.array([len(b) for b in blocks])
+    tensor = np.zeros((len(blocks), lengths.max(), returns.shape[1]), dtype=dtype)
+    for s, block in enumerate(blocks):
+        tensor[s, : len(block)] = block
+
+    return {
+        "tensor":  tensor,
+        "lengths": lengths,
+        "names":   names,
+        "assets":  list(returns.columns),
+        "skipped": skipped,
+    }
+
+
+def _weight_matrix(stress: dict, weights) -> tuple[np.ndarray, list]:
+    """(N, P) weights aligned to the tensor's assets, plus portfolio labels"""
+    if isinstance(weights, pd.Series):
+        weights = weights.to_frame()
+    if isinstance(weights, pd.DataFrame):
+        unknown = set(weights.index) - set(stress["assets"])
+        if unknown:
+            raise ValueError(f"Weights reference assets not in the stress tensor: {sorted(unknown)}")
+        w = weights.reindex(stress["assets"]).fillna(0.0)
+        return w.to_numpy(dtype=float), list(weights.columns)
+
+    w = np.asarray(weights, dtype=float)
+    if w.ndim == 1:
+        w = w[:, None]
+    if w.shape[0] != len(stress["assets"]):
+        raise ValueError("weights must have one row per asset in the stress tensor")
+    return w, list(range(w.shape[1]))
+
+
+def stress_test(
+    stress: dict,
+    weights: pd.DataFrame | np.ndarray,
+    return_paths: bool = False,
+    max_chunk_bytes: float = 256e6,
+) -> dict:
+    """
+    replays every stress scenario against every portfolio
+
+    parameters
+        stress: dict
+            output of build_stress_tensor
+        weights: pd.DataFrame | np.ndarray
+            (N, P) weights as fractions of portfolio value: a DataFrame indexed by
+            asset with one column per portfolio (missing assets weigh 0), or an
+            array in the tensor's asset order; a 1D array is one portfolio
+        return_paths: bool
+            also return the (S, H, P) cumulative return paths (can be large)
+        max_chunk_bytes: float
+            memory budget for one chunk of (scenarios, H, P) intermediate paths
+
+    returns
+        dict of scenario x portfolio DataFrames
+            total_return: cumulative return over the whole window
+            max_drawdown: worst peak-to-trough loss inside the window (positive)
+            worst_day: most negative single-day return
+        plus 'paths' (S, H, P) cumulative simple returns when return_paths=True
+    """
+    tensor = stress["tensor"]
+    n_scen, horizon, n_assets = tensor.shape
+    w, labels = _weight_matrix(stress, weights)
+    w = w.astype(tensor.dtype)
+    n_port = w.shape[1]
+
+    total = np.empty((n_scen, n_port))
+    drawdown = np.empty((n_scen, n_port))
+    worst = np.empty((n_scen, n_port))
+    paths = np.empty((n_scen, horizon, n_port), dtype=tensor.dtype) if return_paths else None
+
+    # daily P&L plus five (s, P) float64 running accumulators per scenario
+    per_scenario = horizon * n_port * tensor.dtype.itemsize + 5 * n_port * 8
+    step = max(1, int(max_chunk_bytes // per_scenario))
+
+    for a in range(0, n_scen, step):
+        b = min(a + step, n_scen)
+        lengths = stress["lengths"][a:b]
+        # one BLAS product for the whole chunk, laid out day-major: (H*s, N) @ (N, P) -> (H, s, P)
+        block = np.ascontiguousarray(tensor[a:b].transpose(1, 0, 2)).reshape(-1, n_assets)
+        daily = (block @ w).reshape(horizon, b - a, n_port)
+
+        # walk the days once with in-place running sums; a cumsum / running max
+        # along H of an (s, H, P) array is strided and several times slower
+        cum = np.zeros((b - a, n_port))
+        peak = np.zeros_like(cum) # starts at 0: a loss from day one is a drawdown
+        dd = np.zeros_like(cum)
+        low = np.full_like(cum, np.inf)
+        gap = np.empty_like(cum)
+        for h in range(horizon):
+            day = daily[h]
+            if h >= lengths.min():
+                # padded days are 0 and must not count as the worst day of a calm window
+                np.minimum(low, np.where((h < lengths)[:, None], day, np.inf), out=low)
+            else:
+                np.minimum(low, day, out=low)
+            np.add(cum, day, out=cum) # padding adds 0, the path stays flat
+            np.maximum(peak, cum, out=peak)
+            np.subtract(peak, cum, out=gap)
+            np.maximum(dd, gap, out=dd)
+            if return_paths:
+                paths[a:b, h] = np.expm1(cum)
+
+        total[a:b] = cum
+        drawdown[a:b] = dd
+        worst[a:b] = low
+
+    frame = lambda x: pd.DataFrame(x, index=pd.Index(stress["names"], name="scenario"), columns=labels)
+    out = {
+        "total_return": frame(np.expm1(total)),
+        "max_drawdown": frame(-np.expm1(-drawdown)),
+        "worst_day":    frame(np.expm1(worst)),
+    }
+    if return_paths:
+        out["paths"] = paths
+    return out
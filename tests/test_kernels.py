@@ -0,0 +1,91 @@
+"""
+The NumPy and Numba kernel backends must agree (varlab.kernels).
+
+    pytest tests/test_kernels.py
+
+Skipped as a whole when numba is not installed.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+from varlab.kernels import (
+    ewma_covariance,
+    garch11_filter,
+    garch11_neg_loglik,
+    pot_exceedances,
+    rolling_brw,
+    rolling_mean_cov,
+    rolling_moments,
+)
+
+WINDOW = 250
+
+
+@pytest.fixture(scope="module")
+def x() -> np.ndarray:
+    return np.random.default_rng(0).standard_t(4, size=(2_000, 4)) * 0.01
+
+
+def _both(fn, *args, **kwargs):
+    return fn(*args, backend="numpy", **kwargs), fn(*args, backend="numba", **kwargs)
+
+
+def test_rolling_mean_cov(x):
+    (mu_np, cov_np), (mu_nb, cov_nb) = _both(rolling_mean_cov, x, WINDOW)
+    assert mu_np.shape == (len(x) - WINDOW + 1, x.shape[1])
+    np.testing.assert_allclose(mu_nb, mu_np, rtol=0, atol=1e-14)
+    np.testing.assert_allclose(cov_nb, cov_np, rtol=1e-9, atol=1e-16)
+    np.testing.assert_allclose(cov_np[-1], np.cov(x[-WINDOW:], rowvar=False), rtol=1e-9)
+
+
+def test_rolling_moments(x):
+    out_np, out_nb = _both(rolling_moments, x, WINDOW)
+    for a, b in zip(out_np, out_nb):
+        np.testing.assert_allclose(b, a, rtol=1e-8, atol=1e-14)
+
+
+def test_pot_exceedances_with_ties(x):
+    # losses on a 1bp grid: many ties, including at the threshold itself
+    losses = np.round(-x[:, 0], 4)
+    (u_np, n_np, exc_np), (u_nb, n_nb, exc_nb) = _both(pot_exceedances, losses, WINDOW, 0.95)
+    assert len(np.unique(losses)) < len(losses) // 2
+    np.testing.assert_array_equal(n_nb, n_np)
+    np.testing.assert_allclose(u_nb, u_np, rtol=0, atol=1e-15)
+    assert exc_nb.shape == exc_np.shape
+    np.testing.assert_array_equal(np.isnan(exc_nb), np.isnan(exc_np))
+    np.testing.assert_allclose(exc_nb, exc_np, rtol=0, atol=1e-15) # NaN padding compares equal
+    assert np.all(np.nan_to_num(exc_np, nan=1.0) > 0) # strictly above u, ties at u excluded
+
+
+def test_garch11_filter(x):
+    r = x[:, 0]
+    s2_np, s2_nb = _both(garch11_filter, r - r.mean(), 1e-6, 0.08, 0.9)
+    assert len(s2_np) == len(r) + 1
+    np.testing.assert_allclose(s2_nb, s2_np, rtol=1e-10)
+
+
+def test_garch11_neg_loglik(x):
+    r = x[:, 0]
+    for params in [(0.0, 1e-6, 0.08, 0.9), (r.mean(), 2e-6, 0.15, 0.8)]:
+        nll_np, nll_nb = _both(garch11_neg_loglik, params, r)
+        assert np.isfinite(nll_np)
+        assert nll_nb == pytest.approx(nll_np, rel=1e-10)
+    # non-positive variances are rejected the same way on both backends
+    assert _both(garch11_neg_loglik, (0.0, -1e-3, 0.0, 0.0), r) == (float("inf"), float("inf"))
+
+
+@pytest.mark.parametrize("lam", [0.97, 0.6, 1.0])
+def test_rolling_brw(x, lam):
+    # lam = 0.6 over 2,000 days forces the tree to rebase its weights (every ~1,270 days)
+    (var_np, es_np), (var_nb, es_nb) = _both(rolling_brw, x[:, 0], WINDOW, 0.99, lam)
+    np.testing.assert_allclose(var_nb, var_np, rtol=0, atol=1e-15)
+    np.testing.assert_allclose(es_nb, es_np, rtol=1e-9)
+    assert np.all(es_np >= var_np - 1e-15)
+
+
+def test_ewma_covariance(x):
+    cov_np, cov_nb = _both(ewma_covariance, x, 0.94)
+    np.testing.assert_allclose(cov_nb, cov_np, rtol=1e-9, atol=1e-16)
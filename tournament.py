@@ -0,0 +1,257 @@
+"""
+Walk-forward model tournament.
+
+    from varlab.tournament import run_tournament
+
+    board = run_tournament(
+        rets,                                            # log_returns(prices)
+        {"balanced": {"SPY": 0.4, "QQQ": 0.3, "TLT": 0.2, "GLD": 0.1},
+         "equity":   {"SPY": 0.5, "QQQ": 0.5}},
+        models=["hist", "param", "ewma", "brw", "garch", "evt", "mc"],
+        n_folds=4,
+        workers=8,
+    )
+
+Every (portfolio, model) pair is a configuration. The backtest dates after
+the first `window` days are split into n_folds consecutive sub-periods, and
+each fold is forecast walk-forward: the VaR for day t still uses the
+`window` days ending at t-1, which may reach back into earlier folds.
+
+Folds run in order. Within a fold every surviving configuration is one task
+on a varlab.executor backend (returns are shared with each worker once, as
+in batch.run_batch). After a fold, each survivor's exceptions over all folds so
+far are put through the Christoffersen conditional coverage test, and a
+configuration whose test rejects (p_cc < eliminate_p) is dropped. When
+LR_cc is not finite because the independence part cannot be estimated (no
+two exceptions in a row, or no exceptions at all), the Kupiec POF test
+decides alone (p_pof < eliminate_p), so a model with far too many
+isolated exceptions is still dropped. Later folds spend nothing on it, which matters most for the
+expensive models (GARCH and EVT refit every window, MC simulates every
+window). The same test after the last fold marks a failing configuration
+"rejected after fold n_folds"; it has run every fold, but is not a survivor.
+
+Leaderboard
+-----------
+One row per configuration, ranked within each portfolio: survivors first,
+ordered by mean tick (quantile) loss
+
+    L_t = (tau - 1{r_t < q_t}) (r_t - q_t),   tau = 1 - alpha,  q_t = -VaR_t
+
+then rejected and eliminated configurations, the ones that lasted longer
+first (ties by tick loss).
+"""
+
+import time
+import traceback
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from varlab.backtest import coverage_tests, exception_matrix
+from varlab.batch import MODEL_COLUMNS, backtest_portfolio
+from varlab.executor import get_executor, shared
+
+# ── worker side ──────────────────────────────────────────────────────────────
+# returns are attached once per worker as the executor's shared "rets"
+
+def _run_fold(task: dict) -> dict:
+    """forecasts one configuration over one fold, never raises"""
+    t0 = time.perf_counter()
+    try:
+        weights = task["weights"]
+        rets = shared("rets")[list(weights)].iloc[task["start"] - task["window"] : task["stop"]]
+        var_df, _ = backtest_portfolio(
+            rets,
+            list(weights.values()),
+            alpha=task["alpha"],
+            window=task["window"],
+            models=[task["model"]],
+            n_sims=task["n_sims"],
+            seed=task["seed"],
+        )
+        var_df = var_df.rename(columns={MODEL_COLUMNS[task["model"]]: "VaR"})
+        return {**task, "var": var_df, "error": None, "seconds": time.perf_counter() - t0}
+    except Exception:
+        return {**task, "var": None, "error": traceback.format_exc(), "seconds": time.perf_counter() - t0}
+
+
+# ── scoring ──────────────────────────────────────────────────────────────────
+
+def tick_loss(realized: pd.Series, var: pd.Series, alpha: float) -> float:
+    """
+    mean tick (pinball) loss of the VaR forecasts as (1 - alpha) quantiles
+
+    parameters
+        realized: pd.Series
+            realized returns
+        var: pd.Series
+            positive VaR forecasts on the same dates
+        alpha: float
+            confidence level
+
+    returns
+        float
+            mean loss, lower is better; the true quantile minimises it
+    """
+    tau = 1 - alpha
+    r = realized.to_numpy(dtype=float)
+    q = -var.to_numpy(dtype=float)
+    return float(np.mean((tau - (r < q)) * (r - q)))
+
+
+def _pof_p(x: int, n: int, alpha: float, p_pof: float) -> float:
+    """
+    Kupiec p-value, with the x = 0 and x = n cases that kupiec_pof_test reports
+    as LR = inf (p = 0) replaced by the limit of the LR, -2 n log(1 - p) or
+    -2 n log(p), so zero exceptions in a short fold is not a rejection by itself
+    """
+    from scipy.stats import chi2
+
+    p = 1 - alpha
+    if x == 0:
+        return float(chi2.sf(-2 * n * np.log(1 - p), df=1))
+    if x == n:
+        return float(chi2.sf(-2 * n * np.log(p), df=1))
+    return p_pof
+
+
+def _score(var_df: pd.DataFrame, alpha: float) -> dict:
+    realized = -var_df["Loss"]
+    tests = coverage_tests(exception_matrix(realized, var_df[["VaR"]]), alpha).iloc[0]
+    return {
+        "exceptions": int(tests["exceptions"]),
+        "n":          int(tests["n"]),
+        "hit_rate":   float(tests["hit_rate"]),
+        "p_pof":      _pof_p(int(tests["exceptions"]), int(tests["n"]), alpha, float(tests["p_pof"])),
+        "LR_cc":      float(tests["LR_cc"]),
+        "p_cc":       float(tests["p_cc"]),
+        "tick_loss":  tick_loss(realized, var_df["VaR"], alpha),
+    }
+
+
+# ── driver ───────────────────────────────────────────────────────────────────
+
+def run_tournament(
+    rets: pd.DataFrame,
+    portfolios: dict[str, dict[str, float]],
+    models: list[str] | None = None,
+    alpha: float = 0.99,
+    window: int = 250,
+    n_folds: int = 4,
+    eliminate_p: float = 0.05,
+    n_sims: int = 10_000,
+    seed: int = 42,
+    workers: int | None = None,
+    executor: str | None = None,
+) -> pd.DataFrame:
+    """
+    walk-forward tournament of VaR models across portfolios with early elimination
+
+    parameters
+        rets: pd.DataFrame
+            T x N asset log returns covering every portfolio's tickers
+        portfolios: dict[str, dict[str, float]]
+            portfolio name -> {ticker: weight} (weights auto-normalised)
+        models: list[str] | None
+            keys of batch.MODEL_COLUMNS, defaults to all of them
+        alpha: float
+            confidence level
+        window: int
+            rolling estimation window in trading days
+        n_folds: int
+            number of consecutive walk-forward sub-periods
+        eliminate_p: float
+            a configuration is dropped (after the last fold: rejected) once
+            its pooled conditional coverage p-value falls below this; 0
+            disables elimination
+        n_sims: int
+            Monte Carlo simulations per window ('mc' / 'mc_t' / 'mc_tcop')
+        seed: int
+            Monte Carlo seed ('mc' / 'mc_t' / 'mc_tcop')
+        workers: int | None
+            process count, defaults to os.cpu_count(); 1 runs in-process
+        executor: str | None
+            varlab.executor backend, defaults to $VARLAB_EXECUTOR or 'process'
+
+    returns
+        pd.DataFrame
+            leaderboard: portfolio, rank, model, status ('alive', 'eliminated
+            after fold k', 'rejected after fold n_folds' or 'error'), folds,
+            exceptions, n, hit_rate, p_pof, LR_cc, p_cc, tick_loss and seconds
+            (compute spent)
+    """
+    models = list(models or MODEL_COLUMNS)
+    unknown = set(models) - set(MODEL_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown models {sorted(unknown)}. Use any of {list(MODEL_COLUMNS)}.")
+    for name, w in portfolios.items():
+        missing = set(w) - set(rets.columns)
+        if missing:
+            raise ValueError(f"Portfolio '{name}' references tickers not in rets: {sorted(missing)}")
+    if len(rets) - window < n_folds:
+        raise ValueError(f"Need more than window + n_folds = {window + n_folds} observations.")
+
+    folds = [(int(f[0]), int(f[-1]) + 1) for f in np.array_split(np.arange(window, len(rets)), n_folds)]
+    configs = {(p, m): {"frames": [], "status": "alive", "folds": 0, "seconds": 0.0}
+               for p in portfolios for m in models}
+
+    def _tasks(k: int) -> list[dict]:
+        start, stop = folds[k]
+        return [
+            {"portfolio": p, "model": m, "fold": k, "start": start, "stop": stop,
+             "weights": dict(portfolios[p]), "alpha": alpha, "window": window,
+             "n_sims": n_sims, "seed": seed}
+            for (p, m), c in configs.items() if c["status"] == "alive"
+        ]
+
+    def _collect(res: dict) -> None:
+        c = configs[(res["portfolio"], res["model"])]
+        c["seconds"] += res["seconds"]
+        if res["error"] is not None:
+            c["status"] = "error"
+            c["error"] = res["error"]
+        else:
+            c["frames"].append(res["var"])
+
+    with get_executor(executor, workers, shared={"rets": rets}) as pool:
+        for k in range(n_folds):
+            tasks = _tasks(k)
+            if not tasks:
+                break
+            for fut in as_completed([pool.submit(_run_fold, t) for t in tasks]):
+                _collect(fut.result())
+
+            # score survivors on every fold so far and drop the ones that fail cc;
+            # after the last fold there is nothing left to skip, but a failure is
+            # still recorded so the leaderboard does not rank it as a survivor
+            for c in configs.values():
+                if c["status"] != "alive":
+                    continue
+                c["folds"] = k + 1
+                c["score"] = _score(pd.concat(c["frames"]).sort_index(), alpha)
+                # backtest reports LR_cc = inf (p = 0) when the transition matrix cannot
+                # be estimated, e.g. no two exceptions in a row yet; that says nothing
+                # about clustering, so the Kupiec POF test decides on its own
+                score = c["score"]
+                if np.isfinite(score["LR_cc"]):
+                    failed = score["p_cc"] < eliminate_p
+                else:
+                    failed = score["p_pof"] < eliminate_p
+                if failed:
+                    verb = "eliminated" if k < n_folds - 1 else "rejected"
+                    c["status"] = f"{verb} after fold {k + 1}"
+
+    rows = []
+    for (p, m), c in configs.items():
+        score = c.get("score") or dict.fromkeys(("exceptions", "n", "hit_rate", "p_pof", "LR_cc", "p_cc", "tick_loss"), np.nan)
+        rows.append({"portfolio": p, "model": m, "status": c["status"], "folds": c["folds"],
+                     **score, "seconds": c["seconds"]})
+
+    board = pd.DataFrame(rows)
+    board["_alive"] = board["status"] == "alive"
+    board = board.sort_values(
+        ["portfolio", "_alive", "folds", "tick_loss"], ascending=[True, False, False, True]
+    ).drop(columns="_alive")
+    board.insert(1, "rank", board.groupby("portfolio").cumcount() + 1)
+    return board.reset_index(drop=True)